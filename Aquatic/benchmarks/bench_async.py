@@ -0,0 +1,62 @@
+"""
+AsyncWeatherIngestor over one stand-in feed per station of a synthetic input, against process_csv on the same
+rows. Reports throughput, the queue high-water mark and checks the output against process_csv.
+
+    python benchmarks/bench_async.py --rows 1e6 --stations 50 --workers 2
+"""
+import argparse
+import asyncio
+import io
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+from synthetic import generate_csv
+
+import weather
+from weather_async import AsyncWeatherIngestor, stand_in_feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=lambda value: int(float(value)), default=1000000)
+    parser.add_argument('--stations', type=int, default=50, help='Number of synthetic stations, one feed each')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--max-pending-batches', type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        generate_csv(path, args.rows, args.stations)
+        with open(path) as f:
+            f.readline()
+            lines = f.readlines()
+
+    feeds = defaultdict(list)
+    for line in lines:
+        feeds[line.split(',', 1)[0]].append(line)
+
+    start = time.perf_counter()
+    expected_io = io.StringIO()
+    weather.process_csv(io.StringIO('header\n' + ''.join(lines)), expected_io)
+    sequential = time.perf_counter() - start
+    expected = sorted(expected_io.getvalue().strip().split('\n')[1:])
+    print(f'{len(lines):,} rows in {len(feeds)} feeds')
+    print(f'process_csv: {len(lines) / sequential:10,.0f} rows/s')
+
+    ingestor = AsyncWeatherIngestor(batch_size=args.batch_size, max_pending_batches=args.max_pending_batches,
+                                    workers=args.workers)
+    start = time.perf_counter()
+    emitted = asyncio.run(ingestor.run([stand_in_feed(feed, lines_per_tick=args.batch_size)
+                                        for feed in feeds.values()]))
+    elapsed = time.perf_counter() - start
+    exact = sorted(str(x) for x in emitted) == expected
+    print(f'async ingest: {len(lines) / elapsed:9,.0f} rows/s with {ingestor.workers} workers, '
+          f'queue high-water {ingestor.max_queue_depth}/{args.max_pending_batches} batches, '
+          f'output {"matches" if exact else "differs from"} process_csv')
+
+
+if __name__ == '__main__':
+    main()
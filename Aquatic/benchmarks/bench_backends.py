@@ -0,0 +1,42 @@
+"""
+process_csv 'python' backend against the 'pandas' backend on a synthetically enlarged chicago_beach_weather.csv.
+The default factor gives just over 10M rows.
+
+    python benchmarks/bench_backends.py --factor 34000
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from synthetic import enlarge_csv
+
+import weather
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=34000, help='Number of copies of the sample rows')
+    parser.add_argument('--backends', nargs='+', default=list(weather.BACKENDS), choices=weather.BACKENDS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        rows = enlarge_csv(path, args.factor)
+        print(f'{rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB')
+
+        outputs = {}
+        for backend in args.backends:
+            start = time.perf_counter()
+            with open(path) as reader:
+                outputs[backend] = io.StringIO()
+                weather.process_csv(reader, outputs[backend], backend=backend)
+            elapsed = time.perf_counter() - start
+            print(f'{backend:>8}: {elapsed:7.2f}s {rows / elapsed:12,.0f} rows/s')
+
+        assert len({output.getvalue() for output in outputs.values()}) == 1, 'backend outputs differ'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Cold (parse and write the cache) against warm (load the cache) runs of WeatherCache on a synthetically
+enlarged chicago_beach_weather.csv.
+
+    python benchmarks/bench_cache.py --factor 5000
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from synthetic import enlarge_csv
+
+import weather
+from weather_cache import WeatherCache, process_csv_cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=5000, help='Number of copies of the sample rows')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        rows = enlarge_csv(path, args.factor)
+        cache = WeatherCache(os.path.join(tmp, 'cache'))
+        print(f'{rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB')
+
+        start = time.perf_counter()
+        cache.load(path)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        cache.load(path)
+        warm = time.perf_counter() - start
+        print(f'load columns: cold {cold * 1e3:9.1f} ms, warm {warm * 1e3:9.1f} ms, '
+              f'cache file {os.path.getsize(cache.cache_path(path)) / 1e6:.1f} MB')
+
+        start = time.perf_counter()
+        with open(path) as reader:
+            expected = io.StringIO()
+            weather.process_csv(reader, expected, backend='pandas')
+        text = time.perf_counter() - start
+        start = time.perf_counter()
+        output = io.StringIO()
+        process_csv_cached(path, output, cache)
+        cached = time.perf_counter() - start
+        assert output.getvalue() == expected.getvalue()
+        print(f'aggregate:    from text {text * 1e3:9.1f} ms, from cache {cached * 1e3:9.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Cost of each extra metric in aggregate_metrics, from one metric up to all NUMERIC_COLUMNS, on a synthetically
+enlarged chicago_beach_weather.csv.
+
+    python benchmarks/bench_metrics.py --factor 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import enlarge_csv
+
+from weather_metrics import NUMERIC_COLUMNS, aggregate_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=2000, help='Number of copies of the sample rows')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        rows = enlarge_csv(path, args.factor)
+        print(f'{rows:,} rows')
+
+        for count in (1, 2, 4, 8, len(NUMERIC_COLUMNS)):
+            start = time.perf_counter()
+            with open(path) as reader:
+                reader.readline()
+                aggregate_metrics(reader, NUMERIC_COLUMNS[:count])
+            elapsed = time.perf_counter() - start
+            print(f'{count:2} metrics: {elapsed:6.2f}s, {elapsed / count:6.3f}s per metric')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Memory of the mmap reader against the line-based and pandas paths of process_csv, on a synthetically enlarged
+chicago_beach_weather.csv. Every path runs in a fresh interpreter and reports its untraced run time, the
+tracemalloc peak of a second, traced run and the number of memory blocks still allocated at its end, and the
+process peak RSS (which includes the interpreter, pandas and any mapped file pages).
+
+    python benchmarks/bench_mmap.py --factor 2000
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import enlarge_csv
+
+import weather
+import weather_mmap
+
+MODES = ('python', 'pandas', 'mmap')
+
+
+def process(mode: str, path: str) -> io.StringIO:
+    output = io.StringIO()
+    if mode == 'mmap':
+        weather_mmap.process_csv_mmap(path, output)
+    else:
+        with open(path) as reader:
+            weather.process_csv(reader, output, backend=mode)
+    return output
+
+
+def run(mode: str, path: str) -> dict:
+    start = time.perf_counter()
+    output = process(mode, path)
+    elapsed = time.perf_counter() - start
+
+    del output
+    tracemalloc.start()
+    output = process(mode, path)
+    _, peak = tracemalloc.get_traced_memory()
+    # Blocks still allocated once the run is done: the aggregation, the output and whatever the path retained
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    return {
+        'seconds': elapsed,
+        'tracemalloc_peak_mb': peak / 1e6,
+        'allocated_blocks': blocks,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        'output_lines': output.getvalue().count('\n'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=2000, help='Number of copies of the sample rows')
+    parser.add_argument('--run', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args.run, args.path)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        rows = enlarge_csv(path, args.factor)
+        print(f'{rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB')
+
+        results = {}
+        for mode in MODES:
+            completed = subprocess.run([sys.executable, __file__, '--run', mode, '--path', path],
+                                       check=True, capture_output=True, text=True)
+            results[mode] = json.loads(completed.stdout)
+            print(f"{mode:>8}: {results[mode]['seconds']:6.2f}s, tracemalloc peak {results[mode]['tracemalloc_peak_mb']:8.1f} MB, "
+                  f"{results[mode]['allocated_blocks']:10,} blocks allocated, peak RSS {results[mode]['peak_rss_mb']:8.1f} MB")
+
+        assert len({result['output_lines'] for result in results.values()}) == 1, 'outputs differ'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+OutOfOrderDailyAggregator on time-sorted, locally shuffled (bounded delay) and fully shuffled input, built from a
+synthetically enlarged chicago_beach_weather.csv. Reports throughput, the open-window high-water mark and an
+estimate of its memory, and checks the output against process_csv.
+
+    python benchmarks/bench_out_of_order.py --factor 500 --max-delay-rows 2000
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from synthetic import enlarge_csv
+
+import weather
+from weather_stream import OutOfOrderDailyAggregator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=500, help='Number of copies of the sample rows')
+    parser.add_argument('--max-delay-rows', type=int, default=2000, help='Displacement bound of the local shuffle')
+    parser.add_argument('--lateness-hours', type=float, default=6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        enlarge_csv(path, args.factor)
+        with open(path) as f:
+            f.readline()
+            lines = f.readlines()
+
+    # Oldest first, stations interleaved as a merged live feed would be
+    lines.sort(key=lambda line: weather.parse_line(line)[1])
+    rng = random.Random(0)
+    inputs = {
+        'sorted': (lines, timedelta(hours=args.lateness_hours)),
+        'locally shuffled': ([line for _, line in sorted((i + rng.uniform(0, args.max_delay_rows), line)
+                                                          for i, line in enumerate(lines))],
+                             timedelta(hours=args.lateness_hours)),
+        'fully shuffled': (rng.sample(lines, len(lines)), None),
+    }
+
+    expected_io = io.StringIO()
+    weather.process_csv(io.StringIO('header\n' + ''.join(lines)), expected_io)
+    expected = sorted(expected_io.getvalue().strip().split('\n')[1:])
+    print(f'{len(lines):,} rows, {len(expected):,} (station, day) windows')
+
+    for name, (rows, lateness) in inputs.items():
+        aggregator = OutOfOrderDailyAggregator(lateness=lateness)
+        start = time.perf_counter()
+        emitted = aggregator.add_lines(rows) + aggregator.flush()
+        elapsed = time.perf_counter() - start
+        exact = sorted(str(x) for x in emitted) == expected
+        print(f'{name:>17} (lateness {str(lateness):>8}): {len(rows) / elapsed:10,.0f} rows/s, '
+              f'{aggregator.max_open_windows:6,} max open windows, '
+              f'~{aggregator.estimated_window_bytes / 1e6:6.2f} MB estimated peak, '
+              f'{aggregator.late_readings:,} late, output {"matches" if exact else "differs from"} process_csv')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Scaling of process_csv_parallel from 1 to N processes on a synthetically enlarged chicago_beach_weather.csv.
+
+    python benchmarks/bench_parallel.py --factor 20000 --max-processes 8
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from synthetic import enlarge_csv
+
+import weather
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=5000, help='Number of copies of the sample rows')
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        rows = enlarge_csv(path, args.factor)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f'{rows} rows, {size_mb:.1f} MB')
+
+        start = time.perf_counter()
+        with open(path) as reader:
+            expected = io.StringIO()
+            weather.process_csv(reader, expected)
+        baseline = time.perf_counter() - start
+        print(f'process_csv:            {baseline:7.2f}s {rows / baseline:12,.0f} rows/s')
+
+        processes = 1
+        while processes <= args.max_processes:
+            start = time.perf_counter()
+            output = io.StringIO()
+            weather.process_csv_parallel(path, output, processes=processes, chunk_bytes=args.chunk_mb * 1024 * 1024)
+            elapsed = time.perf_counter() - start
+            assert output.getvalue() == expected.getvalue(), 'parallel output differs from process_csv'
+            print(f'process_csv_parallel({processes:2}): {elapsed:7.2f}s {rows / elapsed:12,.0f} rows/s '
+                  f'speedup x{baseline / elapsed:.2f}')
+            processes *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+ShardedStationWriter throughput for thousands of stations at a few open-file caps, against writing the same
+rows to a single file with write_daily_weathers. The enlarged sample gets 3 new stations per copy.
+
+    python benchmarks/bench_shard.py --factor 2000 --caps 16 256 4096
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import enlarge_csv
+
+import weather
+from weather_shard import ShardedStationWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=2000, help='Number of copies of the sample rows')
+    parser.add_argument('--caps', type=int, nargs='+', default=[16, 256, 4096], help='max_open_files values')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        enlarge_csv(path, args.factor)
+        with open(path) as reader:
+            reader.readline()
+            # Interleave stations the way a day-by-day aggregation emits them
+            daily_weathers = sorted(weather.aggregate_lines(reader).values(), key=lambda x: x.date)
+        stations = len({x.station_name for x in daily_weathers})
+        print(f'{len(daily_weathers):,} rows over {stations:,} stations')
+
+        start = time.perf_counter()
+        with open(os.path.join(tmp, 'single.csv'), 'w') as writer:
+            weather.write_daily_weathers(writer, daily_weathers)
+        single = time.perf_counter() - start
+        print(f'{"single file":>22}: {single * 1e3:8.1f} ms')
+
+        for cap in args.caps:
+            output_dir = os.path.join(tmp, f'shards_{cap}')
+            start = time.perf_counter()
+            with ShardedStationWriter(output_dir, max_open_files=cap) as writer:
+                writer.write_all(daily_weathers)
+            elapsed = time.perf_counter() - start
+            print(f'{f"sharded, {cap} open":>22}: {elapsed * 1e3:8.1f} ms, {writer.files_opened:,} open() calls')
+
+
+if __name__ == '__main__':
+    main()
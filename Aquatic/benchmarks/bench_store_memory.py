@@ -0,0 +1,72 @@
+"""
+Bytes per (station, day) of the Dict[(station, date), OutputDailyWeather] built by process_csv against
+DailyWeatherStore, measured with tracemalloc on synthetic stations.
+
+    python benchmarks/bench_store_memory.py --stations 2000 --days 365
+"""
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+from synthetic import parentdir  # noqa: F401, puts the weather modules on sys.path
+
+import weather
+from weather_store import DailyWeatherStore
+
+
+def readings(stations: int, days: int, per_day: int):
+    start = datetime(2016, 1, 1)
+    for day in range(days):
+        for hour in range(per_day):
+            for station in range(stations):
+                # A fresh datetime per row, as parsing a CSV line gives
+                timestamp = start + timedelta(days=day, hours=hour)
+                temperature = float((station + day * 7 + hour * 3) % 400) / 10 - 10
+                yield f'Station {station}', timestamp, temperature, temperature - 1.5
+
+
+def measure(aggregate, rows):
+    tracemalloc.start()
+    state = aggregate(rows)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return state, current, peak
+
+
+def aggregate_dict(rows):
+    temperatures = {}
+    for station_name, timestamp, air_temperature, wet_bulb_temperature in rows:
+        key = (station_name, timestamp.date())
+        if key not in temperatures:
+            temperatures[key] = weather.OutputDailyWeather(
+                station_name, key[1], timestamp, timestamp,
+                air_temperature, air_temperature, air_temperature, air_temperature, wet_bulb_temperature)
+        else:
+            temperatures[key].update_temperature(timestamp, air_temperature)
+    return temperatures
+
+
+def aggregate_store(rows):
+    store = DailyWeatherStore()
+    for reading in rows:
+        store.update(*reading)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stations', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--per-day', type=int, default=2, help='Readings per station and day')
+    args = parser.parse_args()
+
+    windows = args.stations * args.days
+    print(f'{windows:,} (station, day) windows')
+    for name, aggregate in (('dict of OutputDailyWeather', aggregate_dict), ('DailyWeatherStore', aggregate_store)):
+        state, current, peak = measure(aggregate, readings(args.stations, args.days, args.per_day))
+        assert len(state) == windows
+        print(f'{name:>28}: {current / windows:8.1f} bytes/window retained, {peak / windows:8.1f} at peak')
+
+
+if __name__ == '__main__':
+    main()
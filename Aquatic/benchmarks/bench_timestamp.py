@@ -0,0 +1,55 @@
+"""
+FixedFormatTimestampParser against datetime.strptime, on the sample data scaled up 1000x.
+
+    python benchmarks/bench_timestamp.py --factor 1000
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from synthetic import enlarge_csv
+
+import weather
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--factor', type=int, default=1000, help='Number of copies of the sample rows')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'weather.csv')
+        rows = enlarge_csv(path, args.factor)
+        with open(path) as f:
+            f.readline()
+            timestamps = [line.split(weather.CSV_SEP)[weather.InputColumns.measurement_timestamp] for line in f]
+        print(f'{rows} rows')
+
+        parsers = {
+            'strptime': weather.strptime_timestamp,
+            'fixed-format': weather.FixedFormatTimestampParser(),
+        }
+
+        outputs = {}
+        for name, parse_timestamp in parsers.items():
+            start = time.perf_counter()
+            for value in timestamps:
+                parse_timestamp(value)
+            parse_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open(path) as reader:
+                outputs[name] = io.StringIO()
+                weather.process_csv(reader, outputs[name], parse_timestamp=parse_timestamp)
+            csv_elapsed = time.perf_counter() - start
+
+            print(f'{name:>12}: parse only {parse_elapsed:6.2f}s ({rows / parse_elapsed:12,.0f}/s), '
+                  f'process_csv {csv_elapsed:6.2f}s ({rows / csv_elapsed:12,.0f} rows/s)')
+
+        assert outputs['strptime'].getvalue() == outputs['fixed-format'].getvalue()
+
+
+if __name__ == '__main__':
+    main()
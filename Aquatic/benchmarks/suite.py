@@ -0,0 +1,164 @@
+"""
+Benchmark and profiling suite for the weather aggregation backends.
+
+Synthetic station data (synthetic.generate_csv) is generated once per row count into --data-dir and reused by
+later invocations. Every (rows, backend) pair is run in a fresh interpreter, so that its peak RSS is its own:
+one timed run, then one run under cProfile whose --top most expensive functions are recorded. Results go to
+--output as JSON, and a summary table is printed.
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --rows 1e5 1e6 --backends python pandas --top 15 --output results.json
+
+Peak RSS is the largest of the process itself and its children (the pool workers of 'parallel'), not their
+sum; the profile of 'parallel' only covers the parent process. 'cached' is measured warm, the cache being
+filled before its runs.
+"""
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, TextIO
+
+from synthetic import generate_csv
+
+import weather
+from weather_cache import WeatherCache, process_csv_cached
+from weather_mmap import process_csv_mmap
+from weather_store import process_csv_compact
+
+DEFAULT_ROWS = (100000, 1000000, 10000000)
+CACHE_DIR_NAME = 'cache'
+
+
+def _from_reader(process: Callable[[TextIO, TextIO], None]) -> Callable[[str, TextIO, str], None]:
+    def run(path: str, writer: TextIO, data_dir: str):
+        with open(path) as reader:
+            process(reader, writer)
+    return run
+
+
+BACKENDS: Dict[str, Callable[[str, TextIO, str], None]] = {
+    'python': _from_reader(weather.process_csv),
+    'pandas': _from_reader(lambda reader, writer: weather.process_csv(reader, writer, backend='pandas')),
+    'compact': _from_reader(process_csv_compact),
+    'mmap': lambda path, writer, data_dir: process_csv_mmap(path, writer),
+    'parallel': lambda path, writer, data_dir: weather.process_csv_parallel(path, writer),
+    'cached': lambda path, writer, data_dir: process_csv_cached(
+        path, writer, WeatherCache(os.path.join(data_dir, CACHE_DIR_NAME))),
+}
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return scale * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                       resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def _top_functions(profile: cProfile.Profile, top: int, sort: str) -> List[dict]:
+    stats = pstats.Stats(profile)
+    index = {'tottime': 2, 'cumtime': 3}[sort]
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)[:top]
+    return [{'function': f'{os.path.basename(filename)}:{line}({name})', 'primitive_calls': primitive_calls,
+             'calls': calls, 'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)}
+            for (filename, line, name), (primitive_calls, calls, tottime, cumtime, _) in entries]
+
+
+def run_worker(backend: str, path: str, data_dir: str, profile_top: int, sort: str) -> dict:
+    """One measurement in this process: a timed run, or a profiled one when profile_top > 0."""
+    run = BACKENDS[backend]
+    with open(os.devnull, 'w') as writer:
+        if profile_top:
+            profile = cProfile.Profile()
+            profile.runcall(run, path, writer, data_dir)
+            return {'profile': _top_functions(profile, profile_top, sort)}
+        start = time.perf_counter()
+        run(path, writer, data_dir)
+        seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'peak_rss_bytes': _peak_rss_bytes()}
+
+
+def _spawn(backend: str, path: str, data_dir: str, profile_top: int = 0, sort: str = 'tottime') -> dict:
+    command = [sys.executable, os.path.abspath(__file__), '--worker', backend, path, '--data-dir', data_dir,
+               '--profile-top', str(profile_top), '--sort', sort]
+    completed = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def ensure_input(data_dir: str, rows: int, stations: int) -> str:
+    path = os.path.join(data_dir, f'weather_{rows}_{stations}.csv')
+    if not os.path.exists(path):
+        tmp_path = f'{path}.tmp'
+        generate_csv(tmp_path, rows, stations)
+        os.replace(tmp_path, path)
+    return path
+
+
+def run_suite(rows_list: List[int], backends: List[str], data_dir: str, stations: int, top: int,
+              sort: str) -> dict:
+    os.makedirs(data_dir, exist_ok=True)
+    runs = []
+    for rows in rows_list:
+        start = time.perf_counter()
+        path = ensure_input(data_dir, rows, stations)
+        print(f'{rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB ready in {time.perf_counter() - start:.1f} s',
+              file=sys.stderr)
+        if 'cached' in backends:
+            WeatherCache(os.path.join(data_dir, CACHE_DIR_NAME)).load(path)
+
+        for backend in backends:
+            result = _spawn(backend, path, data_dir)
+            if top:
+                result.update(_spawn(backend, path, data_dir, top, sort))
+            result = {'rows': rows, 'backend': backend, 'input_bytes': os.path.getsize(path),
+                      'rows_per_second': rows / result['seconds'], **result}
+            print(f"  {backend:<10} {result['seconds']:8.2f} s {result['rows_per_second']:12,.0f} rows/s "
+                  f"{result['peak_rss_bytes'] / 2 ** 20:8.1f} MiB peak RSS", file=sys.stderr)
+            runs.append(result)
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'stations': stations,
+        'profile_sort': sort,
+        'runs': runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=lambda value: int(float(value)), nargs='+', default=list(DEFAULT_ROWS),
+                        help='Row counts of the synthetic inputs, e.g. 1e5 1e6')
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument('--stations', type=int, default=100, help='Number of synthetic stations')
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data'),
+                        help='Where the synthetic inputs and the cache are kept between runs')
+    parser.add_argument('--top', type=int, default=20, help='Functions kept from each profile (0 to skip profiling)')
+    parser.add_argument('--sort', choices=('tottime', 'cumtime'), default='tottime', help='Profile ordering')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON results file')
+    parser.add_argument('--worker', nargs=2, metavar=('BACKEND', 'PATH'), help=argparse.SUPPRESS)
+    parser.add_argument('--profile-top', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend, path = args.worker
+        print(json.dumps(run_worker(backend, path, args.data_dir, args.profile_top, args.sort)))
+        return
+
+    results = run_suite(args.rows, args.backends, args.data_dir, args.stations, args.top, args.sort)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import random
+from datetime import datetime, timedelta
+
+from weather import CSV_SEP, TIMESTAMP_FORMAT, InputColumns
+
+SAMPLE_CSV = os.path.join(parentdir, 'data', 'chicago_beach_weather.csv')
+
+
+def enlarge_csv(output_path: str, factor: int, source_path: str = SAMPLE_CSV) -> int:
+    """
+    Write a synthetically enlarged copy of the sample CSV: the data rows are repeated factor times, and each
+    copy gets its own station names so the output has factor times as many (station, date) groups.
+
+    Returns:
+        int: Number of data rows written
+    """
+    with open(source_path) as f:
+        header = f.readline()
+        rows = [line.rstrip('\n').split(CSV_SEP) for line in f if line.strip()]
+
+    written = 0
+    with open(output_path, 'w') as out:
+        out.write(header)
+        for copy in range(factor):
+            block = []
+            for values in rows:
+                values = list(values)
+                values[InputColumns.station_name] = f'{values[InputColumns.station_name]} {copy}'
+                block.append(CSV_SEP.join(values))
+            out.write('\n'.join(block))
+            out.write('\n')
+            written += len(block)
+    return written
+
+
+def generate_csv(output_path: str, rows: int, stations: int = 100, seed: int = 0,
+                 start: datetime = datetime(2016, 1, 1), source_path: str = SAMPLE_CSV) -> int:
+    """
+    Write rows of synthetic readings in the input CSV format: every station reports once an hour, stations
+    interleaved, oldest first. About 5% of the rows have no wet-bulb temperature. The header is taken from
+    source_path.
+
+    Returns:
+        int: Number of data rows written
+    """
+    rng = random.Random(seed)
+    with open(source_path) as f:
+        header = f.readline()
+
+    written = 0
+    hour = 0
+    with open(output_path, 'w') as out:
+        out.write(header)
+        while written < rows:
+            timestamp = start + timedelta(hours=hour)
+            formatted = timestamp.strftime(TIMESTAMP_FORMAT)
+            label = timestamp.strftime('%m/%d/%Y %I:%M %p')
+            block = []
+            for station in range(min(stations, rows - written)):
+                air_temperature = round(rng.uniform(-20, 35), 1)
+                wet_bulb_temperature = '' if rng.random() < 0.05 else str(round(air_temperature - rng.uniform(0, 5), 1))
+                block.append(CSV_SEP.join([
+                    f'Station {station}', formatted, str(air_temperature), wet_bulb_temperature,
+                    str(rng.randint(20, 100)), '0', '0', '135.1', '0', str(rng.randint(0, 359)),
+                    str(round(rng.uniform(0, 10), 1)), str(round(rng.uniform(0, 15), 1)),
+                    str(round(rng.uniform(980, 1030), 1)), str(rng.randint(0, 800)), '0', '12.1',
+                    label, f'Station{station}{timestamp:%Y%m%d%H%M}']))
+            out.write('\n'.join(block))
+            out.write('\n')
+            written += len(block)
+            hour += 1
+    return written
+
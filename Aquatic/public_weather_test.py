@@ -7,9 +7,11 @@ currentdir = os.path.dirname(os.path.abspath(
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
+import dataclasses
 import unittest
 import weather
 
+from datetime import date, datetime
 from io import StringIO
 
 _INPUT_HEADER = "Station Name,Measurement Timestamp,Air Temperature,Wet Bulb Temperature,Humidity,Rain Intensity,Interval Rain,Total Rain,Precipitation Type,Wind Direction,Wind Speed,Maximum Wind Speed,Barometric Pressure,Solar Radiation,Heading,Battery Life,Measurement Timestamp Label,Measurement ID"
@@ -82,7 +84,203 @@ class TestingWeather(unittest.TestCase):
             output_io = StringIO()
             weather.get_7day_moving_average(input_file, output_io)
 
-            output_io.getvalue()
+            output = output_io.getvalue().strip().split("\n")
+            self.assertEqual(output[0], weather.MOVING_AVERAGE_COLUMNS)
+            self.assertEqual(len(output), 16)
 
+    def test_process_csv_parallel_matches_sequential(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io)
+
+        for processes in (1, 2):
+            output_io = StringIO()
+            weather.process_csv_parallel("data/chicago_beach_weather.csv", output_io, processes=processes, chunk_bytes=2048)
+            self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+
+    def test_split_byte_ranges_on_line_boundaries(self):
+        with open("data/chicago_beach_weather.csv", "rb") as f:
+            header = f.readline()
+            content = f.read()
+
+        ranges = weather.split_byte_ranges("data/chicago_beach_weather.csv", chunk_bytes=1000)
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(ranges[0][0], len(header))
+        self.assertEqual(ranges[-1][1], len(header) + len(content))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+        for _, end in ranges[:-1]:
+            self.assertEqual(content[end - len(header) - 1:end - len(header)], b"\n")
+
+    def test_merge_keeps_first_and_last_by_timestamp(self):
+        input_io = StringIO(
+            f"{_INPUT_HEADER}\n"
+            "Union Square,06/13/2023 04:11:12 PM,20.3,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:11:12 PM,25,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:30:12 AM,17.9,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n")
+        input_io.readline()
+        lines = input_io.readlines()
+        merged = weather.merge_daily_weathers(weather.aggregate_lines(lines[2:]), weather.aggregate_lines(lines[:2]))
+
+        self.assertEqual([str(x) for x in merged.values()], ["Union Square,06/13/2023,17.9,25.0,17.9,25.0"])
+
+    def test_merge_keeps_sequential_wet_bulb_state(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            input_file.readline()
+            lines = input_file.readlines()
+        expected = weather.aggregate_lines(lines)
+
+        merged = {}
+        for start in range(0, len(lines), 7):
+            weather.merge_daily_weathers(merged, weather.aggregate_lines(lines[start:start + 7]))
+
+        def wet_bulb_state(x):
+            return (x.first_wet_bulb_temperature, x.last_wet_bulb_temperature, x.min_wet_bulb_temperature,
+                    x.max_wet_bulb_temperature, x.first_wet_bulb_timestamp, x.last_wet_bulb_timestamp)
+
+        self.assertEqual({key: wet_bulb_state(x) for key, x in merged.items()},
+                         {key: wet_bulb_state(x) for key, x in expected.items()})
+
+    def test_fixed_format_timestamp_parser_matches_strptime(self):
+        parser = weather.FixedFormatTimestampParser()
+        values = ["06/13/2023 04:11:12 PM", "06/13/2023 12:00:00 AM", "06/13/2023 12:30:00 PM",
+                  "06/13/2023 04:11:12 PM", "02/29/2024 11:59:59 PM", "6/3/2023 4:11:12 PM"]
+        for value in values:
+            self.assertEqual(parser(value), weather.strptime_timestamp(value))
+
+        for value in ["06/13/2023 11:00:00", "02/30/2023 04:11:12 PM", "06/13/2023 13:11:12 PM", ""]:
+            with self.assertRaises(ValueError):
+                parser(value)
+
+    def test_process_csv_with_strptime_parser(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io, parse_timestamp=weather.strptime_timestamp)
+
+        with open("data/chicago_beach_weather.csv") as input_file:
+            output_io = StringIO()
+            weather.process_csv(input_file, output_io)
+
+        self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+
+    def test_pandas_backend_matches_python_backend(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io)
+
+        with open("data/chicago_beach_weather.csv") as input_file:
+            output_io = StringIO()
+            weather.process_csv(input_file, output_io, backend="pandas")
+
+        self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+
+    def test_pandas_backend_invalid_data_format(self):
+        input_io = StringIO(
+            f"{_INPUT_HEADER}\n"
+            "Union Square,06/13/2023 04:11:12 PM,20.3,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:11:12 PM,25,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:11:12 PM,26,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:30:12 AM,17.9,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/14/2023 09:26:12 AM,,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,,A,B\n"
+            "Foster Weather Station,06/13/2023 04:11:12 AM,8,abc,58,0,0,135.1,0,338,1.4,3,,2,0,12.1,A,B\n"
+            "Foster Weather Station,06/13/2023 11:00:00,10.94,,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Foster Weather Station,06/13/2023 05:01:00 PM,18.55,,58,0,0,,0,338,1.4,3,991.1,2,0,12.1,A,B\n")
+        expected_io = StringIO()
+        weather.process_csv(StringIO(input_io.getvalue()), expected_io)
+        output_io = StringIO()
+        weather.process_csv(input_io, output_io, backend="pandas")
+
+        self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+        self.assertEqual(output_io.getvalue().strip().split("\n")[1:], [
+            "Union Square,06/13/2023,17.9,26.0,17.9,25.0",
+            "Foster Weather Station,06/13/2023,18.55,18.55,18.55,18.55",
+        ])
+
+    def assertSameDailyWeathers(self, actual, expected):
+        """Compare aggregates field by field; groupby sums in another order, so totals are compared approximately."""
+        self.assertEqual(list(actual), list(expected))
+        for key, daily_weather in expected.items():
+            self.assertAlmostEqual(actual[key].total_temperature, daily_weather.total_temperature, places=9)
+            self.assertEqual(dataclasses.replace(actual[key], total_temperature=0.0),
+                             dataclasses.replace(daily_weather, total_temperature=0.0))
+
+    def test_pandas_backend_matches_python_aggregates(self):
+        data = (
+            "Union Square,06/13/2023 04:11:12 PM,20.3,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:11:12 PM,25,1.5,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:30:12 AM,17.9,-2.5,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Foster Weather Station,06/13/2023 04:11:12 AM,8,,58,0,0,135.1,0,338,1.4,3,,2,0,12.1,A,B\n"
+            "Foster Weather Station,06/13/2023 05:01:00 PM,18.55,3.1,58,0,0,,0,338,1.4,3,991.1,2,0,12.1,A,B\n")
+        with open("data/chicago_beach_weather.csv") as input_file:
+            input_file.readline()
+            sample = input_file.read()
+
+        for lines in (data, sample):
+            expected = weather.aggregate_lines(StringIO(lines))
+            actual = weather.aggregate_frame(weather.read_columns(StringIO(lines)))
+            self.assertSameDailyWeathers(actual, expected)
+
+    def test_backends_parse_temperatures_alike(self):
+        data = (
+            f"{_INPUT_HEADER}\n"
+            "Union Square,06/13/2023 04:11:12 PM,1_0.5,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:11:12 PM,nan,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 05:30:12 AM,17.9,NaN,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "Union Square,06/13/2023 06:30:12 AM, 12 ,1e1,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n")
+        for backend in weather.BACKENDS:
+            output_io = StringIO()
+            with self.assertLogs(level="ERROR") as logs:
+                weather.process_csv(StringIO(data), output_io, backend=backend)
+            self.assertEqual(len(logs.records), 2)
+            self.assertEqual(output_io.getvalue().strip().split("\n")[1:], ["Union Square,06/13/2023,10.5,12.0,12.0,10.5"])
+
+    def test_short_rows_are_skipped_by_every_backend(self):
+        data = (
+            f"{_INPUT_HEADER}\n"
+            "Union Square,06/13/2023 04:11:12 PM,20.3,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+            "X,06/13/2023 01:00:00 PM\n"
+            "Union Square,06/13/2023 05:30:12 AM,17.9,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n")
+        for backend in weather.BACKENDS:
+            output_io = StringIO()
+            with self.assertLogs(level="ERROR"):
+                weather.process_csv(StringIO(data), output_io, backend=backend)
+            self.assertEqual(output_io.getvalue().strip().split("\n")[1:], ["Union Square,06/13/2023,17.9,20.3,17.9,20.3"])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            weather.process_csv(StringIO(_INPUT_HEADER), StringIO(), backend="spark")
+
+    def test_rolling_daily_average_matches_naive_recomputation(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            input_file.readline()
+            readings = [weather.parse_line(line) for line in input_file]
+        with open("data/chicago_beach_weather.csv") as input_file:
+            input_file.readline()
+            temperatures = weather.aggregate_lines(input_file)
+
+        for window_days in (1, 2, 7):
+            naive = {}
+            for station_name, measurement_date in temperatures:
+                window = [air for s, timestamp, air, _ in readings
+                          if s == station_name and 0 <= (measurement_date - timestamp.date()).days < window_days]
+                naive[(station_name, measurement_date)] = sum(window) / len(window)
+
+            batch = weather.rolling_daily_average(temperatures.values(), window_days)
+            self.assertEqual(len(batch), len(naive))
+            for station_name, measurement_date, average in batch.itertuples(index=False):
+                self.assertAlmostEqual(average, naive[(station_name, measurement_date)], places=9)
 
+            streaming = weather.RollingDailyAverage(window_days)
+            for daily_weather in sorted(temperatures.values(), key=lambda x: x.date):
+                self.assertAlmostEqual(streaming.update(daily_weather),
+                                       naive[(daily_weather.station_name, daily_weather.date)], places=9)
 
+    def test_rolling_daily_average_rejects_out_of_order_days(self):
+        streaming = weather.RollingDailyAverage(7)
+        later = weather.OutputDailyWeather("Union Square", date(2023, 6, 14), datetime(2023, 6, 14), datetime(2023, 6, 14),
+                                           1.0, 1.0, 1.0, 1.0, None)
+        earlier = weather.OutputDailyWeather("Union Square", date(2023, 6, 13), datetime(2023, 6, 13), datetime(2023, 6, 13),
+                                             1.0, 1.0, 1.0, 1.0, None)
+        streaming.update(later)
+        with self.assertRaises(ValueError):
+            streaming.update(earlier)
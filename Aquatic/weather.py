@@ -1,13 +1,18 @@
-from typing import TextIO
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 from enum import IntEnum, auto
 from dataclasses import dataclass
+import csv
+import io
 import logging
-from collections import defaultdict
+import math
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 
 from datetime import datetime, date
 
 import pandas as pd
-from numpy import ndarray, array
+from numpy import ndarray, arange, array, concatenate, cumsum, fromiter, searchsorted
 
 """
 Station Name,Measurement Timestamp,Air Temperature,Wet Bulb Temperature,Humidity,Rain Intensity,Interval Rain,Total Rain,
@@ -51,6 +56,67 @@ CSV_SEP = ','
 TIMESTAMP_FORMAT = '%m/%d/%Y %I:%M:%S %p'
 DATE_FORMAT = '%m/%d/%Y'
 
+TimestampParser = Callable[[str], datetime]
+
+
+def strptime_timestamp(value: str) -> datetime:
+    return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+class FixedFormatTimestampParser:
+    """
+    Parser for TIMESTAMP_FORMAT ('MM/DD/YYYY HH:MM:SS AM') by fixed positions instead of strptime.
+
+    The date and the time-of-day parts are memoized separately: a feed has few distinct dates and even fewer
+    distinct times of day, so most rows are two dict lookups and a datetime constructor.
+    Anything not in the exact zero-padded layout falls back to strptime, which parses it or raises the same
+    ValueError process_csv always reported.
+    """
+
+    def __init__(self, max_cached: int = 1 << 16):
+        self.max_cached = max_cached
+        self._dates: Dict[str, Tuple[int, int, int]] = {}
+        self._times: Dict[str, Tuple[int, int, int]] = {}
+
+    def __call__(self, value: str) -> datetime:
+        ymd = self._dates.get(value[:10])
+        hms = self._times.get(value[11:])
+        if ymd is None or hms is None or len(value) != 22 or value[10] != ' ':
+            try:
+                ymd, hms = self._parse_and_cache(value)
+            except ValueError:
+                return strptime_timestamp(value)
+        return datetime(*ymd, *hms)
+
+    def _parse_and_cache(self, value: str) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        date_part, time_part = value[:10], value[11:]
+        if (len(value) != 22 or value[10] != ' ' or date_part[2] != '/' or date_part[5] != '/'
+                or time_part[2] != ':' or time_part[5] != ':' or time_part[8] != ' '):
+            raise ValueError(value)
+
+        month, day, year = date_part[:2], date_part[3:5], date_part[6:]
+        hour, minute, second, am_pm = time_part[:2], time_part[3:5], time_part[6:8], time_part[9:]
+        if not all(x.isascii() and x.isdigit() for x in (month, day, year, hour, minute, second)):
+            raise ValueError(value)
+        if am_pm not in ('AM', 'PM') or not 1 <= int(hour) <= 12:
+            raise ValueError(value)
+
+        ymd = (int(year), int(month), int(day))
+        hms = (int(hour) % 12 + (12 if am_pm == 'PM' else 0), int(minute), int(second))
+        # Validates day-of-month and time ranges
+        datetime(*ymd, *hms)
+
+        if len(self._dates) >= self.max_cached:
+            self._dates.clear()
+        if len(self._times) >= self.max_cached:
+            self._times.clear()
+        self._dates[date_part] = ymd
+        self._times[time_part] = hms
+        return ymd, hms
+
+
+parse_timestamp = FixedFormatTimestampParser()
+
 
 @dataclass
 class OutputDailyWeather:
@@ -62,16 +128,16 @@ class OutputDailyWeather:
     last_temperature: float
     min_temperature: float
     max_temperature: float
-    # total_temperature: float = None
-    # measurement_counts: int = 1
     first_wet_bulb_temperature: float
     last_wet_bulb_temperature: float = None
     min_wet_bulb_temperature: float = None
     max_wet_bulb_temperature: float = None
     first_wet_bulb_timestamp: datetime = None
     last_wet_bulb_timestamp: datetime = None
+    total_temperature: float = None
+    measurement_counts: int = 1
 
-    OUTPUT_COLUMNS = 'Station Name,Date,Min Temp,Max Temp,First Temp,Last Temp,Min Wet Bulb Temp,Max Wet Bulb Temp,First Wet Bulb Temp,Last Wet Bulb Temp'
+    OUTPUT_COLUMNS = 'Station Name,Date,Min Temp,Max Temp,First Temp,Last Temp'
 
     def __post_init__(self):
         if self.first_wet_bulb_timestamp is None:
@@ -89,10 +155,8 @@ class OutputDailyWeather:
         if self.max_wet_bulb_temperature is None:
             self.max_wet_bulb_temperature = self.first_wet_bulb_temperature
 
-
-    # def __post_init__(self):
-    #     if self.total_temperature is None:
-    #         self.total_temperature = self.first_temperature
+        if self.total_temperature is None:
+            self.total_temperature = self.first_temperature
 
     def __str__(self):
         return CSV_SEP.join(
@@ -112,35 +176,89 @@ class OutputDailyWeather:
         self.total_temperature += temperature
         self.measurement_counts += 1
 
+        # Independent checks: readings may arrive in any order, and the result must not depend on
+        # first <= last and min <= max holding beforehand
         if timestamp < self.first_timestamp:
             self.first_timestamp = timestamp
             self.first_temperature = temperature
-        elif timestamp > self.last_timestamp:
+        if timestamp > self.last_timestamp:
             self.last_timestamp = timestamp
             self.last_temperature = temperature
 
         if temperature < self.min_temperature:
             self.min_temperature = temperature
-        elif temperature > self.max_temperature:
+        if temperature > self.max_temperature:
             self.max_temperature = temperature
 
+    def merge(self, other: 'OutputDailyWeather'):
+        """Fold the partial state of the same (station, date) aggregated elsewhere into this one.
 
+        On equal timestamps the values already held by self win, so merging partials in file order
+        gives the same result as a single sequential pass. The wet-bulb fields are those of the first
+        reading seen, which update_temperature never changes, so self's are kept as they are.
+        """
+        if other.first_timestamp < self.first_timestamp:
+            self.first_timestamp = other.first_timestamp
+            self.first_temperature = other.first_temperature
+        if other.last_timestamp > self.last_timestamp:
+            self.last_timestamp = other.last_timestamp
+            self.last_temperature = other.last_temperature
 
-def process_csv(reader: TextIO, writer: TextIO):
-    reader.readline()
-    temperatures = {}
-    for i, line in enumerate(reader):
-        values = line.split(CSV_SEP)
+        self.min_temperature = min(self.min_temperature, other.min_temperature)
+        self.max_temperature = max(self.max_temperature, other.max_temperature)
+        self.total_temperature += other.total_temperature
+        self.measurement_counts += other.measurement_counts
+
+
+DailyWeatherKey = Tuple[str, date]
+
+Reading = Tuple[str, datetime, float, Optional[float]]
+
+
+def parse_temperature(text: Union[str, bytes]) -> float:
+    """
+    float(), except that NaN is rejected: it would poison the min/max comparisons of update_temperature.
+
+    Raises:
+        ValueError: If the text is not a number, or is NaN
+    """
+    value = float(text)
+    if value != value:
+        raise ValueError(f'temperature is not a number: {text!r}')
+    return value
+
+
+def parse_line(line: str, parse_timestamp: TimestampParser = parse_timestamp) -> Reading:
+    """
+    Parse a data line into (station_name, measurement_timestamp, air_temperature, wet_bulb_temperature).
+
+    Raises:
+        ValueError: If the timestamp or a temperature is malformed
+    """
+    values = line.split(CSV_SEP)
+    station_name = values[InputColumns.station_name]
+    measurement_timestamp = parse_timestamp(values[InputColumns.measurement_timestamp])
+    air_temperature = parse_temperature(values[InputColumns.air_temperature])
+    wet_bulb_temperature = str(values[InputColumns.wet_bulb_temperature])
+    wet_bulb_temperature = parse_temperature(wet_bulb_temperature) if wet_bulb_temperature else None
+    return station_name, measurement_timestamp, air_temperature, wet_bulb_temperature
+
+
+def parse_lines(lines: Iterable[str], parse_timestamp: TimestampParser = parse_timestamp) -> Iterator[Reading]:
+    """parse_line over data lines (no header), logging and skipping malformed rows."""
+    for i, line in enumerate(lines):
         try:
-            station_name = values[InputColumns.station_name]
-            measurement_timestamp = datetime.strptime(values[InputColumns.measurement_timestamp], TIMESTAMP_FORMAT)
-            air_temperature = float(values[InputColumns.air_temperature])
-            wet_bulb_temperature = str(values[InputColumns.wet_bulb_temperature])
-            wet_bulb_temperature = float(wet_bulb_temperature) if wet_bulb_temperature else None
-        except ValueError as e:
+            yield parse_line(line, parse_timestamp)
+        except (ValueError, IndexError) as e:
             logging.error(f'Error parsing row #{i}: {e}')
-            continue
 
+
+def aggregate_readings(readings: Iterable[Reading], temperatures: Optional[Dict[DailyWeatherKey, OutputDailyWeather]] = None
+                       ) -> Dict[DailyWeatherKey, OutputDailyWeather]:
+    """Aggregate readings into per (station, date) daily weathers, in first-seen order."""
+    if temperatures is None:
+        temperatures = {}
+    for station_name, measurement_timestamp, air_temperature, wet_bulb_temperature in readings:
         measurement_date = measurement_timestamp.date()
         key = (station_name, measurement_date)
         if key not in temperatures:
@@ -150,9 +268,229 @@ def process_csv(reader: TextIO, writer: TextIO):
         else:
             temperatures[key].update_temperature(measurement_timestamp, air_temperature)
 
+    return temperatures
+
+
+def aggregate_lines(lines: Iterable[str], temperatures: Optional[Dict[DailyWeatherKey, OutputDailyWeather]] = None,
+                    parse_timestamp: TimestampParser = parse_timestamp) -> Dict[DailyWeatherKey, OutputDailyWeather]:
+    """Aggregate data lines (no header) into per (station, date) daily weathers, in first-seen order."""
+    return aggregate_readings(parse_lines(lines, parse_timestamp), temperatures)
+
+
+AGGREGATION_COLUMNS = (InputColumns.station_name, InputColumns.measurement_timestamp,
+                       InputColumns.air_temperature, InputColumns.wet_bulb_temperature)
+
+
+def read_columns(reader: TextIO, columns: Iterable[InputColumns] = AGGREGATION_COLUMNS) -> pd.DataFrame:
+    """
+    Read only the given columns of the data lines (no header) as strings, named after InputColumns.
+    Quotes are not interpreted, the same as splitting lines on CSV_SEP.
+    """
+    columns = sorted(InputColumns(c) for c in columns)
+    try:
+        df = pd.read_csv(reader, header=None, usecols=[int(c) for c in columns], dtype=str,
+                         na_filter=False, quoting=csv.QUOTE_NONE)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame({c.name: pd.Series(dtype=str) for c in columns})
+    df.columns = [c.name for c in columns]
+    return df
+
+
+def _parse_or_nan(text: str) -> float:
+    try:
+        return parse_temperature(text)
+    except ValueError:
+        return math.nan
+
+
+def parse_numeric(values: pd.Series) -> pd.Series:
+    """
+    parse_temperature over the distinct values only, as sensor readings repeat a lot; NaN where it fails.
+    Unlike pd.to_numeric, this accepts and rejects exactly what the line parsers do.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = fromiter((_parse_or_nan(u) for u in uniques), dtype=float, count=len(uniques))
+    return pd.Series(parsed[codes], index=values.index)
+
+
+def _to_optional_float(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+PARSED_COLUMNS = ('station_name', 'timestamp', 'air', 'wet_bulb')
+
+
+def parse_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the string frame returned by read_columns into typed PARSED_COLUMNS, vectorially.
+    Rows process_csv would reject are logged and dropped; the others keep file order on a fresh RangeIndex,
+    with NaN standing for a missing wet-bulb temperature.
+    """
+    timestamps = pd.to_datetime(df[InputColumns.measurement_timestamp.name], format=TIMESTAMP_FORMAT, errors='coerce')
+    air_temperatures = parse_numeric(df[InputColumns.air_temperature.name])
+    wet_bulb_raw = df[InputColumns.wet_bulb_temperature.name]
+    wet_bulb_temperatures = parse_numeric(wet_bulb_raw)
+
+    valid = timestamps.notna() & air_temperatures.notna() & (wet_bulb_temperatures.notna() | (wet_bulb_raw == ''))
+    for i in valid.index[~valid.to_numpy()]:
+        logging.error(f'Error parsing row #{i}: {df.loc[i].tolist()}')
+
+    return pd.DataFrame({
+        'station_name': df[InputColumns.station_name.name],
+        'timestamp': timestamps,
+        'air': air_temperatures,
+        'wet_bulb': wet_bulb_temperatures,
+    })[valid].reset_index(drop=True)
+
+
+def aggregate_frame(df: pd.DataFrame) -> Dict[DailyWeatherKey, OutputDailyWeather]:
+    """
+    Columnar equivalent of aggregate_lines over the frame returned by read_columns.
+
+    Timestamps and temperatures are parsed vectorially and each (station, date) is reduced with groupby, so
+    Python objects are only built per output row. Rows process_csv would reject are dropped; groups keep
+    first-seen order and first/last take the earliest row among equal timestamps, as the sequential path does.
+    The wet-bulb fields are taken from the first row seen of each group, as the sequential path keeps them.
+    """
+    return aggregate_parsed(parse_frame(df))
+
+
+def aggregate_parsed(parsed: pd.DataFrame) -> Dict[DailyWeatherKey, OutputDailyWeather]:
+    """The groupby reduction of aggregate_frame, over a frame of PARSED_COLUMNS in file order."""
+    frame = parsed.assign(date=parsed['timestamp'].dt.normalize())
+    groups = frame.groupby(['station_name', 'date'], sort=False)
+    first_rows = frame.loc[groups['timestamp'].idxmin().to_numpy()]
+    last_rows = frame.loc[groups['timestamp'].idxmax().to_numpy()]
+    # The wet-bulb fields are those of the first row seen, as update_temperature never changes them
+    seen_rows = frame[~frame.duplicated(['station_name', 'date'])]
+    min_temperatures, max_temperatures = groups['air'].min(), groups['air'].max()
+    total_temperatures, measurement_counts = groups['air'].sum(), groups['air'].count()
+
+    temperatures = {}
+    for (station_name, day), first_ts, last_ts, first_air, last_air, min_air, max_air, \
+            wet_ts, wet, total_air, count in zip(
+                min_temperatures.index,
+                pd.DatetimeIndex(first_rows['timestamp']).to_pydatetime(),
+                pd.DatetimeIndex(last_rows['timestamp']).to_pydatetime(),
+                first_rows['air'].tolist(), last_rows['air'].tolist(),
+                min_temperatures.tolist(), max_temperatures.tolist(),
+                pd.DatetimeIndex(seen_rows['timestamp']).to_pydatetime(), seen_rows['wet_bulb'].tolist(),
+                total_temperatures.tolist(), measurement_counts.tolist()):
+        measurement_date = day.date()
+        wet = _to_optional_float(wet)
+        temperatures[(station_name, measurement_date)] = OutputDailyWeather(
+            station_name, measurement_date, first_ts, last_ts, first_air, last_air, min_air, max_air,
+            wet, wet, wet, wet, wet_ts, wet_ts, total_temperature=total_air, measurement_counts=count)
+
+    return temperatures
+
+
+def merge_daily_weathers(temperatures: Dict[DailyWeatherKey, OutputDailyWeather],
+                         partial: Dict[DailyWeatherKey, OutputDailyWeather]) -> Dict[DailyWeatherKey, OutputDailyWeather]:
+    """Merge a partial aggregation into temperatures; partials must be merged in file order to keep row order."""
+    for key, daily_weather in partial.items():
+        if key not in temperatures:
+            temperatures[key] = daily_weather
+        else:
+            temperatures[key].merge(daily_weather)
+    return temperatures
+
+
+def write_daily_weathers(writer: TextIO, daily_weathers: Iterable[OutputDailyWeather]):
     writer.write(OutputDailyWeather.OUTPUT_COLUMNS)
     writer.write('\n')
-    writer.writelines(f'{x}\n' for x in temperatures.values())
+    writer.writelines(f'{x}\n' for x in daily_weathers)
+
+
+BACKENDS = ('python', 'pandas')
+
+
+def process_csv(reader: TextIO, writer: TextIO, parse_timestamp: TimestampParser = parse_timestamp,
+                backend: str = 'python'):
+    """
+    Aggregate the CSV from reader into one row per (station, date) written to writer.
+
+    Args:
+        reader: Input stream, starting with the header line
+        writer: Output stream
+        parse_timestamp: Timestamp parser of the 'python' backend
+        backend: 'python' aggregates line by line; 'pandas' reads only the needed columns and reduces them
+            with groupby (faster on large inputs, same output)
+    """
+    reader.readline()
+    if backend == 'python':
+        temperatures = aggregate_lines(reader, parse_timestamp=parse_timestamp)
+    elif backend == 'pandas':
+        temperatures = aggregate_frame(read_columns(reader))
+    else:
+        raise ValueError(f'Unknown backend {backend!r}, expected one of {BACKENDS}')
+    write_daily_weathers(writer, temperatures.values())
+
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def split_byte_ranges(filename: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split the data section of a CSV file into [start, end) byte ranges that begin and end on line boundaries.
+    The header line is excluded from the first range.
+    """
+    if chunk_bytes < 1:
+        raise ValueError(f'chunk_bytes must be >= 1, got {chunk_bytes}')
+
+    ranges = []
+    with open(filename, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + chunk_bytes, size) - 1)
+            # Finish the line the tentative boundary falls in, so every chunk ends on a newline (or EOF)
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _aggregate_byte_range(filename: str, start: int, end: int, encoding: str,
+                          parse_timestamp: TimestampParser) -> Dict[DailyWeatherKey, OutputDailyWeather]:
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+    # newline=None gives the same universal newline handling as reading the file in text mode
+    return aggregate_lines(io.StringIO(chunk.decode(encoding), newline=None), parse_timestamp=parse_timestamp)
+
+
+def process_csv_parallel(filename: str, writer: TextIO, processes: Optional[int] = None,
+                         chunk_bytes: int = DEFAULT_CHUNK_BYTES, encoding: str = 'utf-8',
+                         parse_timestamp: TimestampParser = parse_timestamp):
+    """
+    Same output as process_csv, but the file is split into byte-range chunks on line boundaries which are
+    aggregated in a process pool and merged back in file order.
+    Row numbers in parse errors are relative to the chunk the row falls in.
+
+    Args:
+        filename: Path of the input CSV
+        writer: Output stream
+        processes: Number of worker processes (defaults to os.cpu_count()); 1 aggregates in-process
+        chunk_bytes: Target chunk size in bytes, which bounds the memory each worker holds at once
+        encoding: Encoding of the input file
+        parse_timestamp: Timestamp parser, must be picklable to be sent to the workers
+    """
+    ranges = split_byte_ranges(filename, chunk_bytes)
+    temperatures = {}
+    if processes == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            merge_daily_weathers(temperatures, _aggregate_byte_range(filename, start, end, encoding, parse_timestamp))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            partials = executor.map(_aggregate_byte_range, *zip(*((filename, start, end, encoding, parse_timestamp)
+                                                                  for start, end in ranges)))
+            for partial in partials:
+                merge_daily_weathers(temperatures, partial)
+
+    write_daily_weathers(writer, temperatures.values())
 
 
 def calculate_average(daily_weathers: ndarray[OutputDailyWeather]):
@@ -160,36 +498,93 @@ def calculate_average(daily_weathers: ndarray[OutputDailyWeather]):
     return values[:, 0].sum() / values[:, 1].sum()
 
 
-# def get_7day_moving_average(reader: TextIO, writer: TextIO):
-#     reader.readline()
-#     temperatures = defaultdict(dict)
-#     for i, line in enumerate(reader):
-#         values = line.split(CSV_SEP)
-#         try:
-#             station_name = values[InputColumns.station_name]
-#             measurement_timestamp = datetime.strptime(values[InputColumns.measurement_timestamp], TIMESTAMP_FORMAT)
-#             air_temperature = float(values[InputColumns.air_temperature])
-#             wet_bulb_temperature = str(values[InputColumns.wet_bulb_temperature])
-#             wet_bulb_temperature = float(wet_bulb_temperature) if wet_bulb_temperature.isnumeric() else None
-#         except ValueError as e:
-#             logging.error(f'Error parsing row #{i}: {e}')
-#             continue
-#
-#     measurement_date = measurement_timestamp.date()
-#         if measurement_date not in temperatures[station_name]:
-#             temperatures[station_name][measurement_date] = OutputDailyWeather(
-#                 station_name, measurement_date, measurement_timestamp, measurement_timestamp,
-#                 air_temperature, air_temperature, air_temperature, air_temperature, wet_bulb_temperature)
-#         else:
-#             temperatures[station_name][measurement_date].update_temperature(measurement_timestamp, air_temperature)
-#
-#     df = pd.concat({sn: pd.DataFrame.from_dict(daily_weathers, orient='index', columns=['total_temperature', 'measurement_counts'])
-#                     for sn, daily_weathers in temperatures.items()}, axis=1).sort_index()
-#     # cumsum_vec = numpy.cumsum(numpy.insert(data, 0, 0))
-#     # ma_vec = (cumsum_vec[window_width:] - cumsum_vec[:-window_width]) / window_width
-#     df_window = df.rolling(2)
-#     df_window_sum = df_window.sum()
-#     df_moving_average = df_window_sum.xs('total_temperature', axis=1, level=1) / df_window_sum.xs('measurement_counts', axis=1, level=1)
-#     writer.write('\n')
+MOVING_AVERAGE_COLUMNS = 'Station Name,Date,Moving Average Temp'
+
+
+class RollingDailyAverage:
+    """
+    Streaming N-day moving average of the air temperature per station, over the readings of the days in
+    (date - window_days, date]; days without readings simply contribute nothing.
+
+    Each station keeps a deque of its daily (ordinal, total, count) plus their running sums, so a finalized day
+    is an O(1) amortized update, e.g. as the on_emit callback of a StreamingDailyAggregator.
+    """
+
+    def __init__(self, window_days: int = 7):
+        if window_days < 1:
+            raise ValueError(f'window_days must be >= 1, got {window_days}')
+        self.window_days = window_days
+        self._windows: Dict[str, deque] = defaultdict(deque)
+        self._totals: Dict[str, float] = defaultdict(float)
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    def update(self, daily_weather: OutputDailyWeather) -> float:
+        """
+        Add a finalized day and return the station's moving average on that day.
+
+        Raises:
+            ValueError: If the day is not after the station's previous day
+        """
+        station_name = daily_weather.station_name
+        ordinal = daily_weather.date.toordinal()
+        window = self._windows[station_name]
+        if window and ordinal <= window[-1][0]:
+            raise ValueError(f'{station_name} {daily_weather.date} is not after {date.fromordinal(window[-1][0])}')
+
+        window.append((ordinal, daily_weather.total_temperature, daily_weather.measurement_counts))
+        self._totals[station_name] += daily_weather.total_temperature
+        self._counts[station_name] += daily_weather.measurement_counts
+        while window[0][0] <= ordinal - self.window_days:
+            _, total, count = window.popleft()
+            self._totals[station_name] -= total
+            self._counts[station_name] -= count
+
+        return self._totals[station_name] / self._counts[station_name]
+
+
+def rolling_daily_average(daily_weathers: Iterable[OutputDailyWeather], window_days: int = 7) -> pd.DataFrame:
+    """
+    Batch RollingDailyAverage over (station, date) unique daily weathers, with cumulative sums.
+
+    Rows are sorted by (station, date) and keyed by station code and date ordinal; for each row, searchsorted
+    finds the first row inside its window, and the window sums are differences of the cumulative sums.
+
+    Returns:
+        pd.DataFrame: station_name, date and moving_average, sorted by station_name and date
+    """
+    if window_days < 1:
+        raise ValueError(f'window_days must be >= 1, got {window_days}')
+
+    df = pd.DataFrame(
+        [(x.station_name, x.date, x.date.toordinal(), x.total_temperature, x.measurement_counts) for x in daily_weathers],
+        columns=['station_name', 'date', 'ordinal', 'total_temperature', 'measurement_counts'])
+    df = df.sort_values(['station_name', 'ordinal'], kind='stable').reset_index(drop=True)
+
+    # Station codes are increasing after the sort, and the gap between stations is wider than any window
+    station_codes = pd.factorize(df['station_name'])[0].astype('int64')
+    keys = (station_codes << 32) + df['ordinal'].to_numpy(dtype='int64')
+    window_starts = searchsorted(keys, keys - window_days, side='right')
+
+    total_sums = concatenate([[0.0], cumsum(df['total_temperature'].to_numpy(dtype=float))])
+    count_sums = concatenate([[0], cumsum(df['measurement_counts'].to_numpy(dtype='int64'))])
+    window_ends = arange(1, keys.size + 1)
+    df['moving_average'] = ((total_sums[window_ends] - total_sums[window_starts])
+                            / (count_sums[window_ends] - count_sums[window_starts]))
+    return df[['station_name', 'date', 'moving_average']]
+
+
+def get_moving_average(reader: TextIO, writer: TextIO, window_days: int):
+    """Write the window_days moving average temperature of every (station, date) of the CSV from reader."""
+    reader.readline()
+    temperatures = aggregate_lines(reader)
+    averages = rolling_daily_average(temperatures.values(), window_days)
+
+    writer.write(MOVING_AVERAGE_COLUMNS)
+    writer.write('\n')
+    writer.writelines(f'{station_name}{CSV_SEP}{measurement_date.strftime(DATE_FORMAT)}{CSV_SEP}{average}\n'
+                      for station_name, measurement_date, average in zip(
+                          averages['station_name'].tolist(), averages['date'].tolist(), averages['moving_average'].tolist()))
 
 
+def get_7day_moving_average(reader: TextIO, writer: TextIO):
+    get_moving_average(reader, writer, 7)
@@ -0,0 +1,159 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+import asyncio
+import logging
+import os
+
+from weather import OutputDailyWeather, Reading, TimestampParser, parse_line, parse_timestamp
+from weather_stream import OutOfOrderDailyAggregator
+
+# (source index, row number of the first line, lines)
+Batch = Tuple[int, int, List[str]]
+
+
+def parse_batch(batch: Batch, parse_timestamp: TimestampParser = parse_timestamp) -> Tuple[List[Reading], int]:
+    """
+    Parse one batch of data lines; malformed lines are logged and skipped.
+
+    Returns:
+        Tuple[List[Reading], int]: The readings and the number of malformed lines
+    """
+    source, first_row, lines = batch
+    readings = []
+    errors = 0
+    for i, line in enumerate(lines):
+        try:
+            readings.append(parse_line(line, parse_timestamp))
+        # IndexError: a line with fewer fields than parse_line reads
+        except (ValueError, IndexError) as e:
+            errors += 1
+            logging.error(f'Error parsing row #{first_row + i} of source #{source}: {e}')
+    return readings, errors
+
+
+class AsyncWeatherIngestor:
+    """
+    Asyncio front end feeding many concurrent line sources into one shared daily aggregator.
+
+    Every source is read by its own task, which cuts its lines into batches of batch_size and puts them on a
+    queue bounded to max_pending_batches. workers consumer tasks take batches off the queue, parse them in the
+    executor and add the readings to the aggregator from the event loop, so the aggregator is only ever touched
+    by one thread. A full queue suspends the source tasks, which then stop pulling from their sources: however
+    slow parsing or aggregation is, at most about (max_pending_batches + workers + 2 * sources) batches are held.
+
+    Batches of different sources, and of one source, may finish parsing in any order, hence the default
+    OutOfOrderDailyAggregator; with a lateness horizon it emits days while the sources are still running.
+
+    Attributes:
+        aggregator: Shared aggregator, anything with add(station_name, timestamp, air, wet_bulb) and flush()
+        batch_size: Lines per batch handed to the executor
+        max_pending_batches: Bound of the queue between the sources and the workers
+        workers: Number of batches parsed concurrently
+        lines_read: Number of lines taken from the sources so far
+        parse_errors: Number of malformed lines skipped so far
+        max_queue_depth: Highest number of batches seen waiting on the queue
+    """
+
+    def __init__(self, aggregator=None, batch_size: int = 1024, max_pending_batches: int = 16,
+                 workers: Optional[int] = None, executor: Optional[Executor] = None,
+                 parse_timestamp: TimestampParser = parse_timestamp):
+        if batch_size < 1 or max_pending_batches < 1:
+            raise ValueError(f'batch_size and max_pending_batches must be >= 1, '
+                             f'got {batch_size} and {max_pending_batches}')
+        self.aggregator = aggregator if aggregator is not None else OutOfOrderDailyAggregator(lateness=None)
+        self.batch_size = batch_size
+        self.max_pending_batches = max_pending_batches
+        self.workers = workers or os.cpu_count() or 1
+        self.lines_read = 0
+        self.parse_errors = 0
+        self.max_queue_depth = 0
+        self._executor = executor
+        self._parse_timestamp = parse_timestamp
+
+    async def run(self, sources: Iterable[AsyncIterable[str]], flush: bool = True) -> List[OutputDailyWeather]:
+        """
+        Ingest every source until all are exhausted.
+
+        Without an executor, a ProcessPoolExecutor of workers processes is created for the run; the
+        parse_timestamp must then be picklable. If a source or a consumer raises (e.g. the aggregator), the other
+        tasks are cancelled and the first exception propagates.
+
+        Args:
+            sources: Async iterables of data lines in the input CSV format (no header)
+            flush: Finalize the days still open in the aggregator at the end
+
+        Returns:
+            List[OutputDailyWeather]: The days emitted by the aggregator during the run, in emission order
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_batches)
+        emitted: List[OutputDailyWeather] = []
+        executor = self._executor or ProcessPoolExecutor(max_workers=self.workers)
+        readers = [asyncio.ensure_future(self._read(i, source, queue)) for i, source in enumerate(sources)]
+        consumers = [asyncio.ensure_future(self._consume(queue, executor, emitted)) for _ in range(self.workers)]
+
+        async def close_queue():
+            await asyncio.gather(*readers)
+            for _ in consumers:
+                await queue.put(None)
+
+        closer = asyncio.ensure_future(close_queue())
+        try:
+            # Readers blocked on a full queue never finish once a consumer died, so wait on both sides at once
+            done, _ = await asyncio.wait([closer] + consumers, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in readers + consumers + [closer]:
+                task.cancel()
+            if executor is not self._executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        if flush:
+            emitted.extend(self.aggregator.flush())
+        return emitted
+
+    async def _read(self, source_index: int, source: AsyncIterable[str], queue: asyncio.Queue):
+        row = 0
+        lines: List[str] = []
+        async for line in source:
+            lines.append(line)
+            if len(lines) >= self.batch_size:
+                await self._put(queue, (source_index, row, lines))
+                row += len(lines)
+                lines = []
+        if lines:
+            await self._put(queue, (source_index, row, lines))
+
+    async def _put(self, queue: asyncio.Queue, batch: Batch):
+        self.lines_read += len(batch[2])
+        await queue.put(batch)
+        if queue.qsize() > self.max_queue_depth:
+            self.max_queue_depth = queue.qsize()
+
+    async def _consume(self, queue: asyncio.Queue, executor: Executor, emitted: List[OutputDailyWeather]):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            readings, errors = await loop.run_in_executor(executor, parse_batch, batch, self._parse_timestamp)
+            self.parse_errors += errors
+            for reading in readings:
+                emitted.extend(self.aggregator.add(*reading))
+
+
+async def stand_in_feed(lines: Iterable[str], delay: float = 0.0, lines_per_tick: int = 1) -> AsyncIterator[str]:
+    """
+    Local stand-in for a station feed: yields lines, sleeping delay seconds after every lines_per_tick lines
+    (a delay of 0 still yields control to the event loop).
+    """
+    for i, line in enumerate(lines, 1):
+        yield line
+        if i % lines_per_tick == 0:
+            await asyncio.sleep(delay)
+
+
+async def ingest(sources: Iterable[AsyncIterable[str]], **kwargs) -> List[OutputDailyWeather]:
+    """AsyncWeatherIngestor(**kwargs).run(sources): every day of the sources, once all are exhausted."""
+    return await AsyncWeatherIngestor(**kwargs).run(sources)
@@ -0,0 +1,133 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import asyncio
+import unittest
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+import weather
+from weather_async import AsyncWeatherIngestor, ingest, stand_in_feed
+from weather_stream import OutOfOrderDailyAggregator
+
+
+def _station_feeds():
+    """Sample data lines split into one list per station, in file order."""
+    feeds = defaultdict(list)
+    with open("data/chicago_beach_weather.csv") as input_file:
+        input_file.readline()
+        for line in input_file:
+            line = f"{line.rstrip()}\n"
+            feeds[line.split(",")[0]].append(line)
+    return list(feeds.values())
+
+
+def _process_csv_rows():
+    expected_io = StringIO()
+    with open("data/chicago_beach_weather.csv") as input_file:
+        weather.process_csv(input_file, expected_io)
+    return expected_io.getvalue().strip().split("\n")[1:]
+
+
+class CountingAggregator(OutOfOrderDailyAggregator):
+
+    def __init__(self):
+        super().__init__(lateness=None)
+        self.readings = 0
+
+    def add(self, *reading):
+        self.readings += 1
+        return super().add(*reading)
+
+
+class TestingAsyncWeatherIngestor(unittest.TestCase):
+
+    def test_concurrent_feeds_match_process_csv(self):
+        feeds = _station_feeds()
+        with ThreadPoolExecutor(2) as executor:
+            emitted = asyncio.run(ingest([stand_in_feed(lines, lines_per_tick=7) for lines in feeds],
+                                         batch_size=50, workers=2, executor=executor))
+        self.assertEqual(sorted(str(x) for x in emitted), sorted(_process_csv_rows()))
+
+    def test_process_pool_by_default(self):
+        feeds = _station_feeds()
+        ingestor = AsyncWeatherIngestor(batch_size=500, workers=2)
+        emitted = asyncio.run(ingestor.run([stand_in_feed(lines, lines_per_tick=100) for lines in feeds]))
+        self.assertEqual(sorted(str(x) for x in emitted), sorted(_process_csv_rows()))
+        self.assertEqual(ingestor.lines_read, sum(len(lines) for lines in feeds))
+
+    def test_malformed_lines_are_counted_and_skipped(self):
+        lines = _station_feeds()[0][:10]
+        lines.insert(3, "Union Square,not a timestamp,1.0,,\n")
+        with ThreadPoolExecutor(1) as executor:
+            ingestor = AsyncWeatherIngestor(batch_size=4, workers=1, executor=executor)
+            with self.assertLogs(level="ERROR"):
+                asyncio.run(ingestor.run([stand_in_feed(lines)]))
+        self.assertEqual(ingestor.parse_errors, 1)
+        self.assertEqual(ingestor.aggregator.late_readings, 0)
+
+    def test_truncated_lines_are_counted_and_skipped(self):
+        lines = _station_feeds()[0][:10]
+        lines.insert(3, "truncated\n")
+        lines.insert(6, "Union Square,06/13/2023 05:30:00 AM\n")
+        with ThreadPoolExecutor(1) as executor:
+            ingestor = AsyncWeatherIngestor(batch_size=4, workers=1, executor=executor)
+            with self.assertLogs(level="ERROR"):
+                emitted = asyncio.run(ingestor.run([stand_in_feed(lines)]))
+        self.assertEqual(ingestor.parse_errors, 2)
+        self.assertEqual(sum(x.measurement_counts for x in emitted), 10)
+
+    def test_failing_consumer_propagates(self):
+        class FailingAggregator(OutOfOrderDailyAggregator):
+
+            def add(self, *reading):
+                raise RuntimeError("aggregator failed")
+
+        # A full queue left the sources blocked forever once the only consumer died
+        with ThreadPoolExecutor(1) as executor:
+            ingestor = AsyncWeatherIngestor(FailingAggregator(lateness=None), batch_size=10, max_pending_batches=2,
+                                            workers=1, executor=executor)
+            with self.assertRaises(RuntimeError):
+                asyncio.run(asyncio.wait_for(ingestor.run([stand_in_feed(lines) for lines in _station_feeds()]), 60))
+
+    def test_backpressure_bounds_lines_in_flight(self):
+        aggregator = CountingAggregator()
+        batch_size, max_pending_batches, workers = 10, 2, 1
+        feeds = _station_feeds()
+        yielded = [0]
+        max_lead = [0]
+
+        async def tracked_feed(lines):
+            async for line in stand_in_feed(lines):
+                yielded[0] += 1
+                max_lead[0] = max(max_lead[0], yielded[0] - aggregator.readings)
+                yield line
+
+        with ThreadPoolExecutor(workers) as executor:
+            ingestor = AsyncWeatherIngestor(aggregator, batch_size=batch_size, max_pending_batches=max_pending_batches,
+                                            workers=workers, executor=executor)
+            asyncio.run(ingestor.run([tracked_feed(lines) for lines in feeds]))
+
+        self.assertEqual(aggregator.readings, sum(len(lines) for lines in feeds))
+        self.assertLessEqual(ingestor.max_queue_depth, max_pending_batches)
+        self.assertLessEqual(max_lead[0], (max_pending_batches + workers + 2 * len(feeds)) * batch_size)
+
+    def test_failing_source_propagates(self):
+        async def failing_feed():
+            yield "Union Square,06/13/2023 05:30:00 AM,17.9,,\n"
+            raise ConnectionError("feed dropped")
+
+        with ThreadPoolExecutor(1) as executor:
+            with self.assertRaises(ConnectionError):
+                asyncio.run(ingest([failing_feed(), stand_in_feed(_station_feeds()[0])], workers=1, executor=executor))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+from typing import Dict, Optional, TextIO
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from weather import DailyWeatherKey, OutputDailyWeather, aggregate_parsed, parse_frame, read_columns, write_daily_weathers
+
+CACHE_FORMAT_VERSION = 1
+CACHE_DIR_NAME = '.weather_cache'
+
+
+class WeatherCacheError(Exception):
+    """Custom exception for WeatherCache errors"""
+    pass
+
+
+class WeatherCache:
+    """
+    Columnar binary cache of the parsed (typed) columns of weather CSV files.
+
+    The first load of a file parses it with read_columns/parse_frame and saves the columns to an uncompressed
+    .npz: station names as int32 codes into a table of names, timestamps as datetime64[us], temperatures as
+    float64 with NaN for a missing wet-bulb temperature. The cache entry records the absolute source path, its
+    size and mtime; later loads read the arrays back without parsing any text, and re-parse automatically when
+    any of the three has changed.
+
+    Attributes:
+        cache_dir: Directory of the cache files (defaults to .weather_cache next to each source file)
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+
+    def cache_path(self, filename: str) -> str:
+        source = os.path.abspath(filename)
+        cache_dir = self.cache_dir or os.path.join(os.path.dirname(source), CACHE_DIR_NAME)
+        digest = hashlib.sha1(source.encode()).hexdigest()[:16]
+        return os.path.join(cache_dir, f'{os.path.basename(source)}.{digest}.npz')
+
+    def load(self, filename: str) -> pd.DataFrame:
+        """
+        Get the parsed PARSED_COLUMNS frame of filename, from the cache when it is still valid.
+
+        Raises:
+            WeatherCacheError: If the source file does not exist
+        """
+        source = os.path.abspath(filename)
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            raise WeatherCacheError(f'File not found: {filename}')
+        key = {'source': source, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': CACHE_FORMAT_VERSION}
+
+        cache_path = self.cache_path(filename)
+        parsed = self._read(cache_path, key)
+        if parsed is None:
+            with open(source) as reader:
+                reader.readline()
+                parsed = parse_frame(read_columns(reader))
+            self._write(cache_path, key, parsed)
+        return parsed
+
+    def invalidate(self, filename: str):
+        try:
+            os.remove(self.cache_path(filename))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _read(cache_path: str, key: dict) -> Optional[pd.DataFrame]:
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                cached_key = {'source': str(data['source']), 'size': int(data['size']),
+                              'mtime_ns': int(data['mtime_ns']), 'version': int(data['version'])}
+                if cached_key != key:
+                    return None
+                station_names = data['station_names']
+                return pd.DataFrame({
+                    'station_name': pd.Categorical.from_codes(data['station_codes'], categories=station_names).astype(str),
+                    'timestamp': data['timestamp'],
+                    'air': data['air'],
+                    'wet_bulb': data['wet_bulb'],
+                })
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f'Ignoring unreadable weather cache {cache_path}: {e}')
+            return None
+
+    @staticmethod
+    def _write(cache_path: str, key: dict, parsed: pd.DataFrame):
+        station_codes, station_names = pd.factorize(parsed['station_name'])
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a partial file
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                station_codes=station_codes.astype(np.int32),
+                station_names=np.asarray(station_names, dtype=str),
+                timestamp=parsed['timestamp'].to_numpy(dtype='datetime64[us]'),
+                air=parsed['air'].to_numpy(dtype=np.float64),
+                wet_bulb=parsed['wet_bulb'].to_numpy(dtype=np.float64),
+                **{name: np.asarray(value) for name, value in key.items()})
+        os.replace(tmp_path, cache_path)
+
+
+def aggregate_cached(filename: str, cache: Optional[WeatherCache] = None) -> Dict[DailyWeatherKey, OutputDailyWeather]:
+    """aggregate_frame of filename through the cache."""
+    return aggregate_parsed((cache or WeatherCache()).load(filename))
+
+
+def process_csv_cached(filename: str, writer: TextIO, cache: Optional[WeatherCache] = None):
+    """process_csv of filename, loading its parsed columns from the cache when valid."""
+    write_daily_weathers(writer, aggregate_cached(filename, cache).values())
@@ -0,0 +1,86 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import dataclasses
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+import weather
+from weather_cache import WeatherCache, WeatherCacheError, aggregate_cached, process_csv_cached
+
+
+class TestingWeatherCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp, "weather.csv")
+        shutil.copy("data/chicago_beach_weather.csv", self.source)
+        self.cache = WeatherCache(os.path.join(self.tmp, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_cached_output_matches_process_csv(self):
+        with open(self.source) as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io)
+
+        for _ in range(2):
+            output_io = StringIO()
+            process_csv_cached(self.source, output_io, self.cache)
+            self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+        self.assertTrue(os.path.exists(self.cache.cache_path(self.source)))
+
+    def test_cached_aggregates_match_aggregate_lines(self):
+        with open(self.source) as input_file:
+            input_file.readline()
+            expected = weather.aggregate_lines(input_file)
+
+        actual = aggregate_cached(self.source, self.cache)
+        self.assertEqual(list(actual), list(expected))
+        for key, daily_weather in expected.items():
+            self.assertAlmostEqual(actual[key].total_temperature, daily_weather.total_temperature, places=9)
+            self.assertEqual(dataclasses.replace(actual[key], total_temperature=0.0),
+                             dataclasses.replace(daily_weather, total_temperature=0.0))
+
+    def test_parses_temperatures_as_process_csv(self):
+        with open(self.source, "a") as f:
+            f.write("\nUnion Square,06/13/2023 04:11:12 PM,1_0.5,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n"
+                    "Union Square,06/13/2023 05:11:12 PM,nan,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n")
+        with open(self.source) as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io, backend="python")
+
+        output_io = StringIO()
+        process_csv_cached(self.source, output_io, self.cache)
+        self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+        self.assertIn("Union Square,06/13/2023,10.5,10.5,10.5,10.5", output_io.getvalue())
+
+    def test_second_load_does_not_parse(self):
+        first = self.cache.load(self.source)
+        with mock.patch("weather_cache.read_columns") as read_columns:
+            second = self.cache.load(self.source)
+            read_columns.assert_not_called()
+        self.assertTrue(first.equals(second))
+
+    def test_invalidates_when_source_changes(self):
+        rows = len(self.cache.load(self.source))
+        with open(self.source, "a") as f:
+            f.write("\nUnion Square,06/13/2023 04:11:12 PM,2.3,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\n")
+
+        parsed = self.cache.load(self.source)
+        self.assertEqual(len(parsed), rows + 1)
+        self.assertEqual(parsed["station_name"].iloc[-1], "Union Square")
+
+    def test_missing_source(self):
+        with self.assertRaises(WeatherCacheError):
+            self.cache.load(os.path.join(self.tmp, "missing.csv"))
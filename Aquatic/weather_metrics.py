@@ -0,0 +1,121 @@
+from typing import Iterable, Sequence, TextIO
+import logging
+
+import numpy as np
+import pandas as pd
+
+from weather import CSV_SEP, DATE_FORMAT, TIMESTAMP_FORMAT, InputColumns, parse_numeric, read_columns
+
+NUMERIC_COLUMNS = (
+    InputColumns.air_temperature,
+    InputColumns.wet_bulb_temperature,
+    InputColumns.humidity,
+    InputColumns.rain_intensity,
+    InputColumns.interval_rain,
+    InputColumns.total_rain,
+    InputColumns.precipitation_type,
+    InputColumns.wind_direction,
+    InputColumns.wind_speed,
+    InputColumns.maximum_wind_speed,
+    InputColumns.barometric_pressure,
+    InputColumns.solar_radiation,
+    InputColumns.heading,
+    InputColumns.battery_life,
+)
+
+STATISTICS = ('min', 'max', 'first', 'last')
+
+
+def _title(metric: InputColumns) -> str:
+    return metric.name.replace('_', ' ').title()
+
+
+def metrics_header(metrics: Sequence[InputColumns], statistics: Sequence[str] = STATISTICS) -> str:
+    """Output header, e.g. 'Station Name,Date,Min Humidity,Max Humidity,...' for every metric then statistic."""
+    return CSV_SEP.join(['Station Name', 'Date'] + [f'{statistic.title()} {_title(metric)}'
+                                                    for metric in metrics for statistic in statistics])
+
+
+def aggregate_metrics(reader: TextIO, metrics: Iterable[InputColumns],
+                      statistics: Sequence[str] = STATISTICS) -> pd.DataFrame:
+    """
+    Daily min/max/first/last of any subset of the numeric InputColumns, per (station, date), in a single pass.
+
+    Only the station, timestamp and metric columns are read. The metric values form one float matrix, and
+    every statistic is a single groupby reduction over all of its columns, so an extra metric adds a column to
+    the same vectorized calls rather than per-row Python work. Rows with a malformed timestamp are logged and
+    dropped; a missing or malformed value only leaves its metric out for that row. first/last are the earliest
+    and latest non-missing values by timestamp, the first-seen row winning among equal timestamps.
+
+    Row validity is per metric, unlike process_csv: a malformed wet-bulb temperature does not drop the other
+    metrics of its row, and a day with no value of a metric is still returned, with NaN statistics. So for
+    air_temperature alone the result matches process_csv only when no row has such a value.
+
+    Args:
+        reader: Input stream positioned after the header line
+        metrics: Columns to aggregate, from NUMERIC_COLUMNS
+        statistics: Subset of STATISTICS to compute
+
+    Returns:
+        pd.DataFrame: Indexed by (station_name, date) in first-seen order, with (metric name, statistic) columns
+    """
+    metrics = [InputColumns(metric) for metric in metrics]
+    unknown = [metric.name for metric in metrics if metric not in NUMERIC_COLUMNS]
+    if unknown or not metrics:
+        raise ValueError(f'metrics must be a non-empty subset of NUMERIC_COLUMNS, got {unknown or metrics}')
+    unknown = [statistic for statistic in statistics if statistic not in STATISTICS]
+    if unknown:
+        raise ValueError(f'Unknown statistics {unknown}, expected a subset of {STATISTICS}')
+
+    df = read_columns(reader, [InputColumns.station_name, InputColumns.measurement_timestamp] + metrics)
+    timestamps = pd.to_datetime(df[InputColumns.measurement_timestamp.name], format=TIMESTAMP_FORMAT, errors='coerce')
+    valid = timestamps.notna().to_numpy()
+    for i in np.flatnonzero(~valid):
+        logging.error(f'Error parsing row #{i}: {df.iloc[i].tolist()}')
+
+    names = [metric.name for metric in metrics]
+    values = pd.DataFrame({name: parse_numeric(df[name]) for name in names})[valid].reset_index(drop=True)
+    timestamps = timestamps[valid].reset_index(drop=True)
+    keys = pd.DataFrame({'station_name': df[InputColumns.station_name.name][valid].reset_index(drop=True),
+                         'date': timestamps.dt.normalize()})
+    # Group codes in first-seen order
+    codes = keys.groupby(['station_name', 'date'], sort=False).ngroup().to_numpy()
+    index = keys.drop_duplicates().set_index(['station_name', 'date']).index
+
+    results = {}
+    if 'min' in statistics:
+        results['min'] = values.groupby(codes).min()
+    if 'max' in statistics:
+        results['max'] = values.groupby(codes).max()
+    if 'first' in statistics or 'last' in statistics:
+        rows = np.arange(len(values))
+        ticks = timestamps.to_numpy(dtype='datetime64[us]').astype(np.int64)
+        if 'first' in statistics:
+            order = np.lexsort((rows, ticks, codes))
+            results['first'] = values.take(order).groupby(codes[order]).first()
+        if 'last' in statistics:
+            # Among equal timestamps the first-seen row sorts last, so it is the one kept
+            order = np.lexsort((-rows, ticks, codes))
+            results['last'] = values.take(order).groupby(codes[order]).last()
+
+    result = pd.concat({statistic: results[statistic] for statistic in statistics}, axis=1)
+    result = result.swaplevel(axis=1)[[(name, statistic) for name in names for statistic in statistics]]
+    result.index = pd.MultiIndex.from_arrays(
+        [index.get_level_values('station_name'), [day.date() for day in index.get_level_values('date')]],
+        names=['station_name', 'date'])
+    return result
+
+
+def process_csv_metrics(reader: TextIO, writer: TextIO, metrics: Iterable[InputColumns],
+                        statistics: Sequence[str] = STATISTICS):
+    """Write the aggregate_metrics of the CSV from reader; a statistic with no value for the day is left empty."""
+    metrics = [InputColumns(metric) for metric in metrics]
+    reader.readline()
+    result = aggregate_metrics(reader, metrics, statistics)
+
+    writer.write(metrics_header(metrics, statistics))
+    writer.write('\n')
+    for (station_name, measurement_date), row in zip(result.index, result.to_numpy().tolist()):
+        writer.write(CSV_SEP.join([station_name, measurement_date.strftime(DATE_FORMAT)]
+                                  + ['' if value != value else str(value) for value in row]))
+        writer.write('\n')
@@ -0,0 +1,91 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import math
+import unittest
+from collections import defaultdict
+from io import StringIO
+
+import weather
+from weather import InputColumns
+from weather_metrics import NUMERIC_COLUMNS, aggregate_metrics, metrics_header, process_csv_metrics
+
+
+class TestingMetrics(unittest.TestCase):
+
+    def test_air_temperature_matches_process_csv(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io)
+
+        with open("data/chicago_beach_weather.csv") as input_file:
+            output_io = StringIO()
+            process_csv_metrics(input_file, output_io, [InputColumns.air_temperature])
+
+        expected = expected_io.getvalue().strip().split("\n")[1:]
+        actual = output_io.getvalue().strip().split("\n")
+        self.assertEqual(actual[0], "Station Name,Date,Min Air Temperature,Max Air Temperature,"
+                                    "First Air Temperature,Last Air Temperature")
+        self.assertEqual(expected, actual[1:])
+
+    def test_rows_process_csv_rejects_are_kept_per_metric(self):
+        input_io = StringIO(
+            "Station Name,Measurement Timestamp,Air Temperature,Wet Bulb Temperature\n"
+            "Union Square,06/13/2023 04:11:12 PM,20.3,-0.4\n"
+            "Union Square,06/13/2023 05:11:12 PM,25,abc\n"
+            "Union Square,06/14/2023 09:26:12 AM,,-0.4\n")
+        expected_io = StringIO()
+        weather.process_csv(StringIO(input_io.getvalue()), expected_io)
+        output_io = StringIO()
+        process_csv_metrics(input_io, output_io, [InputColumns.air_temperature])
+
+        self.assertEqual(expected_io.getvalue().strip().split("\n")[1:], ["Union Square,06/13/2023,20.3,20.3,20.3,20.3"])
+        self.assertEqual(output_io.getvalue().strip().split("\n")[1:], [
+            "Union Square,06/13/2023,20.3,25.0,20.3,25.0",
+            "Union Square,06/14/2023,,,,",
+        ])
+
+    def test_all_metrics_match_naive_aggregation(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            input_file.readline()
+            lines = input_file.readlines()
+        with open("data/chicago_beach_weather.csv") as input_file:
+            input_file.readline()
+            result = aggregate_metrics(input_file, NUMERIC_COLUMNS)
+
+        readings = defaultdict(lambda: defaultdict(list))
+        for line in lines:
+            values = line.rstrip("\n").split(",")
+            timestamp = weather.parse_timestamp(values[InputColumns.measurement_timestamp])
+            for metric in NUMERIC_COLUMNS:
+                if values[metric]:
+                    readings[(values[InputColumns.station_name], timestamp.date())][metric.name].append(
+                        (timestamp, float(values[metric])))
+
+        self.assertEqual(len(result), len(readings))
+        for key, row in result.iterrows():
+            for metric in NUMERIC_COLUMNS:
+                observed = readings[key][metric.name]
+                if not observed:
+                    self.assertTrue(math.isnan(row[(metric.name, "min")]))
+                    continue
+                self.assertEqual(row[(metric.name, "min")], min(v for _, v in observed))
+                self.assertEqual(row[(metric.name, "max")], max(v for _, v in observed))
+                self.assertEqual(row[(metric.name, "first")], min(observed, key=lambda x: x[0])[1])
+                self.assertEqual(row[(metric.name, "last")], max(observed, key=lambda x: x[0])[1])
+
+    def test_rejects_non_numeric_columns(self):
+        with self.assertRaises(ValueError):
+            aggregate_metrics(StringIO(""), [InputColumns.measurement_id])
+        with self.assertRaises(ValueError):
+            aggregate_metrics(StringIO(""), [InputColumns.humidity], ["median"])
+
+    def test_header(self):
+        self.assertEqual(metrics_header([InputColumns.humidity, InputColumns.wind_speed], ["min", "last"]),
+                         "Station Name,Date,Min Humidity,Last Humidity,Min Wind Speed,Last Wind Speed")
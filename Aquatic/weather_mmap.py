@@ -0,0 +1,105 @@
+from typing import Dict, Generator, Iterator, Optional, TextIO
+import logging
+import mmap
+import os
+
+from weather import (CSV_SEP, Reading, TimestampParser, aggregate_readings, parse_temperature, parse_timestamp,
+                     write_daily_weathers)
+
+_SEP = CSV_SEP.encode()
+_NEWLINE = b'\n'
+
+DEFAULT_WINDOW_BYTES = 16 * 1024 * 1024
+
+
+def iter_readings_mmap(filename: str, start: Optional[int] = None, end: Optional[int] = None,
+                       parse_timestamp: TimestampParser = parse_timestamp, encoding: str = 'utf-8',
+                       window_bytes: int = DEFAULT_WINDOW_BYTES) -> Iterator[Reading]:
+    """
+    Readings of the CSV file scanned straight from memory maps, as parse_lines would give them.
+
+    Each line is walked with mmap.find for its first four separators only; the station, timestamp and
+    temperature fields are the only bytes copied out of the map, and the remaining fields of the line never
+    become Python objects. Station names are decoded once per distinct name.
+    The file is mapped one window at a time, so the mapped pages counted in RSS stay bounded by window_bytes.
+
+    Args:
+        filename: Path of the input CSV
+        start: Byte offset of the first line to read (defaults to just after the header)
+        end: Byte offset where reading stops, on a line boundary (defaults to end of file)
+        parse_timestamp: Timestamp parser
+        encoding: Encoding of the station names
+        window_bytes: Size of each mapped window, grown as needed to hold a whole line
+    """
+    stations: Dict[bytes, str] = {}
+    row = 0
+    with open(filename, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if start is None:
+            f.readline()
+            start = f.tell()
+        end = size if end is None else min(end, size)
+
+        pos = start
+        while pos < end:
+            map_offset = pos - pos % mmap.ALLOCATIONGRANULARITY
+            map_end = min(end, map_offset + max(window_bytes, pos - map_offset + 1))
+            with mmap.mmap(f.fileno(), map_end - map_offset, offset=map_offset, access=mmap.ACCESS_READ) as mm:
+                local_end = map_end - map_offset
+                if map_end < end:
+                    # Stop after the last complete line of the window
+                    local_end = mm.rfind(_NEWLINE, pos - map_offset, local_end) + 1
+                    if local_end == 0:
+                        window_bytes *= 2
+                        continue
+
+                row = yield from _iter_window(mm, pos - map_offset, local_end, parse_timestamp, encoding, stations, row)
+                pos = map_offset + local_end
+
+
+def _iter_window(mm: mmap.mmap, pos: int, end: int, parse_timestamp: TimestampParser, encoding: str,
+                 stations: Dict[bytes, str], row: int) -> Generator[Reading, None, int]:
+    """Readings of the lines in mm[pos:end]; returns the row number the next window starts at."""
+    find = mm.find
+    while pos < end:
+        line_end = find(_NEWLINE, pos, end)
+        if line_end < 0:
+            line_end = end
+        next_pos = line_end + 1
+        if line_end > pos and mm[line_end - 1] == 13:  # '\r'
+            line_end -= 1
+
+        # The four fields used are the first four of the line
+        sep1 = find(_SEP, pos, line_end)
+        sep2 = find(_SEP, sep1 + 1, line_end) if sep1 >= 0 else -1
+        sep3 = find(_SEP, sep2 + 1, line_end) if sep2 >= 0 else -1
+        sep4 = find(_SEP, sep3 + 1, line_end) if sep3 >= 0 else -1
+        try:
+            if sep3 < 0:
+                raise ValueError('expected at least 4 fields')
+            if sep4 < 0:
+                sep4 = line_end
+            raw_station = mm[pos:sep1]
+            station_name = stations.get(raw_station)
+            if station_name is None:
+                station_name = stations[raw_station] = raw_station.decode(encoding)
+            measurement_timestamp = parse_timestamp(mm[sep1 + 1:sep2].decode('ascii'))
+            air_temperature = parse_temperature(mm[sep2 + 1:sep3])
+            raw_wet_bulb = mm[sep3 + 1:sep4]
+            wet_bulb_temperature = parse_temperature(raw_wet_bulb) if raw_wet_bulb else None
+        except (ValueError, IndexError) as e:
+            logging.error(f'Error parsing row #{row}: {e}')
+        else:
+            yield station_name, measurement_timestamp, air_temperature, wet_bulb_temperature
+
+        row += 1
+        pos = next_pos
+    return row
+
+
+def process_csv_mmap(filename: str, writer: TextIO, parse_timestamp: TimestampParser = parse_timestamp,
+                     window_bytes: int = DEFAULT_WINDOW_BYTES):
+    """process_csv reading the input file through iter_readings_mmap."""
+    temperatures = aggregate_readings(iter_readings_mmap(filename, parse_timestamp=parse_timestamp,
+                                                         window_bytes=window_bytes))
+    write_daily_weathers(writer, temperatures.values())
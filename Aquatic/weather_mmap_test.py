@@ -0,0 +1,53 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import tempfile
+import unittest
+from io import StringIO
+
+import weather
+from weather_mmap import iter_readings_mmap, process_csv_mmap
+
+_INPUT_HEADER = "Station Name,Measurement Timestamp,Air Temperature,Wet Bulb Temperature,Humidity,Rain Intensity,Interval Rain,Total Rain,Precipitation Type,Wind Direction,Wind Speed,Maximum Wind Speed,Barometric Pressure,Solar Radiation,Heading,Battery Life,Measurement Timestamp Label,Measurement ID"
+
+
+class TestingMmapReader(unittest.TestCase):
+
+    def test_matches_process_csv_across_window_sizes(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io)
+
+        for window_bytes in (1, 4096, 1 << 24):
+            output_io = StringIO()
+            process_csv_mmap("data/chicago_beach_weather.csv", output_io, window_bytes=window_bytes)
+            self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+
+    def test_readings_match_parse_lines(self):
+        content = (
+            f"{_INPUT_HEADER}\r\n"
+            "Union Square,06/13/2023 04:11:12 PM,20.3,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\r\n"
+            "Union Square,06/14/2023 09:26:12 AM,,-0.4,58,0,0,135.1,0,338,1.4,3,991.1,2,0,,A,B\r\n"
+            "\r\n"
+            "X,06/13/2023 01:00:00 PM\r\n"
+            "Foster Weather Station,06/13/2023 11:00:00,10.94,,58,0,0,135.1,0,338,1.4,3,991.1,2,0,12.1,A,B\r\n"
+            "Foster Weather Station,06/13/2023 04:11:12 AM,8,\r\n"
+            "Foster Weather Station,06/13/2023 04:11:12 AM,8,7.5")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "weather.csv")
+            with open(path, "w", newline="") as f:
+                f.write(content)
+
+            readings = list(iter_readings_mmap(path))
+
+        self.assertEqual([(r[0], r[2], r[3]) for r in readings], [
+            ("Union Square", 20.3, -0.4),
+            ("Foster Weather Station", 8.0, None),
+            ("Foster Weather Station", 8.0, 7.5),
+        ])
@@ -0,0 +1,151 @@
+from typing import Dict, IO, Iterable, List, Set, TextIO
+from collections import OrderedDict
+import os
+import re
+
+from weather import OutputDailyWeather, TimestampParser, aggregate_lines, parse_timestamp
+
+_UNSAFE_FILE_NAME_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+class ShardedStationWriter:
+    """
+    Writes OutputDailyWeather rows to one CSV file per station.
+
+    Rows are buffered per station and written as one block once a station's buffer reaches block_bytes, or
+    from the largest buffers first once all buffers together reach max_buffered_bytes. At most max_open_files
+    handles are kept open, the least recently written one being closed when another is needed; a closed shard
+    is reopened in append mode, and every shard gets OUTPUT_COLUMNS as its header the first time it is opened.
+
+    Attributes:
+        output_dir: Directory of the per-station files
+        max_open_files: Cap on simultaneously open file handles
+        block_bytes: Buffered size at which a station's rows are written out
+        max_buffered_bytes: Cap on the total size of buffered rows
+        files_opened: Number of open() calls made so far, including reopenings
+    """
+
+    def __init__(self, output_dir: str, max_open_files: int = 64, block_bytes: int = 256 * 1024,
+                 max_buffered_bytes: int = 64 * 1024 * 1024):
+        if max_open_files < 1:
+            raise ValueError(f'max_open_files must be >= 1, got {max_open_files}')
+        self.output_dir = output_dir
+        self.max_open_files = max_open_files
+        self.block_bytes = block_bytes
+        self.max_buffered_bytes = max_buffered_bytes
+        self.files_opened = 0
+
+        self._buffers: Dict[str, List[str]] = {}
+        self._buffered_bytes: Dict[str, int] = {}
+        self._total_buffered_bytes = 0
+        self._handles: 'OrderedDict[str, IO[str]]' = OrderedDict()
+        self._paths: Dict[str, str] = {}
+        self._used_file_names: Set[str] = set()
+        self._created: Set[str] = set()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self) -> 'ShardedStationWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def open_files(self) -> int:
+        return len(self._handles)
+
+    @property
+    def paths(self) -> Dict[str, str]:
+        """Station name to shard path, for every station written so far."""
+        return dict(self._paths)
+
+    def path(self, station_name: str) -> str:
+        """The shard path of a station; names are made file-system safe and kept unique."""
+        path = self._paths.get(station_name)
+        if path is None:
+            file_name = _UNSAFE_FILE_NAME_CHARS.sub('_', station_name).strip('._') or 'station'
+            candidate, suffix = file_name, 1
+            while candidate in self._used_file_names:
+                suffix += 1
+                candidate = f'{file_name}_{suffix}'
+            self._used_file_names.add(candidate)
+            path = self._paths[station_name] = os.path.join(self.output_dir, f'{candidate}.csv')
+        return path
+
+    def write(self, daily_weather: OutputDailyWeather):
+        station_name = daily_weather.station_name
+        row = f'{daily_weather}\n'
+        buffer = self._buffers.get(station_name)
+        if buffer is None:
+            buffer = self._buffers[station_name] = []
+            self._buffered_bytes[station_name] = 0
+        buffer.append(row)
+        self._buffered_bytes[station_name] += len(row)
+        self._total_buffered_bytes += len(row)
+
+        if self._buffered_bytes[station_name] >= self.block_bytes:
+            self._flush_station(station_name)
+        if self._total_buffered_bytes >= self.max_buffered_bytes:
+            # Largest buffers first, so every write stays a large block
+            for name in sorted(self._buffered_bytes, key=self._buffered_bytes.get, reverse=True):
+                self._flush_station(name)
+                if self._total_buffered_bytes < self.max_buffered_bytes // 2:
+                    break
+
+    def write_all(self, daily_weathers: Iterable[OutputDailyWeather]):
+        for daily_weather in daily_weathers:
+            self.write(daily_weather)
+
+    def flush(self):
+        for station_name in list(self._buffers):
+            self._flush_station(station_name)
+        for handle in self._handles.values():
+            handle.flush()
+
+    def close(self):
+        self.flush()
+        while self._handles:
+            _, handle = self._handles.popitem(last=False)
+            handle.close()
+
+    def _flush_station(self, station_name: str):
+        buffer = self._buffers.pop(station_name, None)
+        if not buffer:
+            return
+        self._total_buffered_bytes -= self._buffered_bytes.pop(station_name)
+        self._handle(station_name).write(''.join(buffer))
+
+    def _handle(self, station_name: str) -> IO[str]:
+        handle = self._handles.get(station_name)
+        if handle is not None:
+            self._handles.move_to_end(station_name)
+            return handle
+
+        if len(self._handles) >= self.max_open_files:
+            _, lru_handle = self._handles.popitem(last=False)
+            lru_handle.close()
+
+        is_new = station_name not in self._created
+        handle = open(self.path(station_name), 'w' if is_new else 'a')
+        self.files_opened += 1
+        if is_new:
+            self._created.add(station_name)
+            handle.write(OutputDailyWeather.OUTPUT_COLUMNS)
+            handle.write('\n')
+        self._handles[station_name] = handle
+        return handle
+
+
+def process_csv_sharded(reader: TextIO, output_dir: str, max_open_files: int = 64,
+                        parse_timestamp: TimestampParser = parse_timestamp) -> Dict[str, str]:
+    """
+    process_csv writing one file per station into output_dir.
+
+    Returns:
+        Dict[str, str]: Station name to the path of its file
+    """
+    reader.readline()
+    temperatures = aggregate_lines(reader, parse_timestamp=parse_timestamp)
+    with ShardedStationWriter(output_dir, max_open_files=max_open_files) as writer:
+        writer.write_all(temperatures.values())
+    return writer.paths
@@ -0,0 +1,54 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import tempfile
+import unittest
+from collections import defaultdict
+from datetime import datetime
+from io import StringIO
+
+import weather
+from weather_shard import ShardedStationWriter, process_csv_sharded
+
+
+class TestingShardedStationWriter(unittest.TestCase):
+
+    def test_shards_match_process_csv(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io)
+        expected = defaultdict(list)
+        for row in expected_io.getvalue().strip().split("\n")[1:]:
+            expected[row.split(",")[0]].append(row)
+
+        with tempfile.TemporaryDirectory() as tmp, open("data/chicago_beach_weather.csv") as input_file:
+            paths = process_csv_sharded(input_file, tmp, max_open_files=1)
+            self.assertEqual(set(paths), set(expected))
+            for station_name, path in paths.items():
+                with open(path) as f:
+                    self.assertEqual(f.read().strip().split("\n"),
+                                     [weather.OutputDailyWeather.OUTPUT_COLUMNS] + expected[station_name])
+
+    def test_caps_open_files_and_reopens_in_append_mode(self):
+        def daily_weather(station_name, day):
+            timestamp = datetime(2023, 6, day)
+            return weather.OutputDailyWeather(station_name, timestamp.date(), timestamp, timestamp, 1.0, 1.0, 1.0, 1.0, None)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with ShardedStationWriter(tmp, max_open_files=2, block_bytes=1) as writer:
+                for day in (1, 2):
+                    for station_name in ("A", "B", "C/D", "C_D"):
+                        writer.write(daily_weather(station_name, day))
+                        self.assertLessEqual(writer.open_files, 2)
+                self.assertEqual(writer.files_opened, 8)
+
+            self.assertEqual(sorted(os.listdir(tmp)), ["A.csv", "B.csv", "C_D.csv", "C_D_2.csv"])
+            with open(os.path.join(tmp, "C_D_2.csv")) as f:
+                self.assertEqual(f.read(), weather.OutputDailyWeather.OUTPUT_COLUMNS + "\n"
+                                 "C_D,06/01/2023,1.0,1.0,1.0,1.0\nC_D,06/02/2023,1.0,1.0,1.0,1.0\n")
@@ -0,0 +1,181 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from datetime import datetime, date, time, timedelta
+import logging
+import math
+
+from weather import (DailyWeatherKey, OutputDailyWeather, TimestampParser, parse_line, parse_timestamp,
+                     write_daily_weathers)
+
+_ORDINAL_BITS = 22  # date.max.toordinal() < 2 ** 22
+
+
+def _microsecond_of_day(timestamp: datetime) -> int:
+    return ((timestamp.hour * 60 + timestamp.minute) * 60 + timestamp.second) * 1000000 + timestamp.microsecond
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class DailyWeatherStore:
+    """
+    Compact struct-of-arrays replacement for the Dict[(station, date), OutputDailyWeather] built by process_csv.
+
+    Station names are interned to integer ids and each (station, date) gets a row index; a row is one slot in a
+    set of typed arrays (doubles for temperatures, NaN standing for a missing wet-bulb temperature, and 64-bit
+    microseconds of the day for timestamps, since all timestamps of a row share its date). The index maps a
+    single int key to the row, so no tuple key, datetime or float objects are kept per (station, day):
+    benchmarks/bench_store_memory.py measures ~240 bytes retained per (station, day) against ~600 for the dict of
+    dataclasses, with its defaults of 2000 stations over 365 days. Rows are kept in first-seen order and updated
+    with the same rules as OutputDailyWeather.update_temperature; OutputDailyWeather objects are only materialized
+    on read.
+    """
+
+    def __init__(self):
+        self._station_ids: Dict[str, int] = {}
+        self._station_names: List[str] = []
+        self._rows: Dict[int, int] = {}
+
+        self._station = array('i')
+        self._ordinal = array('i')
+        self._first_time = array('q')
+        self._last_time = array('q')
+        self._first = array('d')
+        self._last = array('d')
+        self._min = array('d')
+        self._max = array('d')
+        self._first_wet_bulb = array('d')
+        self._last_wet_bulb = array('d')
+        self._min_wet_bulb = array('d')
+        self._max_wet_bulb = array('d')
+        self._first_wet_bulb_time = array('q')
+        self._last_wet_bulb_time = array('q')
+        self._total = array('d')
+        self._count = array('q')
+
+    def __len__(self) -> int:
+        return len(self._station)
+
+    def __contains__(self, key: DailyWeatherKey) -> bool:
+        return self._row(*key) is not None
+
+    def __getitem__(self, key: DailyWeatherKey) -> OutputDailyWeather:
+        row = self._row(*key)
+        if row is None:
+            raise KeyError(key)
+        return self._materialize(row)
+
+    def keys(self) -> Iterator[DailyWeatherKey]:
+        for station, ordinal in zip(self._station, self._ordinal):
+            yield self._station_names[station], date.fromordinal(ordinal)
+
+    def values(self) -> Iterator[OutputDailyWeather]:
+        for row in range(len(self)):
+            yield self._materialize(row)
+
+    def items(self) -> Iterator[Tuple[DailyWeatherKey, OutputDailyWeather]]:
+        return zip(self.keys(), self.values())
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the typed column arrays, excluding the index and the interned station names."""
+        return sum(column.itemsize * len(column) for column in self._columns())
+
+    def update(self, station_name: str, timestamp: datetime, air_temperature: float,
+               wet_bulb_temperature: Optional[float] = None):
+        """Add a reading: opens the (station, date) row on first sight, otherwise updates it."""
+        station = self._station_ids.get(station_name)
+        if station is None:
+            station = self._station_ids[station_name] = len(self._station_names)
+            self._station_names.append(station_name)
+
+        ordinal = timestamp.toordinal()
+        key = (station << _ORDINAL_BITS) | ordinal
+        time_of_day = _microsecond_of_day(timestamp)
+        row = self._rows.get(key)
+        if row is None:
+            self._rows[key] = len(self._station)
+            wet_bulb = math.nan if wet_bulb_temperature is None else wet_bulb_temperature
+            self._station.append(station)
+            self._ordinal.append(ordinal)
+            self._first_time.append(time_of_day)
+            self._last_time.append(time_of_day)
+            self._first.append(air_temperature)
+            self._last.append(air_temperature)
+            self._min.append(air_temperature)
+            self._max.append(air_temperature)
+            self._first_wet_bulb.append(wet_bulb)
+            self._last_wet_bulb.append(wet_bulb)
+            self._min_wet_bulb.append(wet_bulb)
+            self._max_wet_bulb.append(wet_bulb)
+            self._first_wet_bulb_time.append(time_of_day)
+            self._last_wet_bulb_time.append(time_of_day)
+            self._total.append(air_temperature)
+            self._count.append(1)
+            return
+
+        self._total[row] += air_temperature
+        self._count[row] += 1
+
+        if time_of_day < self._first_time[row]:
+            self._first_time[row] = time_of_day
+            self._first[row] = air_temperature
+        if time_of_day > self._last_time[row]:
+            self._last_time[row] = time_of_day
+            self._last[row] = air_temperature
+
+        if air_temperature < self._min[row]:
+            self._min[row] = air_temperature
+        if air_temperature > self._max[row]:
+            self._max[row] = air_temperature
+
+    def _row(self, station_name: str, measurement_date: date) -> Optional[int]:
+        station = self._station_ids.get(station_name)
+        if station is None:
+            return None
+        return self._rows.get((station << _ORDINAL_BITS) | measurement_date.toordinal())
+
+    def _materialize(self, row: int) -> OutputDailyWeather:
+        measurement_date = date.fromordinal(self._ordinal[row])
+        midnight = datetime.combine(measurement_date, time())
+
+        def timestamp(time_of_day: int) -> datetime:
+            return midnight + timedelta(microseconds=time_of_day)
+
+        return OutputDailyWeather(
+            self._station_names[self._station[row]], measurement_date,
+            timestamp(self._first_time[row]), timestamp(self._last_time[row]),
+            self._first[row], self._last[row], self._min[row], self._max[row],
+            _optional(self._first_wet_bulb[row]), _optional(self._last_wet_bulb[row]),
+            _optional(self._min_wet_bulb[row]), _optional(self._max_wet_bulb[row]),
+            timestamp(self._first_wet_bulb_time[row]), timestamp(self._last_wet_bulb_time[row]),
+            self._total[row], self._count[row])
+
+    def _columns(self) -> Tuple[array, ...]:
+        return (self._station, self._ordinal, self._first_time, self._last_time,
+                self._first, self._last, self._min, self._max,
+                self._first_wet_bulb, self._last_wet_bulb, self._min_wet_bulb, self._max_wet_bulb,
+                self._first_wet_bulb_time, self._last_wet_bulb_time, self._total, self._count)
+
+
+def aggregate_lines_compact(lines: Iterable[str], store: Optional[DailyWeatherStore] = None,
+                            parse_timestamp: TimestampParser = parse_timestamp) -> DailyWeatherStore:
+    """aggregate_lines into a DailyWeatherStore."""
+    if store is None:
+        store = DailyWeatherStore()
+    for i, line in enumerate(lines):
+        try:
+            reading = parse_line(line, parse_timestamp)
+        except (ValueError, IndexError) as e:
+            logging.error(f'Error parsing row #{i}: {e}')
+            continue
+        store.update(*reading)
+    return store
+
+
+def process_csv_compact(reader: TextIO, writer: TextIO, parse_timestamp: TimestampParser = parse_timestamp):
+    """process_csv holding the aggregation in a DailyWeatherStore."""
+    reader.readline()
+    store = aggregate_lines_compact(reader, parse_timestamp=parse_timestamp)
+    write_daily_weathers(writer, store.values())
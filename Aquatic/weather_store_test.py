@@ -0,0 +1,52 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import unittest
+from datetime import date, datetime
+from io import StringIO
+
+import weather
+from weather_store import DailyWeatherStore, aggregate_lines_compact, process_csv_compact
+
+
+class TestingDailyWeatherStore(unittest.TestCase):
+
+    def test_matches_process_csv(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            expected_io = StringIO()
+            weather.process_csv(input_file, expected_io)
+
+        with open("data/chicago_beach_weather.csv") as input_file:
+            output_io = StringIO()
+            process_csv_compact(input_file, output_io)
+
+        self.assertEqual(expected_io.getvalue(), output_io.getvalue())
+
+    def test_round_trips_daily_weather_fields(self):
+        store = DailyWeatherStore()
+        store.update("Union Square", datetime(2023, 6, 13, 16, 11, 12, 500), 20.3, -0.4)
+        store.update("Union Square", datetime(2023, 6, 13, 5, 30, 12), 17.9, 1.5)
+        store.update("Foster Weather Station", datetime(2023, 6, 13, 4, 11, 12), 8.0)
+
+        expected = weather.OutputDailyWeather(
+            "Union Square", date(2023, 6, 13), datetime(2023, 6, 13, 5, 30, 12), datetime(2023, 6, 13, 16, 11, 12, 500),
+            17.9, 20.3, 17.9, 20.3, -0.4, first_wet_bulb_timestamp=datetime(2023, 6, 13, 16, 11, 12, 500),
+            total_temperature=20.3 + 17.9, measurement_counts=2)
+        self.assertEqual(store[("Union Square", date(2023, 6, 13))], expected)
+        self.assertIsNone(store[("Foster Weather Station", date(2023, 6, 13))].first_wet_bulb_temperature)
+        self.assertEqual(len(store), 2)
+        self.assertNotIn(("Union Square", date(2023, 6, 14)), store)
+        self.assertEqual(list(store.keys()), [("Union Square", date(2023, 6, 13)), ("Foster Weather Station", date(2023, 6, 13))])
+
+    def test_short_rows_are_skipped(self):
+        lines = ["Union Square,06/13/2023 04:11:12 PM,20.3,-0.4,58\n", "X,06/13/2023 01:00:00 PM\n",
+                 "Union Square,06/13/2023 05:11:12 PM,25\n"]
+        with self.assertLogs(level="ERROR"):
+            store = aggregate_lines_compact(lines)
+        self.assertEqual([str(x) for x in store.values()], ["Union Square,06/13/2023,20.3,20.3,20.3,20.3"])
@@ -0,0 +1,253 @@
+from typing import Callable, Dict, Iterable, List, Optional
+from datetime import datetime, date, timedelta
+import heapq
+import logging
+import sys
+
+from weather import OutputDailyWeather, TimestampParser, parse_line, parse_timestamp
+
+
+class StreamingDailyAggregator:
+    """
+    Incremental version of process_csv for feeds that keep delivering readings.
+
+    Each station has a watermark, the latest measurement timestamp seen for it. Once the watermark passes a date,
+    that station's day is finalized and emitted, so only one open (station, day) window is held per station
+    however many rows have been seen. Readings older than the station's watermark date arrive after their day
+    was emitted; they are logged, counted in late_readings and dropped.
+
+    advance_watermark closes days for all stations at once, e.g. on a wall clock when a station goes quiet.
+
+    Attributes:
+        on_emit: Optional callback invoked with every finalized OutputDailyWeather, in emission order
+        late_readings: Number of readings dropped because their day had already been emitted
+    """
+
+    def __init__(self, on_emit: Optional[Callable[[OutputDailyWeather], None]] = None,
+                 parse_timestamp: TimestampParser = parse_timestamp):
+        self.on_emit = on_emit
+        self.late_readings = 0
+        self._parse_timestamp = parse_timestamp
+        self._open: Dict[str, OutputDailyWeather] = {}
+        self._watermarks: Dict[str, datetime] = {}
+
+    @property
+    def open_windows(self) -> int:
+        """Number of (station, day) windows currently held in memory."""
+        return len(self._open)
+
+    def watermark(self, station_name: str) -> Optional[datetime]:
+        return self._watermarks.get(station_name)
+
+    def add(self, station_name: str, timestamp: datetime, air_temperature: float,
+            wet_bulb_temperature: Optional[float] = None) -> List[OutputDailyWeather]:
+        """
+        Add a single reading.
+
+        Returns:
+            List[OutputDailyWeather]: The day this reading finalized for its station, if any
+        """
+        measurement_date = timestamp.date()
+        watermark = self._watermarks.get(station_name)
+        if watermark is not None and measurement_date < watermark.date():
+            self.late_readings += 1
+            logging.warning(f'Dropping late reading for {station_name} at {timestamp}, watermark is {watermark}')
+            return []
+
+        emitted = []
+        daily_weather = self._open.get(station_name)
+        if daily_weather is not None and daily_weather.date < measurement_date:
+            emitted.append(self._close(station_name))
+            daily_weather = None
+
+        if daily_weather is None:
+            self._open[station_name] = OutputDailyWeather(
+                station_name, measurement_date, timestamp, timestamp,
+                air_temperature, air_temperature, air_temperature, air_temperature, wet_bulb_temperature)
+        else:
+            daily_weather.update_temperature(timestamp, air_temperature)
+
+        if watermark is None or timestamp > watermark:
+            self._watermarks[station_name] = timestamp
+        return emitted
+
+    def add_lines(self, lines: Iterable[str]) -> List[OutputDailyWeather]:
+        """
+        Add a batch of data lines in the input CSV format (no header); malformed lines are logged and skipped.
+
+        Returns:
+            List[OutputDailyWeather]: The days finalized by this batch, in emission order
+        """
+        emitted = []
+        for i, line in enumerate(lines):
+            try:
+                reading = parse_line(line, self._parse_timestamp)
+            except (ValueError, IndexError) as e:
+                logging.error(f'Error parsing row #{i}: {e}')
+                continue
+            emitted.extend(self.add(*reading))
+        return emitted
+
+    def advance_watermark(self, watermark: datetime) -> List[OutputDailyWeather]:
+        """
+        Finalize the open days of every station that are before the date of watermark.
+
+        Returns:
+            List[OutputDailyWeather]: The finalized days
+        """
+        emitted = []
+        for station_name in [s for s, x in self._open.items() if x.date < watermark.date()]:
+            emitted.append(self._close(station_name))
+            if self._watermarks[station_name] < watermark:
+                self._watermarks[station_name] = watermark
+        return emitted
+
+    def flush(self) -> List[OutputDailyWeather]:
+        """Finalize every open day, e.g. at the end of a finite input."""
+        return [self._close(station_name) for station_name in list(self._open)]
+
+    def _close(self, station_name: str) -> OutputDailyWeather:
+        daily_weather = self._open.pop(station_name)
+        if self.on_emit is not None:
+            self.on_emit(daily_weather)
+        return daily_weather
+
+
+def _window_bytes(daily_weather: OutputDailyWeather) -> int:
+    """Approximate bytes held by one open window: the object, its attributes and its key."""
+    attributes = vars(daily_weather)
+    return (sys.getsizeof(daily_weather) + sys.getsizeof(attributes)
+            + sum(sys.getsizeof(value) for name, value in attributes.items() if name != 'station_name')
+            + sys.getsizeof((daily_weather.station_name, daily_weather.date)))
+
+
+class OutOfOrderDailyAggregator:
+    """
+    Daily aggregation for feeds that interleave stations and deliver readings out of order or late.
+
+    Any number of (station, day) windows may be open, and readings update them in whatever order they arrive;
+    OutputDailyWeather picks first/last by timestamp, so the result does not depend on arrival order.
+    The watermark is the latest measurement timestamp seen across all stations. A day is finalized and emitted
+    once the watermark minus the lateness horizon has passed its end; until then late readings are still merged.
+    Readings for a day that has already been emitted are counted in late_readings and dropped. A lateness of
+    None keeps every window open until flush, which is exact for any input order.
+
+    Memory is proportional to the windows open at once, i.e. to the stations times the days the lateness
+    horizon spans; max_open_windows reports the high-water mark, and estimated_window_bytes scales it by the
+    sys.getsizeof size of one window, an estimate rather than a measurement.
+
+    Attributes:
+        lateness: How long after a day ends readings for it are still accepted
+        on_emit: Optional callback invoked with every finalized OutputDailyWeather, in emission order
+        late_readings: Number of readings dropped because their day had already been emitted
+        max_open_windows: Highest number of windows open at once
+    """
+
+    def __init__(self, lateness: Optional[timedelta] = timedelta(hours=6),
+                 on_emit: Optional[Callable[[OutputDailyWeather], None]] = None,
+                 parse_timestamp: TimestampParser = parse_timestamp):
+        if lateness is not None and lateness < timedelta(0):
+            raise ValueError(f'lateness must not be negative, got {lateness}')
+        self.lateness = lateness
+        self.on_emit = on_emit
+        self.late_readings = 0
+        self.max_open_windows = 0
+        self._parse_timestamp = parse_timestamp
+        self._days: Dict[date, Dict[str, OutputDailyWeather]] = {}
+        self._open_dates: List[date] = []
+        self._open_windows = 0
+        self._window_bytes = 0
+        self._watermark: Optional[datetime] = None
+        self._finalized_before: Optional[date] = None
+
+    @property
+    def open_windows(self) -> int:
+        return self._open_windows
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        return self._watermark
+
+    @property
+    def estimated_window_bytes(self) -> int:
+        """
+        Estimate of the peak memory held by open windows: max_open_windows times the sys.getsizeof footprint of the
+        first window opened. Nothing is measured; allocator overhead and shared objects are not accounted for.
+        """
+        return self.max_open_windows * self._window_bytes
+
+    def add(self, station_name: str, timestamp: datetime, air_temperature: float,
+            wet_bulb_temperature: Optional[float] = None) -> List[OutputDailyWeather]:
+        """
+        Add a single reading.
+
+        Returns:
+            List[OutputDailyWeather]: The days this reading's watermark finalized, by date
+        """
+        measurement_date = timestamp.date()
+        if self._finalized_before is not None and measurement_date < self._finalized_before:
+            self.late_readings += 1
+            logging.warning(f'Dropping late reading for {station_name} at {timestamp}, '
+                            f'days before {self._finalized_before} are finalized')
+            return []
+
+        windows = self._days.get(measurement_date)
+        if windows is None:
+            windows = self._days[measurement_date] = {}
+            heapq.heappush(self._open_dates, measurement_date)
+
+        daily_weather = windows.get(station_name)
+        if daily_weather is None:
+            windows[station_name] = daily_weather = OutputDailyWeather(
+                station_name, measurement_date, timestamp, timestamp,
+                air_temperature, air_temperature, air_temperature, air_temperature, wet_bulb_temperature)
+            self._open_windows += 1
+            if self._open_windows > self.max_open_windows:
+                self.max_open_windows = self._open_windows
+                if not self._window_bytes:
+                    self._window_bytes = _window_bytes(daily_weather)
+        else:
+            daily_weather.update_temperature(timestamp, air_temperature)
+
+        if self._watermark is None or timestamp > self._watermark:
+            self._watermark = timestamp
+            if self.lateness is not None:
+                return self._finalize_before((timestamp - self.lateness).date())
+        return []
+
+    def add_lines(self, lines: Iterable[str]) -> List[OutputDailyWeather]:
+        """
+        Add a batch of data lines in the input CSV format (no header); malformed lines are logged and skipped.
+
+        Returns:
+            List[OutputDailyWeather]: The days finalized by this batch, in emission order
+        """
+        emitted = []
+        for i, line in enumerate(lines):
+            try:
+                reading = parse_line(line, self._parse_timestamp)
+            except (ValueError, IndexError) as e:
+                logging.error(f'Error parsing row #{i}: {e}')
+                continue
+            emitted.extend(self.add(*reading))
+        return emitted
+
+    def flush(self) -> List[OutputDailyWeather]:
+        """Finalize every open day, e.g. at the end of a finite input."""
+        if not self._open_dates:
+            return []
+        return self._finalize_before(max(self._open_dates) + timedelta(days=1))
+
+    def _finalize_before(self, cutoff: date) -> List[OutputDailyWeather]:
+        if self._finalized_before is None or cutoff > self._finalized_before:
+            self._finalized_before = cutoff
+
+        emitted = []
+        while self._open_dates and self._open_dates[0] < cutoff:
+            windows = self._days.pop(heapq.heappop(self._open_dates))
+            self._open_windows -= len(windows)
+            for daily_weather in windows.values():
+                if self.on_emit is not None:
+                    self.on_emit(daily_weather)
+                emitted.append(daily_weather)
+        return emitted
@@ -0,0 +1,129 @@
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(
+    inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import random
+import unittest
+from datetime import datetime, timedelta
+from io import StringIO
+
+import weather
+from weather_stream import OutOfOrderDailyAggregator, StreamingDailyAggregator
+
+
+def _sample_lines():
+    with open("data/chicago_beach_weather.csv") as input_file:
+        input_file.readline()
+        return [f"{line.rstrip()}\n" for line in input_file]
+
+
+def _process_csv_rows(lines):
+    expected_io = StringIO()
+    weather.process_csv(StringIO("header\n" + "".join(lines)), expected_io)
+    return expected_io.getvalue().strip().split("\n")[1:]
+
+
+class TestingStreamingDailyAggregator(unittest.TestCase):
+
+    def test_emits_day_once_watermark_passes(self):
+        aggregator = StreamingDailyAggregator()
+        self.assertEqual(aggregator.add("Union Square", datetime(2023, 6, 13, 5, 30), 17.9), [])
+        self.assertEqual(aggregator.add("Union Square", datetime(2023, 6, 13, 17, 11), 25.0), [])
+        self.assertEqual(aggregator.add("Foster Weather Station", datetime(2023, 6, 13, 4, 11), 8.0), [])
+
+        emitted = aggregator.add("Union Square", datetime(2023, 6, 14, 9, 26), 13.76)
+        self.assertEqual([str(x) for x in emitted], ["Union Square,06/13/2023,17.9,25.0,17.9,25.0"])
+        self.assertEqual(aggregator.open_windows, 2)
+
+        emitted = aggregator.advance_watermark(datetime(2023, 6, 14))
+        self.assertEqual([str(x) for x in emitted], ["Foster Weather Station,06/13/2023,8.0,8.0,8.0,8.0"])
+        self.assertEqual([str(x) for x in aggregator.flush()], ["Union Square,06/14/2023,13.76,13.76,13.76,13.76"])
+        self.assertEqual(aggregator.open_windows, 0)
+
+    def test_drops_late_readings(self):
+        aggregator = StreamingDailyAggregator()
+        aggregator.add("Union Square", datetime(2023, 6, 14, 9, 26), 13.76)
+        self.assertEqual(aggregator.add("Union Square", datetime(2023, 6, 13, 5, 30), 17.9), [])
+        self.assertEqual(aggregator.late_readings, 1)
+        self.assertEqual(aggregator.open_windows, 1)
+
+    def test_matches_process_csv_on_time_ordered_sample(self):
+        with open("data/chicago_beach_weather.csv") as input_file:
+            input_file.readline()
+            # The sample is newest-first; a live feed delivers oldest-first
+            lines = [f"{line.rstrip()}\n" for line in input_file][::-1]
+
+        expected_io = StringIO()
+        weather.process_csv(StringIO("header\n" + "".join(lines)), expected_io)
+
+        emitted = []
+        aggregator = StreamingDailyAggregator(on_emit=emitted.append)
+        max_open_windows = 0
+        for start in range(0, len(lines), 10):
+            aggregator.add_lines(lines[start:start + 10])
+            max_open_windows = max(max_open_windows, aggregator.open_windows)
+        aggregator.flush()
+
+        self.assertCountEqual(expected_io.getvalue().strip().split("\n")[1:], [str(x) for x in emitted])
+        self.assertLessEqual(max_open_windows, 3)
+        self.assertEqual(aggregator.late_readings, 0)
+
+
+class TestingOutOfOrderDailyAggregator(unittest.TestCase):
+
+    def test_shuffled_input_without_lateness_matches_process_csv(self):
+        lines = _sample_lines()
+        random.Random(1).shuffle(lines)
+
+        aggregator = OutOfOrderDailyAggregator(lateness=None)
+        self.assertEqual(aggregator.add_lines(lines), [])
+        emitted = aggregator.flush()
+
+        self.assertCountEqual(_process_csv_rows(lines), [str(x) for x in emitted])
+        self.assertEqual(aggregator.max_open_windows, len(emitted))
+        self.assertGreater(aggregator.estimated_window_bytes, 0)
+
+    def test_bounded_disorder_within_lateness_matches_process_csv(self):
+        lines = _sample_lines()[::-1]
+        # Delay every reading by up to 10 rows (a few hours of this feed)
+        rng = random.Random(2)
+        lines = [line for _, line in sorted((i + rng.uniform(0, 10), line) for i, line in enumerate(lines))]
+
+        emitted = []
+        aggregator = OutOfOrderDailyAggregator(lateness=timedelta(hours=6), on_emit=emitted.append)
+        aggregator.add_lines(lines)
+        self.assertGreater(len(emitted), 0)
+        self.assertLess(aggregator.max_open_windows, len(_process_csv_rows(lines)))
+        aggregator.flush()
+
+        self.assertEqual(aggregator.late_readings, 0)
+        self.assertCountEqual(_process_csv_rows(lines), [str(x) for x in emitted])
+
+    def test_drops_readings_beyond_lateness(self):
+        aggregator = OutOfOrderDailyAggregator(lateness=timedelta(hours=2))
+        aggregator.add("Union Square", datetime(2023, 6, 13, 23, 0), 20.0)
+        self.assertEqual(aggregator.add("Union Square", datetime(2023, 6, 14, 1, 0), 18.0), [])
+        emitted = aggregator.add("Foster Weather Station", datetime(2023, 6, 14, 3, 0), 15.0)
+        self.assertEqual([str(x) for x in emitted], ["Union Square,06/13/2023,20.0,20.0,20.0,20.0"])
+
+        # Within the horizon of 06/14, beyond the one of 06/13
+        aggregator.add("Union Square", datetime(2023, 6, 14, 0, 30), 19.0)
+        aggregator.add("Union Square", datetime(2023, 6, 13, 22, 0), 21.0)
+        self.assertEqual(aggregator.late_readings, 1)
+        self.assertEqual([str(x) for x in aggregator.flush()], [
+            "Union Square,06/14/2023,18.0,19.0,19.0,18.0",
+            "Foster Weather Station,06/14/2023,15.0,15.0,15.0,15.0",
+        ])
+
+    def test_add_lines_skips_truncated_lines(self):
+        lines = ["Union Square,06/13/2023 05:30:12 AM,17.9,-0.4,58\n", "truncated\n",
+                 "Union Square,06/13/2023 05:11:12 PM\n", "Union Square,06/13/2023 05:11:12 PM,25,-0.4,58\n"]
+        for aggregator in (StreamingDailyAggregator(), OutOfOrderDailyAggregator(lateness=None)):
+            with self.assertLogs(level="ERROR"):
+                aggregator.add_lines(lines)
+            self.assertEqual([str(x) for x in aggregator.flush()], ["Union Square,06/13/2023,17.9,25.0,17.9,25.0"])
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import date
-from typing import Generic, Optional, TypeVar
+from typing import Any, Dict, Generic, Optional, TypeVar
 
 from marketdata import MarketData
 from schedule import Schedule
@@ -59,4 +59,36 @@ class Strategy(ABC, Generic[StrategyState]):
             StrategyState: Strategy-specific state object containing all computed
                 values for the given date
         """
-        pass
\ No newline at end of file
+        pass
+
+    def compute_states(self, schedule: Schedule) -> Dict[date, StrategyState]:
+        """
+        Compute the states for every date of a schedule.
+
+        The default calls compute_state for each date in order; strategies
+        may override it with a batch computation giving the same states.
+
+        Args:
+            schedule: The dates for which to compute the states
+
+        Returns:
+            Dict[date, StrategyState]: Dictionary mapping dates to their computed states
+        """
+        return {current_date: self.compute_state(current_date) for current_date in schedule}
+
+    def compute_columns(self, schedule: Schedule) -> Any:
+        """
+        Compute the states for every date of a schedule, in a columnar result type.
+
+        Strategies with a columnar result type override it.
+
+        Args:
+            schedule: The dates for which to compute the states
+
+        Returns:
+            Any: Strategy-specific columns holding the states of the schedule dates
+
+        Raises:
+            NotImplementedError: If the strategy has no columnar result type
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no columnar result type")
@@ -0,0 +1,74 @@
+"""
+Price corrections applied one update_price call at a time, the same calls inside batch_updates(), and one
+update_prices call, on a synthetic price history with a subscribed strategy. Checks that all three end with
+the same prices.
+
+    python benchmarks/bench_bulk_update.py --years 20 --assets 500 --updates 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--updates', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5, help='Best of this many runs (the updates are idempotent)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        n_dates = write_prices_csv(filename, args.years, args.assets)
+        mds = {mode: MarketData(filename, cache=False) for mode in ('per call', 'batched', 'bulk')}
+    dates = mds['bulk'].dates
+    rng = np.random.default_rng(0)
+    update_dates = [dates[i] for i in rng.integers(0, len(dates), args.updates)]
+    update_tickers = [tickers(args.assets)[j] for j in rng.integers(0, args.assets, args.updates)]
+    update_prices = rng.uniform(50, 150, args.updates).tolist()
+    print(f'{n_dates:,} dates x {args.assets} assets, {args.updates:,} updates')
+
+    strategies = []
+    for md in mds.values():
+        calendar = md.get_calendar()
+        strategy = EqualWeightStrategy(md=md, basket=tickers(args.assets)[:50], seed_date=dates[0],
+                                       calendar=calendar, initial_index_level=100)
+        strategy.compute_state(dates[-2])
+        strategies.append(strategy)
+
+    def per_call(md):
+        for when, ticker, price in zip(update_dates, update_tickers, update_prices):
+            md.update_price(when, ticker, price)
+
+    def batched(md):
+        with md.batch_updates():
+            per_call(md)
+
+    def bulk(md):
+        md.update_prices(update_dates, update_tickers, update_prices)
+
+    seconds = {}
+    for mode, apply in (('per call', per_call), ('batched', batched), ('bulk', bulk)):
+        runs = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            apply(mds[mode])
+            runs.append(time.perf_counter() - start)
+        seconds[mode] = min(runs)
+        print(f'{mode + ":":10} {seconds[mode] * 1000:8.1f} ms, '
+              f'{args.updates / seconds[mode]:12,.0f} updates/s, {seconds["per call"] / seconds[mode]:6.1f}x')
+
+    same = len({md.content_hash() for md in mds.values()}) == 1
+    print(f'prices {"identical" if same else "differ"} across the three modes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Per-date EqualWeightStrategyState dicts (get_states(batch=True)) against the columnar EqualWeightStrategyStates
+(get_state_columns) over a synthetic price history: memory per date, and the time to build a DataFrame and to
+write a CSV from each.
+
+    python benchmarks/bench_columnar.py --years 20 --assets 500
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+from runner import get_state_columns, get_states
+
+
+def make_strategy(md: MarketData, n_assets: int) -> EqualWeightStrategy:
+    calendar = md.get_calendar()
+    return EqualWeightStrategy(
+        md=md,
+        basket=tickers(n_assets),
+        seed_date=next(iter(calendar)),
+        calendar=calendar,
+        initial_index_level=100,
+    )
+
+
+def traced(compute):
+    """The result of compute, the seconds it took and the bytes it kept allocated."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = compute()
+    seconds = time.perf_counter() - start
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, kept
+
+
+def timed(compute):
+    start = time.perf_counter()
+    result = compute()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--assets', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        n_dates = write_prices_csv(filename, args.years, args.assets)
+        md = MarketData(filename)
+        # The last calendar date has no month-end flag, so stop one date before it
+        to_date = md.get_calendar().prev(list(md.get_calendar())[-1])
+        print(f'{n_dates:,} dates x {args.assets} assets')
+
+        states, states_seconds, states_bytes = traced(
+            lambda: get_states(make_strategy(md, args.assets), None, to_date, batch=True))
+        columns, columns_seconds, columns_bytes = traced(
+            lambda: get_state_columns(make_strategy(md, args.assets), None, to_date))
+        print(f'per-date states: {states_seconds:7.3f} s, {states_bytes / len(states):9,.0f} bytes/date')
+        print(f'columns:         {columns_seconds:7.3f} s, {columns_bytes / len(columns):9,.0f} bytes/date '
+              f'({states_bytes / columns_bytes:.1f}x less memory)')
+
+        # What main.py did: one row dict per state
+        frame_rows, rows_seconds = timed(lambda: pd.DataFrame([
+            {'date': d, 'index_level': state.index_level, 'portfolio_return': state.portfolio_return,
+             **{f'return_{a}': r for a, r in state.returns.items()},
+             **{f'weight_{a}': w for a, w in state.weights.items()}}
+            for d, state in states.items()
+        ]))
+        frame, frame_seconds = timed(columns.to_frame)
+        print(f'DataFrame from states: {rows_seconds:8.4f} s, to_frame: {frame_seconds:8.4f} s '
+              f'({rows_seconds / frame_seconds:,.0f}x faster)')
+
+        rows_csv, columns_csv = os.path.join(tmp, 'rows.csv'), os.path.join(tmp, 'columns.csv')
+        _, rows_csv_seconds = timed(lambda: frame_rows.to_csv(rows_csv, index=False))
+        _, columns_csv_seconds = timed(lambda: columns.to_csv(columns_csv))
+        print(f'CSV from states frame: {rows_csv_seconds:8.3f} s, to_csv: {columns_csv_seconds:8.3f} s')
+
+    max_error = abs(frame['index_level'].to_numpy() - frame_rows['index_level'].to_numpy()).max()
+    print(f'max index level difference {max_error:.2e}')
+
+
+if __name__ == '__main__':
+    main()
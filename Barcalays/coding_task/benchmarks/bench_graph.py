@@ -0,0 +1,78 @@
+"""
+EqualWeightStrategy under frequent price corrections, each followed by a query of the latest state: the
+StateStore path (states invalidated from the corrected date and recomputed) against the node graph
+(graph=True, only the affected nodes recomputed). Checks that both end on the same state.
+
+    python benchmarks/bench_graph.py --years 5 --assets 100 --updates 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+
+
+def make_strategy(md: MarketData, n_assets: int, graph: bool) -> EqualWeightStrategy:
+    calendar = md.get_calendar()
+    return EqualWeightStrategy(
+        md=md,
+        basket=tickers(n_assets),
+        seed_date=next(iter(calendar)),
+        calendar=calendar,
+        initial_index_level=100,
+        graph=graph,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--assets', type=int, default=100)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--recent-days', type=int, default=0,
+                        help='Only correct prices in the last N dates (0 for anywhere in the history)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        n_dates = write_prices_csv(filename, args.years, args.assets)
+        mds = {graph: MarketData(filename, cache=False) for graph in (False, True)}
+    dates = mds[False].dates
+    # The last calendar date has no month-end flag, so query the one before it
+    target = dates[-2]
+    first = 1 if args.recent_days == 0 else max(1, len(dates) - 1 - args.recent_days)
+    rng = np.random.default_rng(0)
+    corrections = [(dates[i], tickers(args.assets)[j], factor) for i, j, factor in zip(
+        rng.integers(first, len(dates) - 1, args.updates), rng.integers(0, args.assets, args.updates),
+        rng.uniform(0.9, 1.1, args.updates))]
+    print(f'{n_dates:,} dates x {args.assets} assets, {args.updates} corrections')
+
+    results = {}
+    for graph, md in mds.items():
+        strategy = make_strategy(md, args.assets, graph)
+        start = time.perf_counter()
+        strategy.compute_state(target)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for when, ticker, factor in corrections:
+            md.update_price(when, ticker, md.get(when, ticker) * factor)
+            state = strategy.compute_state(target)
+        elapsed = time.perf_counter() - start
+        results[graph] = (state, elapsed)
+        name = 'node graph:' if graph else 'state store:'
+        extra = f', {strategy._graph.computations:,} node computations' if graph else ''
+        print(f'{name:13} cold {cold:7.3f} s, {elapsed / args.updates * 1000:8.2f} ms per correction{extra}')
+
+    (store_state, store_seconds), (graph_state, graph_seconds) = results[False], results[True]
+    print(f'node graph {store_seconds / graph_seconds:.1f}x faster, '
+          f'final states {"identical" if store_state == graph_state else "differ"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+MarketData startup over a synthetic price CSV: the previous read_csv/to_datetime/unstack loader, the typed
+parser without cache, a cold start writing the binary cache, a cached start, and a start after the CSV was
+touched (cache validated by content hash).
+
+    python benchmarks/bench_load.py --years 20 --assets 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from synthetic import write_prices_csv
+
+from marketdata import CACHE_SUFFIX, MarketData
+
+
+def previous_loader(filename: str) -> pd.DataFrame:
+    """The loader MarketData used before the typed parser and the cache."""
+    df = pd.read_csv(filename)
+    df['date'] = pd.to_datetime(df['date'])
+    return df.set_index(['date', 'ticker'])['close'].unstack('ticker').sort_index()
+
+
+def timed(load):
+    start = time.perf_counter()
+    result = load()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--assets', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        n_dates = write_prices_csv(filename, args.years, args.assets)
+        print(f'{n_dates:,} dates x {args.assets} assets, {os.path.getsize(filename) / 2**20:.0f} MiB of CSV')
+
+        expected, previous = timed(lambda: previous_loader(filename))
+        _, parsed = timed(lambda: MarketData(filename, cache=False))
+        _, cold = timed(lambda: MarketData(filename))
+        cached_md, cached = timed(lambda: MarketData(filename))
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        _, touched = timed(lambda: MarketData(filename))
+        cache_size = os.path.getsize(filename + CACHE_SUFFIX)
+
+    exact = (cached_md.tickers == list(expected.columns)
+             and (cached_md.prices == expected.to_numpy()).all())
+    print(f'previous loader:   {previous:7.3f} s')
+    print(f'typed parser:      {parsed:7.3f} s ({previous / parsed:.1f}x faster)')
+    print(f'cold, write cache: {cold:7.3f} s')
+    print(f'cached:            {cached:7.3f} s ({previous / cached:.0f}x faster), '
+          f'{cache_size / 2**20:.0f} MiB of cache')
+    print(f'touched, rehashed: {touched:7.3f} s')
+    print(f'cached prices {"match" if exact else "differ from"} the previous loader')
+
+
+if __name__ == '__main__':
+    main()
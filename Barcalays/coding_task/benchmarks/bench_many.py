@@ -0,0 +1,63 @@
+"""
+Throughput of many EqualWeightStrategy variants (random baskets and seed dates over one MarketData): a serial
+get_states loop against get_states_many, which shares the price matrix with a process pool through shared memory.
+
+    python benchmarks/bench_many.py --years 10 --assets 500 --strategies 100 --basket-size 20 --processes 4
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+from runner import get_states, get_states_many
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--strategies', type=int, default=100)
+    parser.add_argument('--basket-size', type=int, default=20)
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='1 runs in-process')
+    parser.add_argument('--batch', action='store_true', help='Use the vectorized batch path')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        n_dates = write_prices_csv(filename, args.years, args.assets)
+        md = MarketData(filename)
+    dates = md.dates
+    to_date = dates[-2]
+    rng = random.Random(0)
+
+    def make_strategies():
+        rng.seed(0)
+        return [EqualWeightStrategy(md=md, basket=rng.sample(tickers(args.assets), args.basket_size),
+                                    seed_date=dates[rng.randrange(len(dates) // 2)], calendar=md.get_calendar(),
+                                    initial_index_level=100)
+                for _ in range(args.strategies)]
+
+    print(f'{n_dates:,} dates x {args.assets} assets, {args.strategies} strategies of {args.basket_size} assets, '
+          f'{os.cpu_count()} CPUs')
+    strategies = make_strategies()
+    start = time.perf_counter()
+    serial = [get_states(strategy, None, to_date, args.batch) for strategy in strategies]
+    serial_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = get_states_many(make_strategies(), None, to_date, processes=args.processes, batch=args.batch)
+    parallel_seconds = time.perf_counter() - start
+    assert parallel == serial
+
+    print(f'serial loop: {serial_seconds:8.2f} s, {args.strategies / serial_seconds:6.1f} strategies/s')
+    print(f'get_states_many ({args.processes} processes): {parallel_seconds:8.2f} s, '
+          f'{args.strategies / parallel_seconds:6.1f} strategies/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Cold against warm start of EqualWeightStrategy with a SQLiteStateStore: the cold run computes and persists the
+whole history, the warm run reopens the database with a new MarketData and only loads the states. A third run
+extends the history by --extend-days dates past the persisted ones.
+
+    python benchmarks/bench_persistent.py --years 20 --assets 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from persistentstore import SQLiteStateStore, input_hash
+from rule import EqualWeightStrategy, EqualWeightStrategyState
+from runner import get_states
+
+
+def run(filename: str, db: str, n_assets: int, to_index: int):
+    start = time.perf_counter()
+    md = MarketData(filename)
+    dates = md.dates
+    basket = tickers(n_assets)
+    with SQLiteStateStore[EqualWeightStrategyState](db, input_hash(md, basket, dates[0], 100)) as store:
+        loaded = store.loaded
+        strategy = EqualWeightStrategy(md=md, basket=basket, seed_date=dates[0], calendar=md.get_calendar(),
+                                       initial_index_level=100, _state_store=store)
+        states = get_states(strategy, None, dates[to_index])
+    return time.perf_counter() - start, loaded, states
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--assets', type=int, default=50)
+    parser.add_argument('--extend-days', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        n_dates = write_prices_csv(filename, args.years, args.assets)
+        db = os.path.join(tmp, 'states.sqlite')
+        print(f'{n_dates:,} dates x {args.assets} assets')
+
+        to_index = n_dates - 2 - args.extend_days
+        cold, _, cold_states = run(filename, db, args.assets, to_index)
+        warm, loaded, warm_states = run(filename, db, args.assets, to_index)
+        assert warm_states == cold_states
+        extended, _, _ = run(filename, db, args.assets, n_dates - 2)
+        print(f'cold start:  {cold:7.3f} s (computes and persists {len(cold_states):,} states, '
+              f'database {os.path.getsize(db) / 1e6:.1f} MB)')
+        print(f'warm start:  {warm:7.3f} s (loads {loaded:,} states)')
+        print(f'warm + {args.extend_days} new dates: {extended:7.3f} s')
+
+
+if __name__ == '__main__':
+    main()
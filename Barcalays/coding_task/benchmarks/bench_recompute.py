@@ -0,0 +1,77 @@
+"""
+get_states latency after an intraday price correction on a recent date: a cold recompute of the whole history,
+a lazy strategy (invalidated states recomputed inside get_states) and eager/background strategies (recomputed
+when the correction lands, so get_states only reads the cache).
+
+    python benchmarks/bench_recompute.py --years 10 --assets 50 --corrections 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+from runner import get_states
+
+
+def make_strategy(md: MarketData, n_assets: int, recompute: str) -> EqualWeightStrategy:
+    calendar = md.get_calendar()
+    return EqualWeightStrategy(md=md, basket=tickers(n_assets), seed_date=next(iter(calendar)), calendar=calendar,
+                               initial_index_level=100, recompute=recompute)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--assets', type=int, default=50)
+    parser.add_argument('--corrections', type=int, default=20)
+    parser.add_argument('--recent-days', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        write_prices_csv(filename, args.years, args.assets)
+        mds = {mode: MarketData(filename) for mode in ('cold', 'lazy', 'eager', 'background')}
+    dates = list(mds['cold'].get_calendar())
+    to_date = dates[-2]
+    print(f'{len(dates):,} dates x {args.assets} assets, {args.corrections} corrections '
+          f'on the last {args.recent_days} dates')
+
+    strategies = {mode: make_strategy(md, args.assets, 'lazy' if mode == 'cold' else mode)
+                  for mode, md in mds.items()}
+    for strategy in strategies.values():
+        get_states(strategy, None, to_date)
+
+    rng = random.Random(0)
+    latencies = {mode: 0.0 for mode in mds}
+    update_times = {mode: 0.0 for mode in mds}
+    for _ in range(args.corrections):
+        d = dates[-2 - rng.randrange(args.recent_days)]
+        ticker = rng.choice(tickers(args.assets))
+        factor = rng.uniform(0.99, 1.01)
+        results = {}
+        for mode, strategy in strategies.items():
+            md = mds[mode]
+            start = time.perf_counter()
+            md.update_price(d, ticker, md.get(d, ticker) * factor)
+            update_times[mode] += time.perf_counter() - start
+            strategy.wait_until_fresh()
+            if mode == 'cold':
+                strategy = strategies[mode] = make_strategy(md, args.assets, 'lazy')
+            start = time.perf_counter()
+            results[mode] = get_states(strategy, None, to_date)[to_date].index_level
+            latencies[mode] += time.perf_counter() - start
+        assert max(results.values()) - min(results.values()) < 1e-9
+
+    for mode in mds:
+        print(f'{mode:>10}: update_price {update_times[mode] / args.corrections * 1e3:8.2f} ms, '
+              f'get_states {latencies[mode] / args.corrections * 1e3:8.2f} ms per correction')
+    strategies['background'].close()
+
+
+if __name__ == '__main__':
+    main()
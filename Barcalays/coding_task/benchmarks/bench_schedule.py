@@ -0,0 +1,76 @@
+"""
+get_states run time against the number of dates, with Schedule navigation by binary search and position cache,
+and with the previous implementation that filtered the whole DatetimeIndex on every prev/next call. Time per
+date staying flat means get_states scales linearly.
+
+    python benchmarks/bench_schedule.py --years 4 8 16 32 64 --assets 3
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+from typing import Union
+
+import pandas as pd
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+from runner import get_states
+from schedule import Schedule, ScheduleError
+
+
+class MaskSchedule(Schedule):
+    """Schedule navigating with boolean masks over a DatetimeIndex, as before binary search."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self._index = pd.DatetimeIndex(self._dates)
+
+    def prev(self, target_date: Union[date, str]) -> date:
+        previous_dates = self._index[self._index < pd.Timestamp(target_date)]
+        if len(previous_dates) == 0:
+            raise ScheduleError(f"No date before {target_date} in schedule")
+        return previous_dates.max().date()
+
+    def next(self, target_date: Union[date, str]) -> date:
+        following_dates = self._index[self._index > pd.Timestamp(target_date)]
+        if len(following_dates) == 0:
+            raise ScheduleError(f"No date after {target_date} in schedule")
+        return following_dates.min().date()
+
+    def is_last_day_of_month(self, target_date: date) -> bool:
+        return target_date.month != self.next(target_date).month
+
+
+def run(md: MarketData, calendar: Schedule, n_assets: int) -> float:
+    dates = list(calendar)
+    strategy = EqualWeightStrategy(md=md, basket=tickers(n_assets), seed_date=dates[0], calendar=calendar,
+                                   initial_index_level=100)
+    start = time.perf_counter()
+    get_states(strategy, None, dates[-2])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', default=[4, 8, 16, 32, 64])
+    parser.add_argument('--assets', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"dates":>8} {"binary search":>22} {"mask":>22}')
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'prices.csv')
+            n_dates = write_prices_csv(filename, years, args.assets)
+            md = MarketData(filename)
+        calendar = md.get_calendar()
+        fast = run(md, calendar, args.assets)
+        slow = run(md, MaskSchedule(list(calendar)), args.assets)
+        print(f'{n_dates:8,} {fast:8.3f} s {fast / n_dates * 1e6:7.1f} us/date '
+              f'{slow:8.3f} s {slow / n_dates * 1e6:7.1f} us/date')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Mixed read/write load on one MarketData: reader threads each pin a snapshot and compute an equal weight index
+over it (get_state_columns), while a feed thread publishes update_price corrections. Reports reader and writer
+throughput, against readers alone and the writer alone, and checks a sample of reads against a serial replay.
+Also times the first read of the whole price matrix after a write (what compute_columns and content_hash pay
+after every correction): assembled from the last matrix and the changed blocks, against restacking every row.
+
+    python benchmarks/bench_snapshot.py --years 5 --assets 100 --readers 4 --seconds 3
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from synthetic import tickers, write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+from runner import get_state_columns
+
+
+def index_levels(md: MarketData, basket, to_date) -> np.ndarray:
+    calendar = md.get_calendar()
+    strategy = EqualWeightStrategy(md=md, basket=basket, seed_date=md.dates[0], calendar=calendar,
+                                   initial_index_level=100)
+    return get_state_columns(strategy, None, to_date).index_levels
+
+
+def matrix_after_write(md: MarketData, corrections, n: int = 50):
+    """Mean seconds of the first md.prices after a write, and of restacking every row as before."""
+    assembled, restacked = 0.0, 0.0
+    for when, ticker, price in corrections[:n]:
+        md.update_price(when, ticker, price)
+        snapshot = md._snapshot
+        start = time.perf_counter()
+        np.stack([snapshot.row(i) for i in range(len(md.dates))])
+        restacked += time.perf_counter() - start
+        start = time.perf_counter()
+        md.prices
+        assembled += time.perf_counter() - start
+    return assembled / n, restacked / n
+
+
+def run(md: MarketData, basket, to_date, readers: int, seconds: float, corrections):
+    """Run the readers and the writer for a number of seconds; returns the reads, the writes done and elapsed."""
+    stop = threading.Event()
+    reads = []
+    writes = [0]
+
+    def read():
+        while not stop.is_set():
+            snapshot = md.snapshot()
+            reads.append((snapshot.revision, index_levels(snapshot, basket, to_date)[-1]))
+
+    def write():
+        for when, ticker, price in corrections:
+            if stop.is_set():
+                break
+            md.update_price(when, ticker, price)
+            writes[0] += 1
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    if corrections:
+        threads.append(threading.Thread(target=write))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return reads, writes[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--assets', type=int, default=100)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--check', type=int, default=20, help='Number of reads checked against a serial replay')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        n_dates = write_prices_csv(filename, args.years, args.assets)
+        source = MarketData(filename, cache=False)
+    basket = tickers(args.assets)
+    dates = source.dates
+    to_date = dates[-2]
+    rng = np.random.default_rng(0)
+    n_corrections = 500000
+    corrections = [(dates[i], basket[j], source.get(dates[i], basket[j]) * factor) for i, j, factor in zip(
+        rng.integers(1, len(dates) - 1, n_corrections).tolist(), rng.integers(0, args.assets, n_corrections).tolist(),
+        rng.uniform(0.9, 1.1, n_corrections).tolist())]
+    print(f'{n_dates:,} dates x {args.assets} assets, {args.readers} readers, {args.seconds:g} s per run')
+
+    assembled, restacked = matrix_after_write(MarketData.from_arrays(dates, basket, source.prices), corrections)
+    print(f'matrix after a write: {assembled * 1000:7.3f} ms, restacking every row {restacked * 1000:7.3f} ms '
+          f'({restacked / assembled:.1f}x)')
+    reads, _, elapsed = run(source.snapshot(), basket, to_date, args.readers, args.seconds, [])
+    print(f'readers alone:  {len(reads) / elapsed:10,.1f} reads/s')
+    _, writes, elapsed = run(MarketData.from_arrays(dates, basket, source.prices), basket, to_date, 0,
+                             args.seconds, corrections)
+    print(f'writer alone:   {writes / elapsed:10,.0f} writes/s')
+
+    md = MarketData.from_arrays(dates, basket, source.prices)
+    reads, writes, elapsed = run(md, basket, to_date, args.readers, args.seconds, corrections)
+    print(f'mixed:          {len(reads) / elapsed:10,.1f} reads/s, {writes / elapsed:10,.0f} writes/s, '
+          f'{len({revision for revision, _ in reads})} distinct revisions read')
+
+    # Replay the corrections serially and compare the reads of a sample of revisions
+    sample = sorted(rng.choice(len(reads), size=min(args.check, len(reads)), replace=False).tolist(),
+                    key=lambda k: reads[k][0])
+    replay = MarketData.from_arrays(dates, basket, source.prices)
+    applied, mismatches = 0, 0
+    for k in sample:
+        revision, level = reads[k]
+        if revision > applied:
+            replay.update_prices(*zip(*corrections[applied:revision]))
+            applied = revision
+        mismatches += index_levels(replay, basket, to_date)[-1] != level
+    print(f'{len(sample)} sampled reads checked against a serial replay, {mismatches} mismatches')
+
+
+if __name__ == '__main__':
+    main()
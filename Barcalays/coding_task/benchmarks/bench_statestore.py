@@ -0,0 +1,122 @@
+"""
+Cost of 10k price corrections against a 10-year StateStore cache.
+
+First the invalidation alone: each correction invalidates one of the last --recent-days dates of a full cache,
+through the version check of get_state, with the sorted-list StateStore (binary search and truncation) and with
+the previous dict-based store that scanned every cached date. The cache is refilled between corrections,
+outside the timing.
+
+Then end to end with EqualWeightStrategy: every correction followed by a recompute of the latest date, against
+all corrections applied in one MarketData.batch_updates() block and a single recompute.
+
+    python benchmarks/bench_statestore.py --years 10 --corrections 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date
+from typing import Dict, Optional
+
+from synthetic import write_prices_csv
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+from statestore import StateStore
+
+
+class DictStateStore:
+    """The previous StateStore: a dict of states, invalidated by scanning all cached dates."""
+
+    def __init__(self):
+        self._cache: Dict[date, object] = {}
+        self._cached_versions: Dict[date, int] = {}
+
+    def get_state(self, target_date: date, version: int) -> Optional[object]:
+        if target_date not in self._cache:
+            return None
+        if self._cached_versions.get(target_date, 1) == version:
+            return self._cache.get(target_date)
+        for date_to_remove in [d for d in self._cache.keys() if d >= target_date]:
+            del self._cache[date_to_remove]
+            self._cached_versions.pop(date_to_remove, None)
+        return None
+
+    def set_state(self, target_date: date, state: object, version: int) -> None:
+        self._cache[target_date] = state
+        if version > 1:
+            self._cached_versions[target_date] = version
+
+
+def time_invalidations(store, dates, corrections, recent_days, seed=0) -> float:
+    rng = random.Random(seed)
+    versions = dict.fromkeys(dates, 1)
+    for d in dates:
+        store.set_state(d, d, 1)
+    elapsed = 0.0
+    for _ in range(corrections):
+        i = len(dates) - 1 - rng.randrange(recent_days)
+        versions[dates[i]] += 1
+        start = time.perf_counter()
+        store.get_state(dates[i], versions[dates[i]])
+        elapsed += time.perf_counter() - start
+        for d in dates[i:]:
+            store.set_state(d, d, versions[d])
+    return elapsed
+
+
+def make_strategy(md: MarketData) -> EqualWeightStrategy:
+    calendar = md.get_calendar()
+    return EqualWeightStrategy(md=md, basket=md.tickers, seed_date=next(iter(calendar)), calendar=calendar,
+                               initial_index_level=100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--assets', type=int, default=3)
+    parser.add_argument('--corrections', type=int, default=10000)
+    parser.add_argument('--recent-days', type=int, default=20, help='Corrections land on the latest dates')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'prices.csv')
+        write_prices_csv(filename, args.years, args.assets)
+        md = MarketData(filename)
+        batched_md = MarketData(filename)
+    dates = list(md.get_calendar())[:-1]
+    print(f'{len(dates):,} cached dates, {args.corrections:,} corrections on the last {args.recent_days} dates')
+
+    for name, store in (('dict scan', DictStateStore()), ('sorted list', StateStore())):
+        elapsed = time_invalidations(store, dates, args.corrections, args.recent_days)
+        print(f'invalidation, {name:>11}: {elapsed * 1e3:8.1f} ms, {elapsed / args.corrections * 1e6:6.2f} us each')
+
+    rng = random.Random(1)
+    corrections = [(dates[len(dates) - 1 - rng.randrange(args.recent_days)], rng.choice(md.tickers),
+                    rng.uniform(0.99, 1.01)) for _ in range(args.corrections)]
+
+    strategy = make_strategy(md)
+    strategy.compute_state(dates[-1])
+    start = time.perf_counter()
+    for d, ticker, factor in corrections:
+        md.update_price(d, ticker, md.get(d, ticker) * factor)
+        strategy.compute_state(dates[-1])
+    per_call = time.perf_counter() - start
+
+    strategy = make_strategy(batched_md)
+    strategy.compute_state(dates[-1])
+    start = time.perf_counter()
+    with batched_md.batch_updates():
+        for d, ticker, factor in corrections:
+            batched_md.update_price(d, ticker, batched_md.get(d, ticker) * factor)
+    batched_state = strategy.compute_state(dates[-1])
+    batched = time.perf_counter() - start
+
+    assert abs(batched_state.index_level - make_strategy(md).compute_state(dates[-1]).index_level) < 1e-9
+    print(f'end to end, recompute per correction: {per_call:8.3f} s')
+    print(f'end to end, one batch:                {batched:8.3f} s ({per_call / batched:.0f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
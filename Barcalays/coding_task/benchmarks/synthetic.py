@@ -0,0 +1,43 @@
+import os
+import sys
+from datetime import date
+from typing import List
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import numpy as np
+import pandas as pd
+
+
+def tickers(n_assets: int) -> List[str]:
+    """Synthetic ticker names, e.g. ['A000', 'A001', ...]."""
+    return [f"A{i:03d}" for i in range(n_assets)]
+
+
+def write_prices_csv(filename: str, years: int, n_assets: int, start: date = date(2000, 1, 3), seed: int = 0) -> int:
+    """
+    Write a date,ticker,close CSV of geometric random walks on business days.
+
+    Args:
+        filename: Path of the CSV to write
+        years: Length of the history in years
+        n_assets: Number of tickers
+        start: First date of the history
+        seed: Seed of the random walks
+
+    Returns:
+        int: Number of dates written
+    """
+    dates = pd.bdate_range(start, periods=years * 261)
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(0.0002, 0.01, size=(len(dates), n_assets))
+    prices = 100 * np.exp(np.cumsum(log_returns, axis=0))
+    df = pd.DataFrame({
+        'date': np.repeat(dates.strftime('%Y-%m-%d'), n_assets),
+        'ticker': np.tile(tickers(n_assets), len(dates)),
+        'close': prices.ravel(),
+    })
+    df.to_csv(filename, index=False)
+    return len(dates)
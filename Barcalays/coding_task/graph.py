@@ -0,0 +1,215 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from marketdata import MarketData
+
+NodeKey = Tuple[str, date]
+
+PRICES = 'prices'
+
+
+@dataclass(frozen=True)
+class NodeSpec:
+    """
+    Declaration of a per-date node of a strategy graph.
+
+    Attributes:
+        name: Name of the node, unique in its graph and different from PRICES
+        deps: Returns the keys of the nodes the value at a date depends on, e.g. the node itself at the
+            previous date, or (PRICES, date) for the prices of the graph's tickers on that date
+        compute: Computes the value at a date as compute(date, *dependency_values), in deps order
+    """
+    name: str
+    deps: Callable[[date], Sequence[NodeKey]]
+    compute: Callable[..., Any]
+
+
+class StrategyGraph:
+    """
+    Memoized per-date nodes of a strategy, evaluated on demand.
+
+    A node is identified by its name and date. Its value is computed once from
+    the values of its dependencies and kept. The PRICES nodes are the leaves:
+    the prices of the graph's tickers on a date, read from MarketData with the
+    version of that date.
+
+    After a price correction, invalidate_from marks the PRICES nodes whose
+    version changed, and every node depending on them transitively, as dirty.
+    Evaluation only visits missing and dirty nodes, in dependency order, and
+    recomputes a dirty node only if one of its dependencies actually changed
+    value since it was last verified, so a change stops propagating as soon as
+    it no longer affects a value.
+
+    Attributes:
+        md: MarketData providing the prices
+        tickers: Tickers of the PRICES nodes
+        computations: Number of node values computed so far
+    """
+
+    def __init__(self, md: MarketData, tickers: Sequence[str], nodes: Sequence[NodeSpec]):
+        """
+        Create an empty graph.
+
+        Args:
+            md: MarketData providing the prices
+            tickers: Tickers of the PRICES nodes
+            nodes: The node declarations
+
+        Raises:
+            ValueError: If node names are not unique or one is PRICES
+        """
+        self.md = md
+        self.tickers = list(tickers)
+        self.computations = 0
+        self._specs: Dict[str, NodeSpec] = {spec.name: spec for spec in nodes}
+        if len(self._specs) != len(nodes) or PRICES in self._specs:
+            raise ValueError(f"Node names must be unique and not {PRICES!r}")
+
+        self._values: Dict[NodeKey, Any] = {}
+        self._deps: Dict[NodeKey, Sequence[NodeKey]] = {}
+        self._dependents: Dict[NodeKey, List[NodeKey]] = {}
+        self._price_versions: Dict[NodeKey, int] = {}
+        self._dirty: Set[NodeKey] = set()
+        # A node is recomputed when one of its dependencies changed after the node was last verified
+        self._revision = 0
+        self._changed_at: Dict[NodeKey, int] = {}
+        self._verified_at: Dict[NodeKey, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Return the number of memoized nodes."""
+        return len(self._values)
+
+    def is_dirty(self, key: NodeKey) -> bool:
+        """Return true if the node is memoized but may be stale."""
+        return key in self._dirty
+
+    def evaluate(self, keys: Sequence[NodeKey]) -> List[Any]:
+        """
+        Get the values of nodes, computing the missing and dirty nodes they depend on.
+
+        Args:
+            keys: The (name, date) keys of the nodes
+
+        Returns:
+            List[Any]: The values of the nodes, in order
+        """
+        with self._lock:
+            for key in self._stale_nodes(keys):
+                self._refresh(key)
+            return [self._values[key] for key in keys]
+
+    def invalidate_from(self, changed_date: date) -> None:
+        """
+        Mark the nodes depending on prices corrected on or after changed_date as dirty.
+
+        Only the PRICES nodes whose MarketData version changed are marked, with
+        their transitive dependents; they are recomputed by the next evaluate.
+
+        Args:
+            changed_date: The earliest corrected date
+        """
+        with self._lock:
+            self._revision += 1
+            pending = [key for key, version in self._price_versions.items()
+                       if key[1] >= changed_date and self.md.get_version(key[1]) != version]
+            while pending:
+                key = pending.pop()
+                if key not in self._dirty:
+                    self._dirty.add(key)
+                    pending.extend(self._dependents.get(key, ()))
+
+    def _node_deps(self, key: NodeKey) -> Sequence[NodeKey]:
+        deps = self._deps.get(key)
+        if deps is None:
+            name, node_date = key
+            deps = () if name == PRICES else tuple(self._specs[name].deps(node_date))
+        return deps
+
+    def _stale_nodes(self, keys: Sequence[NodeKey]) -> List[NodeKey]:
+        """The missing and dirty nodes the keys depend on, dependencies first."""
+        # Iterative depth-first search, as dependency chains run through the whole history
+        order: List[NodeKey] = []
+        visited: Set[NodeKey] = set()
+        stack: List[Tuple[NodeKey, bool]] = [(key, False) for key in reversed(keys)]
+        while stack:
+            key, expanded = stack.pop()
+            if expanded:
+                order.append(key)
+                continue
+            if key in visited:
+                continue
+            visited.add(key)
+            # A clean node only depends on clean nodes, since invalidation marks every dependent
+            if key in self._values and key not in self._dirty:
+                continue
+            stack.append((key, True))
+            stack.extend((dep, False) for dep in self._node_deps(key) if dep not in visited)
+        return order
+
+    def _refresh(self, key: NodeKey) -> None:
+        """Compute a missing node, or verify a dirty one, once its dependencies are up to date."""
+        deps = self._node_deps(key)
+        if key in self._values:
+            if key[0] == PRICES:
+                stale = self.md.get_version(key[1]) != self._price_versions[key]
+            else:
+                verified_at = self._verified_at[key]
+                stale = any(self._changed_at[dep] > verified_at for dep in deps)
+            self._dirty.discard(key)
+            self._verified_at[key] = self._revision
+            if not stale:
+                return
+            value = self._compute(key, deps)
+            if not _same_value(value, self._values[key]):
+                self._values[key] = value
+                self._changed_at[key] = self._revision
+            return
+
+        value = self._compute(key, deps)
+        self._values[key] = value
+        self._deps[key] = deps
+        for dep in deps:
+            self._dependents.setdefault(dep, []).append(key)
+        self._changed_at[key] = self._verified_at[key] = self._revision
+
+    def _compute(self, key: NodeKey, deps: Sequence[NodeKey]) -> Any:
+        self.computations += 1
+        name, node_date = key
+        if name == PRICES:
+            self._price_versions[key] = self.md.get_version(node_date)
+            return self.md.get_many(node_date, self.tickers)
+        return self._specs[name].compute(node_date, *[self._values[dep] for dep in deps])
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
+
+
+def evaluate_many(requests: Sequence[Tuple[StrategyGraph, Sequence[NodeKey]]],
+                  max_workers: Optional[int] = None) -> List[List[Any]]:
+    """
+    Evaluate nodes of independent graphs in a thread pool.
+
+    Each graph is evaluated under its own lock, so graphs of different
+    strategies proceed concurrently; the gain is bounded by the time the node
+    computations spend outside the GIL, e.g. in numpy on large baskets.
+
+    Args:
+        requests: Pairs of a graph and the keys of the nodes to evaluate in it
+        max_workers: Number of threads (defaults to the ThreadPoolExecutor default); 1 evaluates in order here
+
+    Returns:
+        List[List[Any]]: The values of the nodes of each request, in order
+    """
+    if max_workers == 1 or len(requests) <= 1:
+        return [graph.evaluate(keys) for graph, keys in requests]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda request: request[0].evaluate(request[1]), requests))
@@ -1,22 +1,34 @@
+import argparse
 from datetime import date
 
-import pandas as pd
 from marketdata import MarketData
-from rule import EqualWeightStrategy
+from persistentstore import SQLiteStateStore, input_hash
+from rule import EqualWeightStrategy, EqualWeightStrategyState, EqualWeightStrategyStates
 from runner import get_states
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the equal weight index on sample_prices.csv")
+    parser.add_argument('--state-store', help="SQLite file persisting the computed states between runs")
+    args = parser.parse_args()
+
     md = MarketData('sample_prices.csv')
+    basket = ["SPX", "SX5E", "HSI"]
+    seed_date = date.fromisoformat("2023-01-02")
+    initial_index_level = 100
+    options = {}
+    if args.state_store:
+        options['_state_store'] = SQLiteStateStore[EqualWeightStrategyState](
+            args.state_store, input_hash(md, basket, seed_date, initial_index_level))
+
     strategy = EqualWeightStrategy(
         md=md,
-        basket=["SPX", "SX5E", "HSI"],
-        seed_date=date.fromisoformat("2023-01-02"),
+        basket=basket,
+        seed_date=seed_date,
         calendar=md.get_calendar(),
-        initial_index_level=100,
+        initial_index_level=initial_index_level,
+        **options,
     )
     states = get_states(strategy, None, date.fromisoformat("2023-06-29"))
-    df = pd.DataFrame([
-        {'date': date_key, 'index_level': state.index_level}
-        for date_key, state in states.items()
-    ])
-    df.to_csv('sample_output.csv', index=False)
\ No newline at end of file
+    if args.state_store:
+        options['_state_store'].close()
+    EqualWeightStrategyStates.from_states(basket, states).to_csv('sample_output.csv', columns=['index_level'])
@@ -1,49 +1,444 @@
-from typing import cast, Dict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from itertools import repeat
+from types import MethodType
+import hashlib
+import math
+import os
+import tempfile
+import threading
+import weakref
+import numpy as np
 import pandas as pd
 from datetime import date
 
 from schedule import Schedule
 
+_date_type = date
+
+CACHE_SUFFIX = '.cache.npz'
+_CACHE_FORMAT = 1
+
 class MarketDataError(Exception):
     """Custom exception for MarketData errors"""
     pass
 
+@dataclass(frozen=True, eq=False)
+class Subscription:
+    """
+    Interest of a MarketData subscriber in the (date, ticker) cells of some tickers from a date onward.
+
+    Attributes:
+        callback: Returns the subscriber's callback, or None once it has been garbage collected
+        tickers: Tickers of interest (None for all)
+        from_date: Earliest date of interest (None for all)
+    """
+    callback: Callable[[], Optional[Callable[[date], None]]]
+    tickers: Optional[FrozenSet[str]]
+    from_date: Optional[date]
+
+    def earliest(self, changes: Dict[str, List[date]]) -> Optional[date]:
+        """The earliest date of interest among changed dates by ticker, None if there is none."""
+        tickers = changes.keys() if self.tickers is None else self.tickers & changes.keys()
+        return min((d for ticker in tickers for d in changes[ticker]
+                    if self.from_date is None or d >= self.from_date), default=None)
+
+class PriceSnapshot:
+    """
+    An immutable version of the price matrix and of the date versions.
+
+    The rows of the matrix are held read-only in blocks of ROW_BLOCK rows, so
+    that a write copies the rows it changes and the block tuples holding them,
+    and shares everything else with the previous snapshot. The full matrix is
+    assembled on first use and kept: from the matrix of the last assembled
+    ancestor (the base), copied at memory speed, with only the blocks that
+    changed since then restacked. Reads of many cells use the base the same
+    way, without assembling the matrix.
+
+    Attributes:
+        revision: Number of writes published before this snapshot
+        versions: Read-only version of each date (1 until its first update)
+    """
+    ROW_BLOCK = 64
+    __slots__ = ('revision', 'versions', '_blocks', '_matrix', '_base')
+
+    def __init__(self, revision: int, blocks: Tuple[Tuple[np.ndarray, ...], ...], versions: np.ndarray,
+                 matrix: Optional[np.ndarray] = None,
+                 base: Optional[Tuple[np.ndarray, Tuple[Tuple[np.ndarray, ...], ...]]] = None):
+        self.revision = revision
+        self.versions = versions
+        self._blocks = blocks
+        self._matrix = matrix
+        # The matrix of the last assembled ancestor and its blocks, until this snapshot's matrix is assembled
+        self._base = base
+
+    @classmethod
+    def from_matrix(cls, prices: np.ndarray) -> 'PriceSnapshot':
+        """The first snapshot over a date x ticker matrix, which must not be written afterwards."""
+        matrix = prices.view()
+        matrix.flags.writeable = False
+        versions = np.ones(len(matrix), dtype=np.int64)
+        versions.flags.writeable = False
+        blocks = tuple(tuple(matrix[start:start + cls.ROW_BLOCK]) for start in range(0, len(matrix), cls.ROW_BLOCK))
+        return cls(0, blocks, versions, matrix)
+
+    def row(self, i: int) -> np.ndarray:
+        """Read-only prices of the i-th date."""
+        return self._blocks[i // self.ROW_BLOCK][i % self.ROW_BLOCK]
+
+    def values(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Prices of the (rows, cols) cells."""
+        # The base is only dropped once the matrix is set, so read it first
+        base, matrix = self._base, self._matrix
+        if matrix is not None:
+            return matrix[rows, cols]
+        base_matrix, base_blocks = base
+        values = base_matrix[rows, cols]
+        changed = np.array([block is not base_block for block, base_block in zip(self._blocks, base_blocks)])
+        # Only the cells in blocks written since the base are read row by row
+        for k in np.flatnonzero(changed[rows // self.ROW_BLOCK]).tolist():
+            values[k] = self.row(rows[k])[cols[k]]
+        return values
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Read-only date x ticker price matrix."""
+        base, matrix = self._base, self._matrix
+        if matrix is None:
+            base_matrix, base_blocks = base
+            matrix = base_matrix.copy()
+            for b, (block, base_block) in enumerate(zip(self._blocks, base_blocks)):
+                if block is not base_block:
+                    matrix[b * self.ROW_BLOCK:b * self.ROW_BLOCK + len(block)] = np.stack(block)
+            matrix.flags.writeable = False
+            self._matrix = matrix
+            # No longer needed: the base is freed with the last snapshot sharing it
+            self._base = None
+        return matrix
+
+    def with_cell(self, i: int, j: int, price: float) -> 'PriceSnapshot':
+        """The next snapshot, with price written to the (i, j) cell and the version of its date bumped."""
+        row = self.row(i).copy()
+        row[j] = price
+        row.flags.writeable = False
+        return self._with_rows({i: row}, i)
+
+    def with_cells(self, rows: np.ndarray, cols: np.ndarray, prices: np.ndarray) -> 'PriceSnapshot':
+        """
+        The next snapshot, with prices written to the (rows, cols) cells and their dates' versions bumped once.
+
+        Args:
+            rows: Row of each cell
+            cols: Column of each cell, no cell repeated
+            prices: New price of each cell
+        """
+        changed = np.unique(rows)
+        copied = np.stack([self.row(i) for i in changed.tolist()])
+        copied[np.searchsorted(changed, rows), cols] = prices
+        copied.flags.writeable = False
+        return self._with_rows(dict(zip(changed.tolist(), copied)), changed)
+
+    def _with_rows(self, new_rows: Dict[int, np.ndarray], changed: Any) -> 'PriceSnapshot':
+        by_block: Dict[int, List[Tuple[int, np.ndarray]]] = {}
+        for i, row in new_rows.items():
+            by_block.setdefault(i // self.ROW_BLOCK, []).append((i % self.ROW_BLOCK, row))
+        blocks = list(self._blocks)
+        for b, block_rows in by_block.items():
+            block = list(blocks[b])
+            for k, row in block_rows:
+                block[k] = row
+            blocks[b] = tuple(block)
+        versions = self.versions.copy()
+        versions[changed] += 1
+        versions.flags.writeable = False
+        base, matrix = self._base, self._matrix
+        return PriceSnapshot(self.revision + 1, tuple(blocks), versions,
+                             base=base if matrix is None else (matrix, self._blocks))
+
 class MarketData:
     """
     A class to load and query market data from a CSV file.
     Supports in-memory updates to individual prices to enable cache invalidation
     in dependent states.
+
+    Prices are held in a dense date x ticker float64 matrix, with dictionaries
+    mapping dates and tickers to their row and column, so that a lookup is two
+    dict lookups and an array index. Cells with no price are NaN.
+
+    Readers never lock: the prices and versions are published as an immutable
+    PriceSnapshot, every read uses the snapshot current when it starts, and
+    snapshot() pins one for a consistent view across many reads. Writers are
+    serialized by a lock; each update, or each batch_updates() block as a
+    whole, builds a new snapshot, copying only the rows it changes, and
+    publishes it with a single reference assignment.
+
+    Subscribers registered with subscribe are told the earliest changed date
+    among the (date, ticker) cells they depend on after every update, or once
+    for a whole batch of updates made inside batch_updates(), so that dependent
+    caches can invalidate or recompute eagerly.
     
     The CSV file should have columns: date, ticker, close
     """
     
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, cache: bool = True):
         """
         Initialize MarketData with a CSV file.
+
+        The parsed price matrix is cached in a binary file next to the CSV
+        (filename + CACHE_SUFFIX), keyed by the modification time, size and
+        SHA-256 of the CSV, and later instances load the cache instead of
+        parsing the CSV again while it is unchanged.
         
         Args:
             filename (str): Path to the CSV file containing market data
+            cache (bool): Read and write the binary cache of the price matrix
+        """
+        self._set_arrays(*self._load_arrays(filename, cache))
+        self._init_updates()
+
+    @classmethod
+    def from_arrays(cls, dates: Sequence[date], tickers: Sequence[str], prices: np.ndarray,
+                    copy: bool = True) -> 'MarketData':
         """
-        self._data = self._load_data(filename)
-        self._versions: Dict[date, int] = {}
+        Create MarketData from a date x ticker price matrix instead of a CSV file.
+
+        Args:
+            dates: Sorted unique dates, one per row of prices
+            tickers: Tickers, one per column of prices
+            prices: float64 matrix of closing prices (NaN where there is no price)
+            copy: Copy prices; with False the matrix is used as is, e.g. a view of shared memory
+
+        Returns:
+            MarketData: Market data over the given matrix
+
+        Raises:
+            MarketDataError: If the shapes do not match
+        """
+        if prices.shape != (len(dates), len(tickers)):
+            raise MarketDataError(f"Price matrix of shape {prices.shape} for {len(dates)} dates and {len(tickers)} tickers")
+        md = cls.__new__(cls)
+        md._set_arrays(list(dates), list(tickers), np.array(prices, dtype=np.float64, order='C') if copy else prices)
+        md._init_updates()
+        return md
+
+    def _init_updates(self) -> None:
+        self._read_only = False
+        self._write_lock = threading.RLock()
+        self._subscriptions: List[Subscription] = []
+        self._batch_depth = 0
+        self._batch_changes: Dict[str, List[date]] = {}
+        # The snapshot being built by the open batch, and the thread building it
+        self._pending: Optional[PriceSnapshot] = None
+        self._batch_owner: Optional[int] = None
     
-    def _load_data(self, filename: str) -> pd.DataFrame:
-        """Load from a CSV file."""
+    @classmethod
+    def _load_arrays(cls, filename: str, cache: bool) -> Tuple[List[date], List[str], np.ndarray]:
+        """Load the dates, tickers and price matrix of a CSV file, from its cache when it is valid."""
         try:
-            df = pd.read_csv(filename)
-            
-            # Convert date column to datetime
-            df['date'] = pd.to_datetime(df['date'])
-            
-            # Set multi-index for fast lookups
-            df = df.set_index(['date', 'ticker'])
-            
-            return df
-            
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            raise MarketDataError(f"File not found: {filename}")
+        cache_path = filename + CACHE_SUFFIX
+        if cache:
+            cached = _read_cache(cache_path, filename, stat)
+            if cached is not None:
+                return cached
+
+        dates, tickers, prices = cls._parse_csv(filename)
+        if cache:
+            _write_cache(cache_path, dates, tickers, prices, stat, _file_sha256(filename))
+        return dates, tickers, prices
+
+    @staticmethod
+    def _parse_csv(filename: str) -> Tuple[List[date], List[str], np.ndarray]:
+        """
+        Parse a date,ticker,close CSV file into sorted dates, sorted tickers and the price matrix.
+
+        Dates and tickers are read as plain strings and factorized, so only the
+        distinct dates are parsed, with the fixed YYYY-MM-DD format, and the
+        prices are scattered into the matrix by their codes.
+        """
+        try:
+            df = pd.read_csv(filename, usecols=['date', 'ticker', 'close'],
+                             dtype={'date': object, 'ticker': object, 'close': np.float64})
         except FileNotFoundError:
             raise MarketDataError(f"File not found: {filename}")
         except Exception as e:
             raise MarketDataError(f"Error loading data from {filename}: {e}")
+
+        date_codes, date_strings = pd.factorize(df['date'].to_numpy(), sort=True)
+        ticker_codes, tickers = pd.factorize(df['ticker'].to_numpy(), sort=True)
+        if (date_codes < 0).any() or (ticker_codes < 0).any():
+            raise MarketDataError(f"Missing date or ticker in {filename}")
+        try:
+            if any(len(d) != 10 for d in date_strings):
+                raise ValueError("expected YYYY-MM-DD")
+            days = np.array(date_strings, dtype='datetime64[D]')
+        except ValueError as e:
+            raise MarketDataError(f"Error parsing dates in {filename}: {e}")
+
+        n_dates, n_tickers = len(date_strings), len(tickers)
+        cells = date_codes.astype(np.int64) * n_tickers + ticker_codes
+        if np.bincount(cells, minlength=n_dates * n_tickers).max(initial=0) > 1:
+            raise MarketDataError("Duplicate (date, ticker) rows in market data")
+        prices = np.full((n_dates, n_tickers), np.nan)
+        prices.ravel()[cells] = df['close'].to_numpy()
+        return days.astype(object).tolist(), list(tickers), prices
+
+    def _set_arrays(self, dates: List[date], tickers: List[str], prices: np.ndarray) -> None:
+        self._dates = dates
+        self._tickers = tickers
+        self._date_positions: Dict[date, int] = {d: i for i, d in enumerate(dates)}
+        self._ticker_positions: Dict[str, int] = {t: j for j, t in enumerate(tickers)}
+        self._snapshot = PriceSnapshot.from_matrix(prices)
+
+    def snapshot(self) -> 'MarketData':
+        """
+        Get a read-only MarketData pinned to the current prices and versions.
+
+        The snapshot shares the price rows with this MarketData and is not
+        affected by later updates, so a computation over it sees one consistent
+        version of the prices however many reads it makes, without locking.
+        It cannot be updated, and its subscribers are never notified.
+
+        Returns:
+            MarketData: The pinned snapshot
+        """
+        md = MarketData.__new__(MarketData)
+        md._dates = self._dates
+        md._tickers = self._tickers
+        md._date_positions = self._date_positions
+        md._ticker_positions = self._ticker_positions
+        md._snapshot = self._current()
+        md._init_updates()
+        md._read_only = True
+        return md
+
+    @property
+    def revision(self) -> int:
+        """Number of updates published so far; a snapshot keeps the revision it was taken at."""
+        return self._current().revision
+
+    @property
+    def dates(self) -> List[date]:
+        """Dates in row order of the price matrix."""
+        return list(self._dates)
+
+    def content_hash(self) -> str:
+        """
+        Get a hash of the dates, tickers and current prices.
+
+        Returns:
+            str: Hex SHA-256 digest, equal for equal market data
+        """
+        digest = hashlib.sha256()
+        digest.update(np.array([d.toordinal() for d in self._dates], dtype=np.int64).tobytes())
+        digest.update('\0'.join(self._tickers).encode())
+        digest.update(np.ascontiguousarray(self._current().prices).tobytes())
+        return digest.hexdigest()
+
+    @property
+    def tickers(self) -> List[str]:
+        """Tickers in column order of the price matrix."""
+        return list(self._tickers)
+
+    @property
+    def prices(self) -> np.ndarray:
+        """
+        Read-only date x ticker price matrix of the current snapshot (NaN where there is no price).
+
+        The first access after a write assembles the matrix of the new snapshot,
+        which costs a copy of the previous matrix plus restacking the changed
+        blocks of rows; later accesses return it as is.
+        """
+        return self._current().prices
+
+    def date_index(self, date: Any) -> int:
+        """
+        Get the row of a date in the price matrix.
+
+        Args:
+            date: Date to look up (date, datetime, Timestamp or ISO string)
+
+        Returns:
+            int: Row index of the date
+
+        Raises:
+            MarketDataError: If the date is not in the dataset
+        """
+        i = self._date_positions.get(date) if type(date) is _date_type else None
+        if i is None:
+            try:
+                i = self._date_positions.get(pd.Timestamp(date).date())
+            except (TypeError, ValueError):
+                i = None
+            if i is None:
+                raise MarketDataError(f"No data on {date}.")
+        return i
+
+    def date_indices(self, dates: Sequence[Any]) -> np.ndarray:
+        """
+        Get the rows of several dates in the price matrix.
+
+        Args:
+            dates: Dates to look up (dates, datetimes, Timestamps, datetime64 or ISO strings)
+
+        Returns:
+            np.ndarray: Row index of each date, in order
+
+        Raises:
+            MarketDataError: If a date is not in the dataset
+        """
+        rows = np.array(list(map(self._date_positions.get, dates, repeat(-1, len(dates)))), dtype=np.intp)
+        missing = np.flatnonzero(rows < 0)
+        if len(missing):
+            # Only dates that are not date objects need converting, e.g. strings or Timestamps
+            try:
+                keys = pd.DatetimeIndex([dates[k] for k in missing]).date
+            except (TypeError, ValueError) as e:
+                raise MarketDataError(f"Invalid dates: {e}")
+            rows[missing] = list(map(self._date_positions.get, keys, repeat(-1, len(keys))))
+            missing = np.flatnonzero(rows < 0)
+        if len(missing):
+            raise MarketDataError(f"No data on {dates[missing[0]]}.")
+        return rows
+
+    def ticker_indices(self, tickers: Sequence[str]) -> np.ndarray:
+        """
+        Get the columns of tickers in the price matrix.
+
+        Raises:
+            MarketDataError: If a ticker is not in the dataset
+        """
+        try:
+            return np.array([self._ticker_positions[ticker] for ticker in tickers], dtype=np.intp)
+        except KeyError as e:
+            raise MarketDataError(f"No data for '{e.args[0]}'.")
+
+    def get_many(self, date: date, tickers: Sequence[str]) -> np.ndarray:
+        """
+        Get the closing prices of several tickers on a date, in the order given.
+
+        Args:
+            date: Date to query
+            tickers: Ticker symbols
+
+        Returns:
+            np.ndarray: The closing prices
+
+        Raises:
+            MarketDataError: If the date or any of the date/ticker combinations is not found
+        """
+        try:
+            i = self.date_index(date)
+            prices = self._current().row(i)[self.ticker_indices(tickers)]
+        except MarketDataError:
+            raise MarketDataError(f"No data for {list(tickers)} on {date}.")
+        if np.isnan(prices).any():
+            missing = [ticker for ticker, price in zip(tickers, prices) if np.isnan(price)]
+            raise MarketDataError(f"No data for {missing} on {date}.")
+        return prices
     
     def get(self, date: date, ticker: str) -> float:
         """
@@ -59,10 +454,17 @@ class MarketData:
         Raises:
             MarketDataError: If the requested date/ticker combination is not found
         """
+        j = self._ticker_positions.get(ticker)
         try:
-            return cast(float, self._data.loc[(pd.to_datetime(date), ticker), 'close'])
-        except KeyError:
+            i = self.date_index(date)
+        except MarketDataError:
+            i = None
+        if i is None or j is None:
+            raise MarketDataError(f"No data for '{ticker}' on {date}.")
+        price = float(self._current().row(i)[j])
+        if price != price:
             raise MarketDataError(f"No data for '{ticker}' on {date}.")
+        return price
         
     def get_calendar(self) -> Schedule:
         """
@@ -71,7 +473,7 @@ class MarketData:
         Returns:
             Schedule: Sorted list of all unique dates in the dataset
         """
-        return Schedule(self._data.index.get_level_values('date'))
+        return Schedule(self._dates)
 
     def update_price(self, date: date, ticker: str, price: float) -> None:
         """
@@ -85,12 +487,173 @@ class MarketData:
         Raises:
             MarketDataError: If the date/ticker combination is not found
         """
+        self._check_writable()
+        j = self._ticker_positions.get(ticker)
         try:
-            self._data.loc[(pd.to_datetime(date), ticker), 'close'] = price
-            # Increment version for this dateDefault version is 1 if date not in dict
-            self._versions[date] = self._versions.get(date, 1) + 1
-        except KeyError:
-            raise MarketDataError(f"No data for '{ticker}' on {date}.")
+            i = self.date_index(date)
+        except MarketDataError:
+            i = None
+        with self.batch_updates():
+            snapshot = self._pending
+            if i is None or j is None or math.isnan(snapshot.row(i)[j]):
+                raise MarketDataError(f"No data for '{ticker}' on {date}.")
+            # The new prices and the incremented version of the date are published together with the batch
+            self._pending = snapshot.with_cell(i, j, price)
+            self._record_change(self._dates[i], ticker)
+
+    def update_prices(self, updates: Union[pd.DataFrame, Sequence[Any]], tickers: Optional[Sequence[str]] = None,
+                      prices: Optional[Sequence[float]] = None) -> None:
+        """
+        Update many prices in memory with one vectorized write.
+
+        The updates are given either as a DataFrame with date, ticker and close
+        columns (as in the CSV file), or as parallel sequences of dates, tickers
+        and prices. All of them are checked before any price is written. Each
+        updated date has its version bumped once, and subscribers are notified
+        once with the earliest updated date among their cells, as for a block
+        of update_price calls inside batch_updates(). When a cell is updated
+        more than once, the last price wins.
+
+        Args:
+            updates: DataFrame of updates, or the dates of the updates
+            tickers: The tickers of the updates, when updates are dates
+            prices: The new closing prices, when updates are dates
+
+        Raises:
+            MarketDataError: If the sequences differ in length, or a date/ticker combination is not found
+        """
+        if isinstance(updates, pd.DataFrame):
+            if tickers is not None or prices is not None:
+                raise MarketDataError("Give either a DataFrame of updates or dates, tickers and prices")
+            dates, tickers, prices = updates['date'].to_numpy(), updates['ticker'].to_numpy(), updates['close']
+        else:
+            dates = updates
+        if tickers is None or prices is None:
+            raise MarketDataError("Updates need dates, tickers and prices")
+        prices = np.asarray(prices, dtype=np.float64)
+        if not len(dates) == len(tickers) == len(prices):
+            raise MarketDataError(f"{len(dates)} dates, {len(tickers)} tickers and {len(prices)} prices to update")
+        if not len(prices):
+            return
+
+        self._check_writable()
+        rows = self.date_indices(dates)
+        cols = self.ticker_indices(tickers)
+        # Keep the last update of each cell, so that the fancy-indexed write has no duplicates
+        cells = rows * len(self._tickers) + cols
+        _, last_from_end = np.unique(cells[::-1], return_index=True)
+        last = len(cells) - 1 - last_from_end
+
+        with self.batch_updates():
+            snapshot = self._pending
+            missing = np.flatnonzero(np.isnan(snapshot.values(rows, cols)))
+            if len(missing):
+                k = missing[0]
+                raise MarketDataError(f"No data for '{tickers[k]}' on {dates[k]}.")
+            self._pending = snapshot.with_cells(rows[last], cols[last], prices[last])
+
+            # Earliest updated row of each ticker, which is all a batch notification uses
+            earliest = np.full(len(self._tickers), len(self._dates))
+            np.minimum.at(earliest, cols, rows)
+            for j in np.flatnonzero(earliest < len(self._dates)).tolist():
+                self._record_change(self._dates[earliest[j]], self._tickers[j])
+
+    def subscribe(self, callback: Callable[[date], None], tickers: Optional[Iterable[str]] = None,
+                  from_date: Optional[date] = None) -> 'Subscription':
+        """
+        Register interest in the (date, ticker) cells of some tickers from a date onward.
+
+        After an update of a matching cell the callback is invoked with its date;
+        for updates made inside batch_updates() it is invoked once at the end of
+        the block, with the earliest matching date. Bound methods are held weakly,
+        so subscribing e.g. a strategy's method does not keep the strategy alive.
+
+        Args:
+            callback: Called with the earliest changed date among the matching cells
+            tickers: Tickers of interest (None for all)
+            from_date: Earliest date of interest (None for all)
+
+        Returns:
+            Subscription: Handle to pass to unsubscribe
+        """
+        if isinstance(callback, MethodType):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        subscription = Subscription(ref, None if tickers is None else frozenset(tickers), from_date)
+        with self._write_lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: 'Subscription') -> None:
+        """Remove a subscription; removing one twice is a no-op."""
+        with self._write_lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def add_listener(self, callback: Callable[[date], None]) -> None:
+        """
+        Register a callback invoked with the earliest changed date after any price update.
+
+        Args:
+            callback: Called with the earliest date whose prices changed
+        """
+        self.subscribe(callback)
+
+    @contextmanager
+    def batch_updates(self) -> Iterator[None]:
+        """
+        Apply the updates made inside the block atomically, then notify each
+        subscription once with the earliest of its cells updated inside it.
+
+        The updates build a pending snapshot that is published as a whole when
+        the outermost block ends, including the updates made before an
+        exception, so other threads never see part of a batch; reads on the
+        thread running the block see its updates. Blocks may be nested, and
+        other threads' updates wait for the block to end. Subscribers are
+        notified after the write lock is released, so that one recomputing on
+        notification does not hold up other writers.
+        """
+        changes = None
+        try:
+            with self._write_lock:
+                if self._batch_depth == 0:
+                    self._pending = self._snapshot
+                    self._batch_owner = threading.get_ident()
+                self._batch_depth += 1
+                try:
+                    yield
+                finally:
+                    self._batch_depth -= 1
+                    if self._batch_depth == 0:
+                        self._snapshot, self._pending, self._batch_owner = self._pending, None, None
+                        changes, self._batch_changes = self._batch_changes, {}
+        finally:
+            if changes:
+                self._notify(changes)
+
+    def _current(self) -> PriceSnapshot:
+        """The snapshot reads use: the published one, or the pending one on the thread running a batch."""
+        if self._batch_owner is not None and self._batch_owner == threading.get_ident():
+            return self._pending
+        return self._snapshot
+
+    def _record_change(self, changed_date: date, ticker: str) -> None:
+        self._batch_changes.setdefault(ticker, []).append(changed_date)
+
+    def _notify(self, changes: Dict[str, List[date]]) -> None:
+        for subscription, callback in self._live_subscriptions():
+            earliest = subscription.earliest(changes)
+            if earliest is not None:
+                callback(earliest)
+
+    def _live_subscriptions(self) -> List[Tuple['Subscription', Callable[[date], None]]]:
+        """The subscriptions whose callback is still alive, dropping the others."""
+        live = [(subscription, subscription.callback()) for subscription in self._subscriptions]
+        dead = {id(subscription) for subscription, callback in live if callback is None}
+        if dead:
+            with self._write_lock:
+                self._subscriptions = [s for s in self._subscriptions if id(s) not in dead]
+        return [(subscription, callback) for subscription, callback in live if callback is not None]
 
     def get_version(self, date: date) -> int:
         """
@@ -103,4 +666,72 @@ class MarketData:
         Returns:
             int: The version number for the date (default 1)
         """
-        return self._versions.get(date, 1)
+        i = self._date_positions.get(date) if type(date) is _date_type else None
+        if i is None:
+            try:
+                i = self.date_index(date)
+            except MarketDataError:
+                return 1
+        return int(self._current().versions[i])
+
+    def _check_writable(self) -> None:
+        if self._read_only:
+            raise MarketDataError("MarketData snapshot is read-only")
+
+
+def _file_sha256(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_cache(cache_path: str, filename: str,
+                stat: os.stat_result) -> Optional[Tuple[List[date], List[str], np.ndarray]]:
+    """
+    The arrays cached for the CSV file, None if there is no valid cache.
+
+    An unchanged modification time and size accept the cache at once; otherwise
+    the content hash decides, e.g. after the file was copied or touched, and a
+    matching cache is rewritten with the new modification time.
+    """
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if int(cached['format']) != _CACHE_FORMAT or int(cached['size']) != stat.st_size:
+                return None
+            arrays = (cached['dates'], cached['tickers'], cached['prices'])
+            same_mtime = int(cached['mtime_ns']) == stat.st_mtime_ns
+            sha256 = str(cached['sha256'])
+    except Exception:
+        # Missing, unreadable or from another version: parse the CSV again
+        return None
+
+    if not same_mtime and _file_sha256(filename) != sha256:
+        return None
+    ordinals, tickers, prices = arrays
+    dates = [date.fromordinal(o) for o in ordinals.tolist()]
+    tickers = tickers.tolist()
+    if not same_mtime:
+        _write_cache(cache_path, dates, tickers, prices, stat, sha256)
+    return dates, tickers, prices
+
+
+def _write_cache(cache_path: str, dates: List[date], tickers: List[str], prices: np.ndarray,
+                 stat: os.stat_result, sha256: str) -> None:
+    """Write the arrays of the CSV file to its cache, atomically; a cache that cannot be written is skipped."""
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)), suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, format=_CACHE_FORMAT, mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=sha256,
+                     dates=np.array([d.toordinal() for d in dates], dtype=np.int64),
+                     tickers=np.array(tickers, dtype=str), prices=prices)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,130 @@
+import hashlib
+import pickle
+import sqlite3
+from datetime import date
+from typing import Any, List, Optional, Tuple
+
+from base import StrategyState
+from marketdata import MarketData
+from statestore import StateStore
+
+
+def input_hash(md: MarketData, *params: Any) -> str:
+    """
+    Get a hash identifying the inputs of a strategy's states.
+
+    Args:
+        md: MarketData the states are computed from
+        params: Strategy parameters the states depend on, e.g. basket and seed date
+
+    Returns:
+        str: Hex SHA-256 digest of the market data content and the parameters
+    """
+    digest = hashlib.sha256(md.content_hash().encode())
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+class SQLiteStateStore(StateStore[StrategyState]):
+    """
+    A StateStore persisted to a SQLite database, so states survive restarts.
+
+    Every state is stored pickled with its date and MarketData version, and the
+    database records the hash of the inputs (see input_hash) the states were
+    computed from. Opening the database with a different hash discards the
+    stored states. Otherwise they are loaded into memory: lookups stay
+    in-memory binary searches, and a warm restart only computes dates after
+    the last persisted state. States computed after in-memory price
+    corrections (version > 1) are not reproducible from the input data, so
+    they and every later state are discarded on load.
+
+    Writes are buffered and written in one transaction on flush, close, or
+    once flush_every states are pending; invalidation deletes the rows at once.
+
+    Type Parameters:
+        StrategyState: The type of state object returned by the strategy
+
+    Attributes:
+        path: Path of the SQLite database
+        data_hash: Hash of the inputs of the stored states
+        loaded: Number of states loaded from the database when opened
+    """
+
+    def __init__(self, path: str, data_hash: str, flush_every: int = 1000):
+        """
+        Open or create the database and load the states valid for data_hash.
+
+        Args:
+            path: Path of the SQLite database file
+            data_hash: Hash of the inputs the states are computed from
+            flush_every: Number of pending states that triggers a write
+        """
+        super().__init__()
+        self.path = path
+        self.data_hash = data_hash
+        self._flush_every = flush_every
+        self._pending: List[Tuple[str, int, bytes]] = []
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS states (date TEXT PRIMARY KEY, version INTEGER NOT NULL, state BLOB NOT NULL)")
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'data_hash'").fetchone()
+            if row is None or row[0] != data_hash:
+                self._connection.execute("DELETE FROM states")
+                self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('data_hash', ?)",
+                                         (data_hash,))
+
+        for iso_date, version, blob in self._connection.execute(
+                "SELECT date, version, state FROM states ORDER BY date"):
+            super().set_state(date.fromisoformat(iso_date), pickle.loads(blob), version)
+        # Versions start at 1 in a newly loaded MarketData, so a state computed after an in-memory correction
+        # does not match the input data, nor do the states computed after it
+        corrected = next((i for i, version in enumerate(self._cached_versions) if version != 1), None)
+        if corrected is not None:
+            self._truncate(corrected)
+        self.loaded = len(self)
+
+    def __enter__(self) -> 'SQLiteStateStore[StrategyState]':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def set_state(self, target_date: date, state: StrategyState, version: int) -> None:
+        """
+        Store a computed state in the cache and queue it for writing.
+
+        Args:
+            target_date: The date for which to cache the state
+            state: The computed state to cache
+            version: The version of the target date from MarketData
+        """
+        super().set_state(target_date, state, version)
+        self._pending.append((target_date.isoformat(), version, pickle.dumps(state, pickle.HIGHEST_PROTOCOL)))
+        if len(self._pending) >= self._flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending states to the database."""
+        if self._pending:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO states (date, version, state) VALUES (?, ?, ?)", self._pending)
+            self._pending = []
+
+    def close(self) -> None:
+        """Flush the pending states and close the database."""
+        self.flush()
+        self._connection.close()
+
+    def _truncate(self, i: int) -> None:
+        first_removed: Optional[date] = self._dates[i] if i < len(self._dates) else None
+        super()._truncate(i)
+        if first_removed is not None:
+            self._pending = [row for row in self._pending if row[0] < first_removed.isoformat()]
+            with self._connection:
+                self._connection.execute("DELETE FROM states WHERE date >= ?", (first_removed.isoformat(),))
@@ -0,0 +1,104 @@
+import threading
+import weakref
+from datetime import date
+from types import MethodType
+from typing import Any, Callable, Optional
+
+
+class BackgroundRecomputer:
+    """
+    Runs a strategy's compute_state on a daemon thread.
+
+    Requests coalesce: however many arrive while a computation runs, the next
+    run computes the latest requested date once. An exception raised by the
+    computation is kept and re-raised by the next wait().
+
+    A bound method is held weakly, so that the worker thread does not keep its
+    object, e.g. a strategy and its cached states, alive: once the object is
+    garbage collected the thread stops.
+
+    Attributes:
+        runs: Number of computations run so far
+    """
+
+    def __init__(self, compute: Callable[[date], Any], name: str = 'recompute'):
+        """
+        Start the worker thread.
+
+        Args:
+            compute: Computation to run with the requested date, e.g. strategy.compute_state
+            name: Name of the worker thread
+        """
+        self.runs = 0
+        if isinstance(compute, MethodType):
+            self._compute = weakref.WeakMethod(compute)
+            # Does not join, as the last reference may be dropped on the worker thread itself
+            weakref.finalize(compute.__self__, self._stop)
+        else:
+            self._compute = lambda: compute
+        self._condition = threading.Condition()
+        self._pending: Optional[date] = None
+        self._busy = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def request(self, target_date: date) -> None:
+        """Ask for target_date to be computed; returns immediately."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("BackgroundRecomputer is closed")
+            if self._pending is None or target_date > self._pending:
+                self._pending = target_date
+            self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until no computation is pending or running.
+
+        Args:
+            timeout: Maximum number of seconds to wait (None to wait indefinitely)
+
+        Returns:
+            bool: True if idle, False on timeout
+        """
+        with self._condition:
+            idle = self._condition.wait_for(lambda: self._pending is None and not self._busy, timeout)
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            return idle
+
+    def close(self) -> None:
+        """Stop the worker thread once the pending computation, if any, is done."""
+        self._stop()
+        self._thread.join()
+
+    def _stop(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                target_date, self._pending = self._pending, None
+                self._busy = True
+            try:
+                compute = self._compute()
+                if compute is not None:
+                    compute(target_date)
+            except BaseException as e:
+                with self._condition:
+                    self._error = e
+            finally:
+                # Do not keep the object alive while idle
+                compute = None
+                with self._condition:
+                    self.runs += 1
+                    self._busy = False
+                    self._condition.notify_all()
@@ -1,13 +1,22 @@
 from dataclasses import dataclass, field
 from datetime import date
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 
 from base import Strategy
-from schedule import Schedule
+from graph import PRICES, NodeSpec, StrategyGraph
+from marketdata import MarketDataError
+from recompute import BackgroundRecomputer
+from schedule import Schedule, ScheduleError
 from statestore import StateStore
 
 AssetData = Dict[str, float]
 
+RECOMPUTE_MODES = ('lazy', 'eager', 'background')
+
 
 @dataclass(frozen=True)
 class EqualWeightStrategyState:
@@ -26,6 +35,138 @@ class EqualWeightStrategyState:
     weights: AssetData
 
 
+@dataclass(frozen=True, eq=False)
+class EqualWeightStrategyStates:
+    """
+    The states of an equal weight strategy over many dates, stored by column.
+
+    All the values are held in one date x column float matrix in column-major
+    order: the index levels, the portfolio returns, then the returns and the
+    weights of each asset. Every field is a contiguous view of it, and
+    to_frame wraps the matrix in a DataFrame without copying it.
+
+    Attributes:
+        dates: The dates of the states, as a sorted datetime64[D] array
+        assets: The asset names, in column order
+        values: The date x (2 + 2 * len(assets)) matrix of values
+    """
+    dates: np.ndarray
+    assets: List[str]
+    values: np.ndarray
+
+    @classmethod
+    def empty(cls, dates: List[date], assets: List[str]) -> 'EqualWeightStrategyStates':
+        """
+        Allocate the columns for the given dates and assets, to be filled in place.
+
+        Args:
+            dates: The dates of the states, in increasing order
+            assets: The asset names
+
+        Returns:
+            EqualWeightStrategyStates: States with uninitialized values
+        """
+        return cls(
+            dates=np.array(dates, dtype='datetime64[D]'),
+            assets=list(assets),
+            values=np.empty((len(dates), 2 + 2 * len(assets)), order='F'),
+        )
+
+    @classmethod
+    def from_states(cls, assets: List[str],
+                    states: Dict[date, EqualWeightStrategyState]) -> 'EqualWeightStrategyStates':
+        """
+        Convert per-date states, e.g. from get_states, to columns.
+
+        Args:
+            assets: The asset names of the strategy
+            states: Dictionary mapping dates, in increasing order, to their states
+
+        Returns:
+            EqualWeightStrategyStates: The same states by column
+        """
+        columns = cls.empty(list(states), assets)
+        for i, state in enumerate(states.values()):
+            columns.values[i, 0] = state.index_level
+            columns.values[i, 1] = state.portfolio_return
+            columns.returns[i] = [state.returns[asset] for asset in assets]
+            columns.weights[i] = [state.weights[asset] for asset in assets]
+        return columns
+
+    @property
+    def index_levels(self) -> np.ndarray:
+        """The index level of each date."""
+        return self.values[:, 0]
+
+    @property
+    def portfolio_returns(self) -> np.ndarray:
+        """The portfolio return of each date."""
+        return self.values[:, 1]
+
+    @property
+    def returns(self) -> np.ndarray:
+        """The date x asset returns."""
+        return self.values[:, 2:2 + len(self.assets)]
+
+    @property
+    def weights(self) -> np.ndarray:
+        """The date x asset weights."""
+        return self.values[:, 2 + len(self.assets):]
+
+    def columns(self) -> List[str]:
+        """Column names of the values: index_level, portfolio_return, return_<asset>..., weight_<asset>..."""
+        return (['index_level', 'portfolio_return'] + [f'return_{asset}' for asset in self.assets]
+                + [f'weight_{asset}' for asset in self.assets])
+
+    def __len__(self) -> int:
+        """Return the number of dates."""
+        return len(self.dates)
+
+    def __getitem__(self, target_date: date) -> EqualWeightStrategyState:
+        """
+        Get the state of one date.
+
+        Args:
+            target_date: The date of the state
+
+        Returns:
+            EqualWeightStrategyState: The state of target_date
+
+        Raises:
+            KeyError: If there is no state for target_date
+        """
+        key = np.datetime64(target_date, 'D')
+        i = int(np.searchsorted(self.dates, key))
+        if i == len(self.dates) or self.dates[i] != key:
+            raise KeyError(target_date)
+        return EqualWeightStrategyState(
+            returns=dict(zip(self.assets, self.returns[i].tolist())),
+            portfolio_return=float(self.portfolio_returns[i]),
+            index_level=float(self.index_levels[i]),
+            weights=dict(zip(self.assets, self.weights[i].tolist())),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Wrap the values in a DataFrame indexed by date, without copying them.
+
+        Returns:
+            pd.DataFrame: One row per date and one column per value (see columns)
+        """
+        index = pd.DatetimeIndex(self.dates, name='date')
+        return pd.DataFrame(self.values, index=index, columns=self.columns(), copy=False)
+
+    def to_csv(self, path: str, columns: Optional[List[str]] = None) -> None:
+        """
+        Write the states to a CSV file with a date column.
+
+        Args:
+            path: Path of the CSV file
+            columns: The columns to write (defaults to all, see columns)
+        """
+        self.to_frame().to_csv(path, columns=columns, date_format='%Y-%m-%d')
+
+
 @dataclass(frozen=True)
 class EqualWeightStrategy(Strategy[EqualWeightStrategyState]):
     """
@@ -40,6 +181,14 @@ class EqualWeightStrategy(Strategy[EqualWeightStrategyState]):
         calendar: Schedule of valid trading dates
         initial_index_level: Starting value of the index (e.g., 100.0)
         _state_store: StateStore instance for caching computed states
+        iterative: Compute uncached history by an iterative forward walk instead of recursion
+        recompute: What a price correction of a basket asset does to the cached states from its date onward:
+            'lazy' only invalidates them, 'eager' also recomputes them up to the latest cached date before
+            returning (after MarketData released its write lock, so other writers are not held up), and
+            'background' recomputes them on a worker thread (see wait_until_fresh)
+        graph: Compute states from memoized per-date returns, portfolio return, level and weights nodes
+            (see graph.StrategyGraph), so that a price correction only recomputes the nodes it affects;
+            the state_store then only caches the states built from the nodes
     """
     basket: List[str]
     seed_date: date
@@ -48,6 +197,60 @@ class EqualWeightStrategy(Strategy[EqualWeightStrategyState]):
     _state_store: StateStore[EqualWeightStrategyState] = field(
         default_factory=lambda: StateStore[EqualWeightStrategyState]()
     )
+    iterative: bool = True
+    recompute: str = 'lazy'
+    graph: bool = False
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+    _recomputer: Optional[BackgroundRecomputer] = field(default=None, init=False, repr=False, compare=False)
+    _graph: Optional[StrategyGraph] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.recompute not in RECOMPUTE_MODES:
+            raise ValueError(f"recompute must be one of {RECOMPUTE_MODES}, got {self.recompute!r}")
+        if self.graph:
+            object.__setattr__(self, '_graph', StrategyGraph(self.md, self.basket, self._graph_nodes()))
+        # The states depend on the basket prices from the seed date onward
+        self.md.subscribe(self._on_prices_changed, tickers=self.basket, from_date=self.seed_date)
+        if self.recompute == 'background':
+            object.__setattr__(self, '_recomputer', BackgroundRecomputer(self.compute_state))
+
+    def _on_prices_changed(self, changed_date: date) -> None:
+        """Invalidate the states from the earliest corrected date and recompute them if eager."""
+        with self._lock:
+            if self._graph is not None:
+                self._graph.invalidate_from(changed_date)
+            latest_date = self._state_store.latest_date
+            self._state_store.invalidate_from(changed_date)
+            if latest_date is None or latest_date < changed_date:
+                return
+            if self.recompute == 'eager':
+                self.compute_state(latest_date)
+        if self._recomputer is not None:
+            self._recomputer.request(latest_date)
+
+    def wait_until_fresh(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the background recomputation triggered by price corrections is done.
+
+        Args:
+            timeout: Maximum number of seconds to wait (None to wait indefinitely)
+
+        Returns:
+            bool: True if no recomputation is pending, False on timeout
+        """
+        if self._recomputer is None:
+            return True
+        return self._recomputer.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Stop the background recomputation thread, if any.
+
+        The thread only holds the strategy weakly and also stops once the
+        strategy is garbage collected; close stops it deterministically.
+        """
+        if self._recomputer is not None:
+            self._recomputer.close()
 
     def resolve_dates(self, from_date: Optional[date], to_date: date) -> Schedule:
         """
@@ -77,6 +280,10 @@ class EqualWeightStrategy(Strategy[EqualWeightStrategyState]):
         5. Rebalancing weights to equal weight at month-end
 
         This method uses the state_store to cache and retrieve computed states, avoiding repetitive computations.
+        By default the history is walked iteratively: back through the calendar to the latest date with a valid
+        cached state (or the seed date), then forward computing and caching each date. With iterative=False
+        it recurses into the previous date instead, which is limited by the Python recursion limit on a cold
+        cache. Both visit the state_store in the same order and give identical states.
 
         Args:
             date: The date for which to compute the index state
@@ -84,6 +291,14 @@ class EqualWeightStrategy(Strategy[EqualWeightStrategyState]):
         Returns:
             EqualWeightStrategyState: The complete state of the strategy on the given date
         """
+        with self._lock:
+            if self._graph is not None:
+                return self._compute_state_graph(date)
+            if self.iterative:
+                return self._compute_state_iterative(date)
+            return self._compute_state_recursive(date)
+
+    def _compute_state_recursive(self, date: date) -> EqualWeightStrategyState:
         # Get current version from MarketData for this date
         current_version = self.md.get_version(date)
 
@@ -94,46 +309,284 @@ class EqualWeightStrategy(Strategy[EqualWeightStrategyState]):
 
         if date == self.seed_date:
             # Base case: return initial state at seed date
-            state = EqualWeightStrategyState(
-                returns={asset: 0.0 for asset in self.basket},
-                portfolio_return=0.0,
-                index_level=self.initial_index_level,
-                weights={asset: 1 / len(self.basket) for asset in self.basket},
-            )
+            state = self._seed_state()
         else:
             # Incremental case: compute based on previous day
             prev_date = self.calendar.prev(date)
-            prev_state = self.compute_state(prev_date)
+            state = self._next_state(prev_date, self._compute_state_recursive(prev_date), date)
 
-            # Calculate daily returns for each asset: (today_price / yesterday_price) - 1
-            returns = {
-                asset: self.md.get(date, asset) / self.md.get(prev_date, asset) - 1
+        # Cache the computed state with its version from MarketData
+        self._state_store.set_state(date, state, current_version)
+        return state
+
+    def _compute_state_iterative(self, date: date) -> EqualWeightStrategyState:
+        # Walk back to the latest valid cached state, checking each date as the recursion would
+        pending: List[date] = []
+        current_date = date
+        while True:
+            state = self._state_store.get_state(current_date, self.md.get_version(current_date))
+            if state is not None:
+                break
+            pending.append(current_date)
+            if current_date == self.seed_date:
+                break
+            if current_date < self.seed_date:
+                raise ScheduleError(f"No state before seed date {self.seed_date}, got {date}")
+            current_date = self.calendar.prev(current_date)
+
+        # Then forward, caching each state with its version from MarketData
+        prev_date = current_date
+        for current_date in reversed(pending):
+            if current_date == self.seed_date:
+                state = self._seed_state()
+            else:
+                state = self._next_state(prev_date, state, current_date)
+            self._state_store.set_state(current_date, state, self.md.get_version(current_date))
+            prev_date = current_date
+        return state
+
+    def _compute_state_graph(self, date: date) -> EqualWeightStrategyState:
+        current_version = self.md.get_version(date)
+        cached_state = self._state_store.get_state(date, current_version)
+        if cached_state is not None:
+            return cached_state
+        if date < self.seed_date:
+            raise ScheduleError(f"No state before seed date {self.seed_date}, got {date}")
+
+        returns, portfolio_return, index_level, weights = self._graph.evaluate(
+            [('returns', date), ('portfolio_return', date), ('level', date), ('weights', date)])
+        state = EqualWeightStrategyState(
+            returns=dict(zip(self.basket, returns.tolist())),
+            portfolio_return=portfolio_return,
+            index_level=index_level,
+            weights=dict(zip(self.basket, weights.tolist())),
+        )
+        self._state_store.set_state(date, state, current_version)
+        return state
+
+    def _graph_nodes(self) -> List[NodeSpec]:
+        """
+        The per-date nodes of the strategy, with the same arithmetic as _next_state.
+
+        Returns depend on the prices of the date and of the previous date, the
+        portfolio return on the returns and the previous weights, and the level
+        on the previous level. Weights drift from the previous weights, except
+        on the seed date and at month ends where they are reset to equal
+        weights with no dependencies, so that a price correction only reaches
+        the weights up to the next rebalance.
+        """
+        seed_date = self.seed_date
+        prev = self.calendar.prev
+        equal_weights = np.full(len(self.basket), 1 / len(self.basket))
+        zero_returns = np.zeros(len(self.basket))
+
+        def returns_deps(d: date):
+            return [] if d == seed_date else [(PRICES, d), (PRICES, prev(d))]
+
+        def returns(d: date, prices: Optional[np.ndarray] = None, prev_prices: Optional[np.ndarray] = None):
+            return zero_returns if d == seed_date else prices / prev_prices - 1
+
+        def portfolio_return_deps(d: date):
+            return [] if d == seed_date else [('returns', d), ('weights', prev(d))]
+
+        def portfolio_return(d: date, asset_returns: Optional[np.ndarray] = None,
+                             prev_weights: Optional[np.ndarray] = None):
+            return 0.0 if d == seed_date else sum((asset_returns * prev_weights).tolist())
+
+        def level_deps(d: date):
+            return [] if d == seed_date else [('level', prev(d)), ('portfolio_return', d)]
+
+        def level(d: date, prev_level: Optional[float] = None, period_return: Optional[float] = None):
+            return self.initial_index_level if d == seed_date else prev_level * (1 + period_return)
+
+        def weights_deps(d: date):
+            if d == seed_date or self.calendar.is_last_day_of_month(d):
+                return []
+            return [('weights', prev(d)), ('returns', d), ('portfolio_return', d)]
+
+        def weights(d: date, prev_weights: Optional[np.ndarray] = None, asset_returns: Optional[np.ndarray] = None,
+                    period_return: Optional[float] = None):
+            if prev_weights is None:
+                return equal_weights
+            return prev_weights * (1 + asset_returns) / (1 + period_return)
+
+        return [
+            NodeSpec('returns', returns_deps, returns),
+            NodeSpec('portfolio_return', portfolio_return_deps, portfolio_return),
+            NodeSpec('level', level_deps, level),
+            NodeSpec('weights', weights_deps, weights),
+        ]
+
+    def _seed_state(self) -> EqualWeightStrategyState:
+        """Initial state at the seed date."""
+        return EqualWeightStrategyState(
+            returns={asset: 0.0 for asset in self.basket},
+            portfolio_return=0.0,
+            index_level=self.initial_index_level,
+            weights={asset: 1 / len(self.basket) for asset in self.basket},
+        )
+
+    def _next_state(self, prev_date: date, prev_state: EqualWeightStrategyState,
+                    date: date) -> EqualWeightStrategyState:
+        """State at date from the state at the previous calendar date."""
+        # Calculate daily returns for each asset: (today_price / yesterday_price) - 1
+        # Both price vectors come from one row lookup each in the MarketData price matrix
+        returns = dict(zip(
+            self.basket,
+            (self.md.get_many(date, self.basket) / self.md.get_many(prev_date, self.basket) - 1).tolist(),
+        ))
+
+        # Calculate portfolio return as weighted sum of asset returns
+        portfolio_return = sum([returns[asset] * weight for asset, weight in prev_state.weights.items()])
+        index_level = prev_state.index_level * (1 + portfolio_return)
+
+        # Rebalance weights at end of month, otherwise let them drift
+        if self.calendar.is_last_day_of_month(date):
+            # Rebalance to equal weights (1/n for each asset)
+            weights = {asset: 1 / len(self.basket) for asset in self.basket}
+        else:
+            # Recalculate weights based on price movements
+            # Each weight is adjusted by the return of that asset, normalized to sum to 1
+            weights = {
+                asset: prev_state.weights[asset] * (1 + returns[asset]) / (1 + portfolio_return)
                 for asset in self.basket
             }
 
-            # Calculate portfolio return as weighted sum of asset returns
-            portfolio_return = sum([returns[asset] * weight for asset, weight in prev_state.weights.items()])
-            index_level = prev_state.index_level * (1 + portfolio_return)
+        return EqualWeightStrategyState(
+            returns=returns,
+            portfolio_return=portfolio_return,
+            index_level=index_level,
+            weights=weights,
+        )
 
-            # Rebalance weights at end of month, otherwise let them drift
-            if self.calendar.is_last_day_of_month(date):
-                # Rebalance to equal weights (1/n for each asset)
-                weights = {asset: 1 / len(self.basket) for asset in self.basket}
-            else:
-                # Recalculate weights based on price movements
-                # Each weight is adjusted by the return of that asset, normalized to sum to 1
-                weights = {
-                    asset: prev_state.weights[asset] * (1 + returns[asset]) / (1 + portfolio_return)
-                    for asset in self.basket
-                }
+    def compute_states(self, schedule: Schedule) -> Dict[date, EqualWeightStrategyState]:
+        """
+        Compute the index states for every date of a schedule in a few array passes.
 
+        The whole history from the seed date to the last date of the schedule is
+        computed at once (see _history_arrays) and gives the same states as
+        compute_state, up to floating point rounding. The states are also cached
+        in the state_store with their current MarketData versions.
+
+        Args:
+            schedule: Dates for which to compute the index states, none before the seed date
+
+        Returns:
+            Dict[date, EqualWeightStrategyState]: The states of the schedule dates, in schedule order
+
+        Raises:
+            ScheduleError: If a date precedes the seed date or is not in the calendar
+        """
+        targets = list(schedule)
+        if not targets:
+            return {}
+        if targets[0] < self.seed_date:
+            raise ScheduleError(f"No state before seed date {self.seed_date}, got {targets[0]}")
+
+        with self._lock:
+            return self._compute_states(targets)
+
+    def compute_columns(self, schedule: Schedule) -> EqualWeightStrategyStates:
+        """
+        Compute the index states for every date of a schedule, by column.
+
+        Gives the same values as compute_states without building a state
+        object per date; the states are not cached in the state_store.
+
+        Args:
+            schedule: Dates for which to compute the index states, none before the seed date
+
+        Returns:
+            EqualWeightStrategyStates: The states of the schedule dates
+
+        Raises:
+            ScheduleError: If a date precedes the seed date or is not in the calendar
+        """
+        targets = list(schedule)
+        if not targets:
+            return EqualWeightStrategyStates.empty([], self.basket)
+        if targets[0] < self.seed_date:
+            raise ScheduleError(f"No state before seed date {self.seed_date}, got {targets[0]}")
+
+        with self._lock:
+            dates, returns, portfolio_returns, index_levels, weights = self._history_arrays(targets[-1])
+        rows = self._target_rows(dates, targets)
+        columns = EqualWeightStrategyStates.empty(targets, self.basket)
+        columns.index_levels[:] = index_levels[rows]
+        columns.portfolio_returns[:] = portfolio_returns[rows]
+        columns.returns[:] = returns[rows]
+        columns.weights[:] = weights[rows]
+        return columns
+
+    @staticmethod
+    def _target_rows(dates: List[date], targets: List[date]) -> List[int]:
+        """Positions of the targets in the history dates."""
+        positions = {d: i for i, d in enumerate(dates)}
+        rows = []
+        for target in targets:
+            i = positions.get(target)
+            if i is None:
+                raise ScheduleError(f"{target} is not in the calendar")
+            rows.append(i)
+        return rows
+
+    def _compute_states(self, targets: List[date]) -> Dict[date, EqualWeightStrategyState]:
+        dates, returns, portfolio_returns, index_levels, weights = self._history_arrays(targets[-1])
+        states = {}
+        for target, i in zip(targets, self._target_rows(dates, targets)):
             state = EqualWeightStrategyState(
-                returns=returns,
-                portfolio_return=portfolio_return,
-                index_level=index_level,
-                weights=weights,
+                returns=dict(zip(self.basket, returns[i].tolist())),
+                portfolio_return=float(portfolio_returns[i]),
+                index_level=float(index_levels[i]),
+                weights=dict(zip(self.basket, weights[i].tolist())),
             )
+            self._state_store.set_state(target, state, self.md.get_version(target))
+            states[target] = state
+        return states
 
-        # Cache the computed state with its version from MarketData
-        self._state_store.set_state(date, state, current_version)
-        return state
\ No newline at end of file
+    def _history_arrays(self, to_date: date) -> Tuple[List[date], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the whole history from the seed date to to_date as arrays.
+
+        Between two rebalances every weight is its rebalanced weight times the
+        growth of the asset since the rebalance, normalized to sum to 1; this is
+        what the day-by-day drift of compute_state compounds to. The portfolio
+        return of a day uses the previous day's weights, and the index level is
+        accumulated with the same multiplications as compute_state.
+
+        Returns:
+            Tuple: Dates, then date x asset returns, per-date portfolio returns,
+                per-date index levels and date x asset weights
+        """
+        dates = list(self.calendar.sub_schedule(self.seed_date, to_date))
+        if not dates or dates[0] != self.seed_date:
+            raise ScheduleError(f"Seed date {self.seed_date} is not in the calendar")
+
+        prices = self.md.prices[np.ix_([self.md.date_index(d) for d in dates], self.md.ticker_indices(self.basket))]
+        if np.isnan(prices).any():
+            i, j = np.argwhere(np.isnan(prices))[0]
+            raise MarketDataError(f"No data for '{self.basket[j]}' on {dates[i]}.")
+
+        # Same month-end rule as Schedule.is_last_day_of_month; like compute_state, the last
+        # calendar date cannot be computed since there is no next date to compare with
+        following = dates[2:] + [self.calendar.next(to_date)] if len(dates) > 1 else []
+        rebalanced = np.array([True] + [d.month != n.month for d, n in zip(dates[1:], following)])
+
+        equal_weights = np.full(len(self.basket), 1 / len(self.basket))
+        returns = np.zeros_like(prices)
+        returns[1:] = prices[1:] / prices[:-1] - 1
+
+        # Position of the last rebalance strictly before each date (the seed date for itself)
+        positions = np.arange(len(dates))
+        last_rebalance = np.maximum.accumulate(np.where(rebalanced, positions, 0))
+        anchor = np.concatenate(([0], last_rebalance[:-1]))
+        growth = prices / prices[anchor]
+        weights = equal_weights * growth / (growth @ equal_weights)[:, None]
+        weights[rebalanced] = equal_weights
+
+        portfolio_returns = np.zeros(len(dates))
+        portfolio_returns[1:] = (returns[1:] * weights[:-1]).sum(axis=1)
+        factors = 1 + portfolio_returns
+        factors[0] = self.initial_index_level
+        index_levels = np.cumprod(factors)
+        return dates, returns, portfolio_returns, index_levels, weights
@@ -1,8 +1,17 @@
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
-from typing import Dict, Optional
+from itertools import repeat
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
 from base import Strategy, StrategyState
+from marketdata import MarketData
 
-def get_states(strategy: Strategy[StrategyState], from_date: Optional[date], to_date: date) -> Dict[date, StrategyState]:
+def get_states(strategy: Strategy[StrategyState], from_date: Optional[date], to_date: date,
+               batch: bool = False) -> Dict[date, StrategyState]:
     """
     Get the states for each date in the specified range.
     
@@ -10,6 +19,7 @@ def get_states(strategy: Strategy[StrategyState], from_date: Optional[date], to_
         strategy: The strategy to compute
         from_date: Start date (None means use strategy's seed date)
         to_date: End date (inclusive)
+        batch: Use the strategy's batch computation (compute_states) instead of one compute_state per date
         
     Returns:
         Dict[date, strategyState]: Dictionary mapping dates to their computed strategy states
@@ -17,6 +27,9 @@ def get_states(strategy: Strategy[StrategyState], from_date: Optional[date], to_
     # Resolve the date range using the strategy's calendar
     schedule = strategy.resolve_dates(from_date, to_date)
     
+    if batch:
+        return strategy.compute_states(schedule)
+
     # Compute strategy state for each date in the schedule
     results = {
         current_date: strategy.compute_state(current_date)
@@ -24,3 +37,98 @@ def get_states(strategy: Strategy[StrategyState], from_date: Optional[date], to_
     }
     
     return results
+
+
+def get_state_columns(strategy: Strategy[StrategyState], from_date: Optional[date], to_date: date) -> Any:
+    """
+    Get the states for each date in the specified range, by column.
+
+    Args:
+        strategy: The strategy to compute, which must implement compute_columns
+        from_date: Start date (None means use strategy's seed date)
+        to_date: End date (inclusive)
+
+    Returns:
+        Any: The strategy's columnar states, e.g. EqualWeightStrategyStates
+    """
+    return strategy.compute_columns(strategy.resolve_dates(from_date, to_date))
+
+
+# Worker process state: the MarketData over the shared price matrix
+_worker_md: Optional[MarketData] = None
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+
+StrategySpec = Tuple[Type[Strategy], Dict[str, Any]]
+
+
+def _strategy_spec(strategy: Strategy) -> StrategySpec:
+    """The class and constructor arguments of a strategy dataclass, except its MarketData and private fields."""
+    return type(strategy), {
+        field.name: getattr(strategy, field.name)
+        for field in dataclasses.fields(strategy)
+        if field.init and field.name != 'md' and not field.name.startswith('_')
+    }
+
+
+def _attach_market_data(name: str, shape: Tuple[int, int], dates: List[date], tickers: List[str]) -> None:
+    """Pool initializer: wrap the shared price matrix in a read-only MarketData without copying it."""
+    global _worker_md, _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=name)
+    prices = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+    prices.flags.writeable = False
+    _worker_md = MarketData.from_arrays(dates, tickers, prices, copy=False)
+
+
+def _get_states_in_worker(spec: StrategySpec, from_date: Optional[date], to_date: date,
+                          batch: bool) -> Dict[date, Any]:
+    strategy_class, kwargs = spec
+    return get_states(strategy_class(md=_worker_md, **kwargs), from_date, to_date, batch)
+
+
+def get_states_many(strategies: Sequence[Strategy[StrategyState]], from_date: Optional[date], to_date: date,
+                    processes: Optional[int] = None, batch: bool = False) -> List[Dict[date, StrategyState]]:
+    """
+    Get the states of many strategies over the same MarketData, in a process pool.
+
+    The price matrix is copied once into shared memory, and every worker wraps
+    it in a read-only MarketData without copying, so only the strategy
+    parameters are sent to the workers and only the states come back.
+    Strategies must be dataclasses taking their MarketData as the md field;
+    each is rebuilt in its worker from its public constructor fields, so its
+    cached states are not used, and the current prices are used with all
+    versions at 1.
+
+    Args:
+        strategies: The strategies to compute, all over the same MarketData
+        from_date: Start date (None means use each strategy's seed date)
+        to_date: End date (inclusive)
+        processes: Number of worker processes (defaults to os.cpu_count()); 1 computes in this process
+        batch: Use each strategy's batch computation
+
+    Returns:
+        List[Dict[date, StrategyState]]: The states of each strategy, in the order given
+
+    Raises:
+        ValueError: If the strategies do not share one MarketData
+    """
+    if not strategies:
+        return []
+    md = strategies[0].md
+    if any(strategy.md is not md for strategy in strategies):
+        raise ValueError("All strategies must share the same MarketData")
+    if processes == 1 or len(strategies) == 1:
+        return [get_states(strategy, from_date, to_date, batch) for strategy in strategies]
+
+    prices = md.prices
+    shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+    try:
+        shared = np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = prices
+        del shared
+        with ProcessPoolExecutor(max_workers=processes, initializer=_attach_market_data,
+                                 initargs=(shm.name, prices.shape, md.dates, md.tickers)) as executor:
+            return list(executor.map(_get_states_in_worker, [_strategy_spec(s) for s in strategies],
+                                     repeat(from_date), repeat(to_date), repeat(batch)))
+    finally:
+        shm.close()
+        shm.unlink()
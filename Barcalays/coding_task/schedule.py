@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
 from datetime import date, datetime
-from typing import Any, Union, Iterator
+from typing import Any, Dict, List, Tuple, Union, Iterator
 
 class ScheduleError(Exception):
     """Custom exception for Schedule errors"""
@@ -8,105 +9,153 @@ class ScheduleError(Exception):
 
 class Schedule:
     """
-    A class that wraps a DatetimeIndex for efficient date operations.
+    A class that holds a sorted set of dates for efficient date operations.
+
+    The dates are stored as a sorted array of integer ordinals, so that
+    navigation is a binary search (numpy.searchsorted) instead of a scan.
+    A position cache maps each date of the schedule to its index, making
+    prev, next and is_last_day_of_month O(1) for dates in the schedule, and
+    month-end flags are computed once at construction.
     """
-    
+
     def __init__(self, data: Any): # Pandas types don't seem to be properly exposed
         """
         Initialize Schedule with date data.
-        
+
         Args:
             data: ArrayLike containing dates (strings, datetime objects, etc.)
         """
-        self._index = pd.DatetimeIndex(data).sort_values().drop_duplicates()
-    
+        index = pd.DatetimeIndex(data).sort_values().drop_duplicates()
+        self._set_dates([ts.date() for ts in index])
+
+    @classmethod
+    def _from_sorted(cls, dates: List[date]) -> 'Schedule':
+        """Build a Schedule from dates already sorted and unique, skipping the parsing."""
+        schedule = cls.__new__(cls)
+        schedule._set_dates(dates)
+        return schedule
+
+    def _set_dates(self, dates: List[date]) -> None:
+        self._dates = dates
+        self._ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates))
+        self._positions: Dict[date, int] = {d: i for i, d in enumerate(dates)}
+        # The last date has no next date, so its flag is never read
+        self._month_ends = [d.month != n.month for d, n in zip(dates, dates[1:])] + [False]
+
+    @staticmethod
+    def _search_key(target_date: Union[date, datetime, str]) -> Tuple[int, bool]:
+        """The ordinal of target_date, and whether target_date is midnight of that day."""
+        if type(target_date) is date:
+            return target_date.toordinal(), True
+        target_ts = pd.Timestamp(target_date)
+        return target_ts.toordinal(), target_ts == target_ts.normalize()
+
+    def _position(self, target_date: Union[date, datetime, str]) -> int:
+        """Index of target_date in the schedule, -1 if it is not a schedule date."""
+        if type(target_date) is date:
+            return self._positions.get(target_date, -1)
+        return -1
+
     def prev(self, target_date: Union[date, datetime, str]) -> date:
         """
         Get the previous date before the given date.
-        
+
         Args:
             target_date: The reference date
-            
+
         Returns:
             date: The previous date in the schedule
-            
+
         Raises:
             ScheduleError: If no previous date exists
         """
-        target_ts = pd.Timestamp(target_date)
-        previous_dates = self._index[self._index < target_ts]
-        
-        if len(previous_dates) == 0:
+        i = self._position(target_date)
+        if i < 0:
+            ordinal, exact = self._search_key(target_date)
+            # A target after midnight comes after the schedule date of the same day
+            i = int(np.searchsorted(self._ordinals, ordinal, side='left' if exact else 'right'))
+
+        if i == 0:
             raise ScheduleError(f"No date before {target_date} in schedule")
-        
-        return previous_dates.max().date()
-    
+
+        return self._dates[i - 1]
+
     def next(self, target_date: Union[date, datetime, str]) -> date:
         """
         Get the next date after the given date.
-        
+
         Args:
             target_date: The reference date
-            
+
         Returns:
             date: The next date in the schedule
-            
+
         Raises:
             ScheduleError: If no next date exists
         """
-        target_ts = pd.Timestamp(target_date)
-        following_dates = self._index[self._index > target_ts]
-        
-        if len(following_dates) == 0:
+        i = self._position(target_date)
+        if i < 0:
+            ordinal, _ = self._search_key(target_date)
+            i = int(np.searchsorted(self._ordinals, ordinal, side='right')) - 1
+
+        if i + 1 >= len(self._dates):
             raise ScheduleError(f"No date after {target_date} in schedule")
-        
-        return following_dates.min().date()
+
+        return self._dates[i + 1]
 
     def sub_schedule(
             self,
-            start_date: Union[date, datetime, str], 
+            start_date: Union[date, datetime, str],
             end_date: Union[date, datetime, str],
         ) -> 'Schedule':
         """
         Create a new Schedule with dates within the given range (inclusive).
-        
+
         Args:
             start_date: Start of the range (inclusive)
             end_date: End of the range (inclusive)
-            
+
         Returns:
             Schedule: New Schedule containing dates in the range
         """
-        start_ts = pd.Timestamp(start_date)
-        end_ts = pd.Timestamp(end_date)
-        
-        subset = self._index[(self._index >= start_ts) & (self._index <= end_ts)]
-        return Schedule(subset)
-    
+        start_ordinal, start_exact = self._search_key(start_date)
+        end_ordinal, _ = self._search_key(end_date)
+
+        start = int(np.searchsorted(self._ordinals, start_ordinal, side='left' if start_exact else 'right'))
+        end = int(np.searchsorted(self._ordinals, end_ordinal, side='right'))
+        return Schedule._from_sorted(self._dates[start:max(start, end)])
+
     def is_last_day_of_month(self, target_date: date) -> bool:
         """Return true if target_date is the last day of the month in this schedule.
 
         Args:
             target_date: The reference date
-            
+
         Returns:
             date: True if target_date is the last day of the month in this schedule
-            
+
         Raises:
             ScheduleError: If no next date exists
         """
-        next_date = self.next(target_date)
-        return target_date.month != next_date.month
-    
+        i = self._position(target_date)
+        if i < 0:
+            next_date = self.next(target_date)
+            return target_date.month != next_date.month
+
+        if i + 1 >= len(self._dates):
+            raise ScheduleError(f"No date after {target_date} in schedule")
+        return self._month_ends[i]
+
     def __iter__(self) -> Iterator[date]:
         """Make Schedule enumerable, yielding date objects."""
-        for ts in self._index:
-            yield ts.date()
-    
+        return iter(self._dates)
+
     def __len__(self) -> int:
         """Return the number of dates in the schedule."""
-        return len(self._index)
-    
+        return len(self._dates)
+
     def __repr__(self) -> str:
         """Return string representation of Schedule."""
-        return f"Schedule({len(self)} dates: {self._index.min().date()} to {self._index.max().date()})"
+        if not self._dates:
+            return "Schedule(0 dates)"
+        return f"Schedule({len(self)} dates: {self._dates[0]} to {self._dates[-1]})"
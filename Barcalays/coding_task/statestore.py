@@ -1,5 +1,6 @@
+from bisect import bisect_left
 from datetime import date
-from typing import Dict, Generic, Optional
+from typing import Generic, List, Optional
 
 from base import StrategyState
 
@@ -10,18 +11,40 @@ class StateStore(Generic[StrategyState]):
     This class provides a pure caching mechanism for strategy states.
     It stores and retrieves computed states, and also tracks the version of the state by date.
 
+    The cache is kept as parallel lists sorted by date. A date is found by binary search,
+    storing the state after the latest cached date (the usual forward computation) is an
+    append, and invalidating a date and everything after it is a single truncation.
+
     Type Parameters:
         StrategyState: The type of state object returned by the strategy
 
     Attributes:
-        _cache: Internal dictionary mapping dates to cached states
-        _cached_versions: Internal dictionary mapping dates to their cached versions
+        _dates: Internal sorted list of the cached dates
+        _states: Internal list of the cached states, in date order
+        _cached_versions: Internal list of the cached versions, in date order
     """
 
     def __init__(self):
         """Initialize an empty StateStore."""
-        self._cache: Dict[date, StrategyState] = {}
-        self._cached_versions: Dict[date, int] = {}
+        self._dates: List[date] = []
+        self._states: List[StrategyState] = []
+        self._cached_versions: List[int] = []
+
+    def __len__(self) -> int:
+        """Return the number of cached states."""
+        return len(self._dates)
+
+    @property
+    def latest_date(self) -> Optional[date]:
+        """The latest cached date, None if the cache is empty."""
+        return self._dates[-1] if self._dates else None
+
+    def _position(self, target_date: date) -> int:
+        """Index of target_date in the cache, -1 if it is not cached."""
+        i = bisect_left(self._dates, target_date)
+        if i < len(self._dates) and self._dates[i] == target_date:
+            return i
+        return -1
 
     def get_state(self, target_date: date, version: int) -> Optional[StrategyState]:
         """
@@ -36,20 +59,15 @@ class StateStore(Generic[StrategyState]):
         Returns:
             Optional[StrategyState]: The cached state if available and valid, None otherwise
         """
-        if target_date not in self._cache:
+        i = self._position(target_date)
+        if i < 0:
             return None
 
-        cached_version = self._cached_versions.get(target_date, 1)
-        if cached_version == version:
-            return self._cache.get(target_date)
+        if self._cached_versions[i] == version:
+            return self._states[i]
 
         # Version mismatch - invalidate all dates >= target_date
-        dates_to_remove = [cached_date for cached_date in self._cache.keys() if cached_date >= target_date]
-        for date_to_remove in dates_to_remove:
-            del self._cache[date_to_remove]
-            if date_to_remove in self._cached_versions:
-                del self._cached_versions[date_to_remove]
-
+        self._truncate(i)
         return None
 
     def set_state(self, target_date: date, state: StrategyState, version: int) -> None:
@@ -64,9 +82,20 @@ class StateStore(Generic[StrategyState]):
         if version < 1:
             raise ValueError(f"version must be >= 1, got {version}")
 
-        self._cache[target_date] = state
-        if version > 1:
-            self._cached_versions[target_date] = version
+        if not self._dates or self._dates[-1] < target_date:
+            self._dates.append(target_date)
+            self._states.append(state)
+            self._cached_versions.append(version)
+            return
+
+        i = bisect_left(self._dates, target_date)
+        if self._dates[i] == target_date:
+            self._states[i] = state
+            self._cached_versions[i] = version
+        else:
+            self._dates.insert(i, target_date)
+            self._states.insert(i, state)
+            self._cached_versions.insert(i, version)
 
     def has_state(self, target_date: date, version: int) -> bool:
         """
@@ -79,4 +108,19 @@ class StateStore(Generic[StrategyState]):
         Returns:
             bool: True if the state is cached, False otherwise
         """
-        return target_date in self._cache and version == self._cached_versions.get(target_date, 1)
\ No newline at end of file
+        i = self._position(target_date)
+        return i >= 0 and version == self._cached_versions[i]
+
+    def invalidate_from(self, target_date: date) -> None:
+        """
+        Invalidate the cached states of target_date and all subsequent dates.
+
+        Args:
+            target_date: The earliest date to invalidate
+        """
+        self._truncate(bisect_left(self._dates, target_date))
+
+    def _truncate(self, i: int) -> None:
+        del self._dates[i:]
+        del self._states[i:]
+        del self._cached_versions[i:]
@@ -0,0 +1,84 @@
+import pytest
+
+from graph import PRICES, NodeSpec, StrategyGraph, evaluate_many
+from marketdata import MarketData
+
+
+def cumulative_graph(md: MarketData, ticker: str = 'SPX') -> StrategyGraph:
+    """A graph summing the prices of one ticker, and flagging whether each price is above 4000."""
+    calendar = md.get_calendar()
+    first = next(iter(calendar))
+    return StrategyGraph(md, [ticker], [
+        NodeSpec('total',
+                 lambda d: [(PRICES, d)] if d == first else [('total', calendar.prev(d)), (PRICES, d)],
+                 lambda d, *values: float(values[-1][0]) + (values[0] if len(values) > 1 else 0.0)),
+        NodeSpec('high', lambda d: [(PRICES, d)], lambda d, prices: bool(prices[0] > 4000)),
+    ])
+
+
+@pytest.fixture
+def md() -> MarketData:
+    return MarketData('sample_prices.csv', cache=False)
+
+
+def test_nodes_are_memoized(md: MarketData):
+    """Test that values are computed once, through the whole dependency chain."""
+    graph = cumulative_graph(md)
+    dates = list(md.get_calendar())
+    (total,) = graph.evaluate([('total', dates[-1])])
+    assert total == pytest.approx(sum(md.get(d, 'SPX') for d in dates))
+    assert graph.computations == 2 * len(dates)
+
+    assert graph.evaluate([('total', dates[10])]) == [pytest.approx(sum(md.get(d, 'SPX') for d in dates[:11]))]
+    assert graph.computations == 2 * len(dates)
+
+
+def test_invalidation_recomputes_dirty_nodes_only(md: MarketData):
+    """Test that a correction dirties the dependents of its cell and only they are recomputed."""
+    graph = cumulative_graph(md)
+    dates = list(md.get_calendar())
+    graph.evaluate([('total', dates[-1]), ('high', dates[-1])])
+    computed = graph.computations
+
+    md.update_price(dates[-5], 'SPX', 1000.0)
+    graph.invalidate_from(dates[-5])
+    assert graph.is_dirty(('total', dates[-1]))
+    assert not graph.is_dirty(('total', dates[-6]))
+    assert not graph.is_dirty(('high', dates[-1]))
+
+    (total,) = graph.evaluate([('total', dates[-1])])
+    assert total == pytest.approx(sum(md.get(d, 'SPX') for d in dates))
+    # The prices node and the 5 totals from the corrected date
+    assert graph.computations == computed + 6
+
+
+def test_unchanged_values_stop_propagation(md: MarketData):
+    """Test that dependents of a node recomputed to the same value are not recomputed."""
+    graph = cumulative_graph(md)
+    dates = list(md.get_calendar())
+    graph.evaluate([('high', d) for d in dates])
+    computed = graph.computations
+
+    md.update_price(dates[3], 'SPX', md.get(dates[3], 'SPX'))
+    md.update_price(dates[4], 'HSI', 1.0)
+    graph.invalidate_from(dates[3])
+    graph.evaluate([('high', d) for d in dates])
+    # MarketData versions dates, so both prices nodes are read again, but neither changed
+    assert graph.computations == computed + 2
+    assert not any(graph.is_dirty(('high', d)) for d in dates)
+
+
+def test_evaluate_many_matches_serial(md: MarketData):
+    """Test that evaluating independent graphs in threads gives the serial values."""
+    last = list(md.get_calendar())[-1]
+    tickers = ['SPX', 'SX5E', 'HSI']
+    expected = [cumulative_graph(md, ticker).evaluate([('total', last)]) for ticker in tickers]
+    requests = [(cumulative_graph(md, ticker), [('total', last)]) for ticker in tickers]
+    assert evaluate_many(requests, max_workers=3) == expected
+
+
+def test_invalid_node_names(md: MarketData):
+    with pytest.raises(ValueError):
+        StrategyGraph(md, ['SPX'], [NodeSpec(PRICES, lambda d: [], lambda d: 0)])
+    with pytest.raises(ValueError):
+        StrategyGraph(md, ['SPX'], [NodeSpec('a', lambda d: [], lambda d: 0)] * 2)
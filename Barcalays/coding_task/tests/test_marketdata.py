@@ -0,0 +1,414 @@
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from marketdata import CACHE_SUFFIX, MarketData, MarketDataError
+from rule import EqualWeightStrategy
+from runner import get_state_columns
+
+
+@pytest.fixture
+def md() -> MarketData:
+    return MarketData('sample_prices.csv', cache=False)
+
+
+@pytest.fixture
+def csv_copy(tmp_path) -> str:
+    filename = str(tmp_path / 'prices.csv')
+    shutil.copyfile('sample_prices.csv', filename)
+    return filename
+
+
+def test_get_scalar(md: MarketData):
+    """Test scalar lookups for date, datetime and string dates."""
+    assert md.get(date(2023, 1, 2), 'SPX') == 4078.447068
+    assert md.get(datetime(2023, 1, 3), 'SPX') == 4057.98375
+    assert md.get('2023-01-04', 'SPX') == 4060.522083
+
+
+def test_get_many_matches_get(md: MarketData):
+    """Test that vector lookups return the scalar prices in the requested order."""
+    tickers = ['HSI', 'SPX', 'SX5E']
+    prices = md.get_many(date(2023, 1, 3), tickers)
+    assert isinstance(prices, np.ndarray)
+    assert prices.tolist() == [md.get(date(2023, 1, 3), ticker) for ticker in tickers]
+
+
+def test_missing_date_or_ticker_raises(md: MarketData):
+    """Test that unknown dates and tickers raise MarketDataError."""
+    with pytest.raises(MarketDataError, match="No data for 'SPX' on 2023-01-01"):
+        md.get(date(2023, 1, 1), 'SPX')
+    with pytest.raises(MarketDataError, match="No data for 'FTSE'"):
+        md.get(date(2023, 1, 2), 'FTSE')
+    with pytest.raises(MarketDataError):
+        md.get_many(date(2023, 1, 2), ['SPX', 'FTSE'])
+    with pytest.raises(MarketDataError):
+        md.update_price(date(2023, 1, 1), 'SPX', 1.0)
+
+
+def test_update_price_writes_matrix_and_bumps_version(md: MarketData):
+    """Test that update_price is visible to all lookups and versions the date."""
+    update_date = date(2023, 1, 3)
+    assert md.get_version(update_date) == 1
+    md.update_price(update_date, 'SPX', 4100.0)
+
+    assert md.get(update_date, 'SPX') == 4100.0
+    assert md.get_many(update_date, ['SPX'])[0] == 4100.0
+    assert md.prices[md.date_index(update_date), md.ticker_indices(['SPX'])[0]] == 4100.0
+    assert md.get_version(update_date) == 2
+    assert md.get_version(date(2023, 1, 4)) == 1
+
+
+def test_prices_view_is_read_only(md: MarketData):
+    """Test that the exposed matrix cannot be used to bypass update_price."""
+    assert md.prices.shape == (len(md.get_calendar()), len(md.tickers))
+    with pytest.raises(ValueError):
+        md.prices[0, 0] = 1.0
+
+
+def test_listeners_notified_per_update(md: MarketData):
+    """Test that every update notifies listeners with its date."""
+    changed = []
+    md.add_listener(changed.append)
+    md.update_price(date(2023, 1, 4), 'SPX', 4100.0)
+    md.update_price(date(2023, 1, 3), 'HSI', 21000.0)
+    assert changed == [date(2023, 1, 4), date(2023, 1, 3)]
+
+
+def test_batch_updates_notify_once_with_earliest_date(md: MarketData):
+    """Test that a batch of updates notifies once, with the earliest date, and still versions every date."""
+    changed = []
+    md.add_listener(changed.append)
+    with md.batch_updates():
+        md.update_price(date(2023, 1, 5), 'SPX', 4100.0)
+        with md.batch_updates():
+            md.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+        md.update_price(date(2023, 1, 4), 'SPX', 4050.0)
+        assert changed == []
+    assert changed == [date(2023, 1, 3)]
+    assert [md.get_version(date(2023, 1, d)) for d in (3, 4, 5)] == [2, 2, 2]
+
+
+def test_bound_method_listeners_are_weak(md: MarketData):
+    """Test that a listener's owner can be garbage collected."""
+    class Owner:
+        calls = 0
+
+        def on_change(self, changed_date):
+            Owner.calls += 1
+
+    owner = Owner()
+    md.add_listener(owner.on_change)
+    md.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+    del owner
+    md.update_price(date(2023, 1, 4), 'SPX', 4000.0)
+    assert Owner.calls == 1
+
+
+def test_subscribers_are_notified_outside_the_write_lock(md: MarketData):
+    """Test that another thread can update prices while a subscriber handles a notification."""
+    written = threading.Event()
+
+    def on_change(changed_date):
+        def write():
+            md.update_price(date(2023, 1, 4), 'HSI', 21000.0)
+            written.set()
+
+        threading.Thread(target=write, daemon=True).start()
+        assert written.wait(timeout=5), "update blocked by the notifying writer"
+
+    md.subscribe(on_change, tickers=['SPX'])
+    md.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+    assert md.get(date(2023, 1, 4), 'HSI') == 21000.0
+
+
+def test_subscription_filters_cells(md: MarketData):
+    """Test that subscribers are only told about their tickers from their date onward."""
+    changed = []
+    md.subscribe(changed.append, tickers=['SPX'], from_date=date(2023, 1, 4))
+    md.update_price(date(2023, 1, 5), 'HSI', 21000.0)
+    md.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+    md.update_price(date(2023, 1, 5), 'SPX', 4000.0)
+    assert changed == [date(2023, 1, 5)]
+
+
+def test_batch_notifies_earliest_matching_cell(md: MarketData):
+    """Test that a batch notifies each subscriber with the earliest of its own cells, or not at all."""
+    spx, hsi, later = [], [], []
+    md.subscribe(spx.append, tickers=['SPX'])
+    md.subscribe(hsi.append, tickers=['HSI'])
+    md.subscribe(later.append, from_date=date(2023, 1, 5))
+    with md.batch_updates():
+        md.update_price(date(2023, 1, 6), 'SPX', 4000.0)
+        md.update_price(date(2023, 1, 3), 'SX5E', 3800.0)
+        md.update_price(date(2023, 1, 4), 'SPX', 4000.0)
+    assert spx == [date(2023, 1, 4)]
+    assert hsi == []
+    assert later == [date(2023, 1, 6)]
+
+
+def test_unsubscribe(md: MarketData):
+    """Test that an unsubscribed callback is no longer invoked."""
+    changed = []
+    subscription = md.subscribe(changed.append)
+    md.unsubscribe(subscription)
+    md.unsubscribe(subscription)
+    md.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+    assert changed == []
+
+
+def test_from_arrays_and_content_hash(md: MarketData):
+    """Test that MarketData built from its own arrays is equal in content."""
+    copy = MarketData.from_arrays(md.dates, md.tickers, md.prices)
+    assert copy.get(date(2023, 1, 3), 'SPX') == md.get(date(2023, 1, 3), 'SPX')
+    assert copy.content_hash() == md.content_hash()
+
+    copy.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+    assert copy.content_hash() != md.content_hash()
+    assert md.get(date(2023, 1, 3), 'SPX') == 4057.98375
+    with pytest.raises(MarketDataError):
+        MarketData.from_arrays(md.dates[:-1], md.tickers, md.prices)
+
+
+def assert_same_content(md: MarketData, other: MarketData):
+    assert other.dates == md.dates
+    assert other.tickers == md.tickers
+    assert other.content_hash() == md.content_hash()
+
+
+def test_cache_written_and_used(md: MarketData, csv_copy: str, monkeypatch):
+    """Test that the first load writes the cache and later loads skip the CSV parser."""
+    assert_same_content(md, MarketData(csv_copy))
+    assert os.path.exists(csv_copy + CACHE_SUFFIX)
+
+    def no_parse(filename):
+        raise AssertionError("CSV parsed despite a valid cache")
+
+    monkeypatch.setattr(MarketData, '_parse_csv', staticmethod(no_parse))
+    cached = MarketData(csv_copy)
+    assert_same_content(md, cached)
+    cached.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+    assert cached.get(date(2023, 1, 3), 'SPX') == 4000.0
+
+    # Touching the file changes its mtime but not its hash
+    stat = os.stat(csv_copy)
+    os.utime(csv_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert_same_content(md, MarketData(csv_copy))
+
+
+def test_cache_invalidated_by_changed_file(csv_copy: str):
+    """Test that a changed CSV is parsed again rather than served from a stale cache."""
+    MarketData(csv_copy)
+    with open(csv_copy) as f:
+        content = f.read()
+    with open(csv_copy, 'w') as f:
+        f.write(content.replace('2023-01-02,SPX,4078.447068', '2023-01-02,SPX,4078.447069'))
+    assert MarketData(csv_copy).get(date(2023, 1, 2), 'SPX') == 4078.447069
+
+
+def test_corrupt_cache_ignored(md: MarketData, csv_copy: str):
+    """Test that an unreadable cache falls back to the CSV."""
+    with open(csv_copy + CACHE_SUFFIX, 'wb') as f:
+        f.write(b'not a cache')
+    assert_same_content(md, MarketData(csv_copy))
+
+
+def test_load_errors(tmp_path):
+    """Test that malformed files raise MarketDataError."""
+    with pytest.raises(MarketDataError, match="File not found"):
+        MarketData(str(tmp_path / 'missing.csv'))
+
+    bad_date = tmp_path / 'bad_date.csv'
+    bad_date.write_text('date,ticker,close\n2023/01/02,SPX,1.0\n')
+    with pytest.raises(MarketDataError, match="Error parsing dates"):
+        MarketData(str(bad_date), cache=False)
+
+    duplicate = tmp_path / 'duplicate.csv'
+    duplicate.write_text('date,ticker,close\n2023-01-02,SPX,1.0\n2023-01-02,SPX,2.0\n')
+    with pytest.raises(MarketDataError, match="Duplicate"):
+        MarketData(str(duplicate), cache=False)
+
+
+def test_missing_cells_are_nan(tmp_path):
+    """Test that tickers are sorted and cells with no row have no price."""
+    filename = tmp_path / 'sparse.csv'
+    filename.write_text('date,ticker,close\n2023-01-03,SPX,2.0\n2023-01-02,HSI,1.0\n')
+    md = MarketData(str(filename), cache=False)
+    assert md.dates == [date(2023, 1, 2), date(2023, 1, 3)]
+    assert md.tickers == ['HSI', 'SPX']
+    assert md.get(date(2023, 1, 3), 'SPX') == 2.0
+    with pytest.raises(MarketDataError):
+        md.get(date(2023, 1, 2), 'SPX')
+
+
+def test_update_prices_writes_once_per_date(md: MarketData):
+    """Test that bulk updates write every cell, version each date once and keep the last duplicate."""
+    changed = []
+    md.add_listener(changed.append)
+    md.update_prices([date(2023, 1, 4), '2023-01-03', date(2023, 1, 4), date(2023, 1, 4)],
+                     ['SPX', 'HSI', 'SX5E', 'SPX'], [4100.0, 21000.0, 3900.0, 4200.0])
+
+    assert md.get(date(2023, 1, 4), 'SPX') == 4200.0
+    assert md.get(date(2023, 1, 4), 'SX5E') == 3900.0
+    assert md.get(date(2023, 1, 3), 'HSI') == 21000.0
+    assert [md.get_version(date(2023, 1, d)) for d in (3, 4, 5)] == [2, 2, 1]
+    assert changed == [date(2023, 1, 3)]
+
+
+def test_update_prices_from_frame_matches_update_price(md: MarketData):
+    """Test that a DataFrame of updates gives the prices and versions of the per-call loop."""
+    updates = pd.DataFrame({
+        'date': pd.to_datetime(['2023-01-05', '2023-01-06', '2023-01-05']),
+        'ticker': ['SPX', 'HSI', 'HSI'],
+        'close': [4000.0, 20000.0, 21000.0],
+    })
+    md.update_prices(updates)
+    expected = MarketData('sample_prices.csv', cache=False)
+    for row in updates.itertuples():
+        expected.update_price(row.date.date(), row.ticker, row.close)
+
+    assert md.content_hash() == expected.content_hash()
+    assert md.get_version(date(2023, 1, 5)) == 2
+    assert expected.get_version(date(2023, 1, 5)) == 3
+
+
+def test_update_prices_is_all_or_nothing(md: MarketData):
+    """Test that an invalid update fails the whole call before any price is written."""
+    before = md.content_hash()
+    with pytest.raises(MarketDataError, match="No data for 'FTSE'"):
+        md.update_prices([date(2023, 1, 3), date(2023, 1, 3)], ['SPX', 'FTSE'], [1.0, 2.0])
+    with pytest.raises(MarketDataError, match="No data on 2023-01-01"):
+        md.update_prices([date(2023, 1, 3), date(2023, 1, 1)], ['SPX', 'SPX'], [1.0, 2.0])
+    with pytest.raises(MarketDataError):
+        md.update_prices([date(2023, 1, 3)], ['SPX'], [1.0, 2.0])
+    assert md.content_hash() == before
+    assert md.get_version(date(2023, 1, 3)) == 1
+
+
+def test_update_prices_invalidates_strategy_states(md: MarketData):
+    """Test that one bulk update invalidates a strategy's states from the earliest basket date."""
+    strategy = EqualWeightStrategy(md=md, basket=['SPX', 'SX5E'], seed_date=date(2023, 1, 2),
+                                   calendar=md.get_calendar(), initial_index_level=100)
+    strategy.compute_state(date(2023, 6, 29))
+    md.update_prices([date(2023, 3, 1), date(2023, 2, 1), date(2023, 5, 2)], ['SPX', 'HSI', 'SX5E'],
+                     [4000.0, 20000.0, 4300.0])
+    assert strategy._state_store.latest_date == md.get_calendar().prev(date(2023, 3, 1))
+
+
+def test_snapshot_is_pinned_and_read_only(md: MarketData):
+    """Test that a snapshot keeps its prices and versions while the MarketData is updated."""
+    snapshot = md.snapshot()
+    md.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+    md.update_prices([date(2023, 1, 4)], ['HSI'], [21000.0])
+
+    assert (snapshot.revision, md.revision) == (0, 2)
+    assert snapshot.get(date(2023, 1, 3), 'SPX') == 4057.98375
+    assert snapshot.get_version(date(2023, 1, 3)) == 1
+    assert md.get(date(2023, 1, 3), 'SPX') == 4000.0
+    assert md.get_version(date(2023, 1, 3)) == 2
+    assert snapshot.content_hash() == MarketData('sample_prices.csv', cache=False).content_hash()
+    assert md.prices[md.date_index(date(2023, 1, 4)), md.ticker_indices(['HSI'])[0]] == 21000.0
+    with pytest.raises(MarketDataError, match="read-only"):
+        snapshot.update_price(date(2023, 1, 3), 'SPX', 4000.0)
+
+
+def test_snapshot_matrix_follows_writes(md: MarketData):
+    """Test that the matrix and cell reads of a snapshot assembled from its base match the written prices."""
+    expected = md.prices.copy()
+    rows, cols = np.nonzero(~np.isnan(expected))
+    rng = np.random.default_rng(0)
+    pinned = []
+    for step in range(6):
+        k = rng.choice(len(rows), size=5, replace=False)
+        prices = rng.uniform(1000, 5000, size=5)
+        md.update_prices([md.dates[i] for i in rows[k]], [md.tickers[j] for j in cols[k]], prices)
+        expected[rows[k], cols[k]] = prices
+        pinned.append((md.snapshot(), expected.copy()))
+
+        assert np.array_equal(md._snapshot.values(rows, cols), expected[rows, cols])
+        if step % 2:
+            assert np.array_equal(md.prices, expected, equal_nan=True)
+    for snapshot, prices in pinned:
+        assert np.array_equal(snapshot.prices, prices, equal_nan=True)
+
+
+def test_batch_is_published_atomically(md: MarketData):
+    """Test that other threads see none of a batch until it ends, while the updating thread sees its updates."""
+    d1, d2 = date(2023, 1, 3), date(2023, 1, 4)
+    before = (md.get(d1, 'SPX'), md.get(d2, 'SPX'))
+
+    def read():
+        seen.append((md.revision, md.get(d1, 'SPX'), md.get(d2, 'SPX'), md.get_version(d1)))
+
+    with md.batch_updates():
+        md.update_price(d1, 'SPX', 4000.0)
+        seen = []
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join()
+        assert seen == [(0, *before, 1)]
+        assert (md.revision, md.get(d1, 'SPX'), md.get(d2, 'SPX')) == (1, 4000.0, before[1])
+        md.update_prices([d2], ['SPX'], [4010.0])
+
+    seen = []
+    read()
+    assert seen == [(2, 4000.0, 4010.0, 2)]
+
+
+def index_levels(md: MarketData, to_date: date) -> bytes:
+    calendar = md.get_calendar()
+    strategy = EqualWeightStrategy(md=md, basket=['SPX', 'SX5E', 'HSI'], seed_date=md.dates[0], calendar=calendar,
+                                   initial_index_level=100)
+    return get_state_columns(strategy, None, to_date).index_levels.tobytes()
+
+
+def test_concurrent_snapshot_reads_are_deterministic(md: MarketData):
+    """Test that readers pinning snapshots while a writer publishes corrections get the serial results."""
+    dates, tickers = md.dates, ['SPX', 'SX5E', 'HSI']
+    to_date = dates[-2]
+    corrections = [(dates[1 + k * 7 % (len(dates) - 2)], tickers[k % 3], 1 + (k % 11 - 5) / 100) for k in range(200)]
+    corrections = [(d, ticker, md.get(d, ticker) * factor) for d, ticker, factor in corrections]
+    results = []
+    writing = threading.Event()
+    writing.set()
+
+    def read():
+        while writing.is_set() or len(results) < 8:
+            snapshot = md.snapshot()
+            results.append((snapshot.revision, index_levels(snapshot, to_date)))
+
+    def write():
+        for d, ticker, price in corrections:
+            md.update_price(d, ticker, price)
+            time.sleep(0)
+        writing.clear()
+
+    # Switch threads often, so that reads interleave with the writes
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        threads = [threading.Thread(target=read) for _ in range(4)] + [threading.Thread(target=write)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    revisions = sorted({revision for revision, _ in results})
+    assert len(revisions) > 1
+    expected = {}
+    replay = MarketData('sample_prices.csv', cache=False)
+    for revision in range(len(corrections) + 1):
+        if revision in revisions:
+            expected[revision] = index_levels(replay, to_date)
+        if revision < len(corrections):
+            replay.update_price(*corrections[revision])
+    assert all(levels == expected[revision] for revision, levels in results)
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from datetime import date
+
+from marketdata import MarketData
+from persistentstore import SQLiteStateStore, input_hash
+from rule import EqualWeightStrategy, EqualWeightStrategyState
+from runner import get_states
+
+
+@dataclass(frozen=True)
+class StoredState:
+    """Simple state for SQLiteStateStore tests."""
+    value: float
+
+
+def strategy_over(md: MarketData, store: SQLiteStateStore) -> EqualWeightStrategy:
+    return EqualWeightStrategy(
+        md=md,
+        basket=["SPX", "SX5E", "HSI"],
+        seed_date=date.fromisoformat("2023-01-02"),
+        calendar=md.get_calendar(),
+        initial_index_level=100,
+        _state_store=store,
+    )
+
+
+def test_states_survive_reopen(tmp_path):
+    """Test that stored states and versions are loaded back."""
+    path = str(tmp_path / 'states.sqlite')
+    with SQLiteStateStore[StoredState](path, 'hash') as store:
+        for day in range(2, 6):
+            store.set_state(date(2023, 1, day), StoredState(float(day)), version=1)
+
+    with SQLiteStateStore[StoredState](path, 'hash') as store:
+        assert store.loaded == 4
+        assert store.get_state(date(2023, 1, 4), version=1) == StoredState(4.0)
+
+
+def test_changed_hash_discards_states(tmp_path):
+    """Test that states of other input data are not loaded."""
+    path = str(tmp_path / 'states.sqlite')
+    with SQLiteStateStore[StoredState](path, 'hash') as store:
+        store.set_state(date(2023, 1, 2), StoredState(2.0), version=1)
+
+    with SQLiteStateStore[StoredState](path, 'other hash') as store:
+        assert store.loaded == 0
+    with SQLiteStateStore[StoredState](path, 'hash') as store:
+        assert store.loaded == 0
+
+
+def test_invalidation_is_persisted(tmp_path):
+    """Test that truncated states are deleted from the database, including pending ones."""
+    path = str(tmp_path / 'states.sqlite')
+    with SQLiteStateStore[StoredState](path, 'hash', flush_every=2) as store:
+        for day in range(2, 7):
+            store.set_state(date(2023, 1, day), StoredState(float(day)), version=1)
+        store.invalidate_from(date(2023, 1, 4))
+
+    with SQLiteStateStore[StoredState](path, 'hash') as store:
+        assert store.loaded == 2
+        assert store.latest_date == date(2023, 1, 3)
+
+
+def test_corrected_states_are_dropped_on_load(tmp_path):
+    """Test that states computed after in-memory corrections are not reused by a new MarketData."""
+    path = str(tmp_path / 'states.sqlite')
+    with SQLiteStateStore[StoredState](path, 'hash') as store:
+        store.set_state(date(2023, 1, 2), StoredState(2.0), version=1)
+        store.set_state(date(2023, 1, 3), StoredState(3.0), version=2)
+        store.set_state(date(2023, 1, 4), StoredState(4.0), version=1)
+
+    with SQLiteStateStore[StoredState](path, 'hash') as store:
+        assert store.loaded == 1
+
+
+def test_warm_restart_matches_cold_run(tmp_path):
+    """Test that a strategy restarted on its persisted states gives the same states."""
+    path = str(tmp_path / 'states.sqlite')
+    to_date = date.fromisoformat("2023-06-29")
+    md = MarketData('sample_prices.csv', cache=False)
+    data_hash = input_hash(md, "equal weight")
+
+    with SQLiteStateStore[EqualWeightStrategyState](path, data_hash) as store:
+        cold = get_states(strategy_over(md, store), None, date.fromisoformat("2023-04-28"))
+
+    md = MarketData('sample_prices.csv', cache=False)
+    with SQLiteStateStore[EqualWeightStrategyState](path, input_hash(md, "equal weight")) as store:
+        assert store.loaded == len(cold)
+        warm = get_states(strategy_over(md, store), None, to_date)
+
+    reference = MarketData('sample_prices.csv', cache=False)
+    assert warm == get_states(strategy_over(reference, SQLiteStateStore(str(tmp_path / 'ref.sqlite'), 'ref')), None, to_date)
@@ -0,0 +1,44 @@
+import threading
+from datetime import date
+
+import pytest
+
+from recompute import BackgroundRecomputer
+
+
+def test_requests_coalesce_to_latest_date():
+    """Test that requests arriving during a computation are computed once, for the latest date."""
+    started, release = threading.Event(), threading.Event()
+    computed = []
+
+    def compute(target_date):
+        started.set()
+        release.wait()
+        computed.append(target_date)
+
+    recomputer = BackgroundRecomputer(compute)
+    recomputer.request(date(2023, 1, 3))
+    started.wait()
+    for day in (5, 9, 4):
+        recomputer.request(date(2023, 1, day))
+    release.set()
+
+    assert recomputer.wait(timeout=5)
+    assert computed == [date(2023, 1, 3), date(2023, 1, 9)]
+    assert recomputer.runs == 2
+    recomputer.close()
+
+
+def test_errors_are_raised_by_wait():
+    """Test that a failed computation is reported to the next wait."""
+    def compute(target_date):
+        raise ValueError(f"cannot compute {target_date}")
+
+    recomputer = BackgroundRecomputer(compute)
+    recomputer.request(date(2023, 1, 3))
+    with pytest.raises(ValueError, match="cannot compute 2023-01-03"):
+        recomputer.wait(timeout=5)
+    assert recomputer.wait(timeout=5)
+    recomputer.close()
+    with pytest.raises(RuntimeError):
+        recomputer.request(date(2023, 1, 4))
@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+from marketdata import MarketData
+from rule import EqualWeightStrategy
+from runner import get_states, get_states_many
+
+
+def strategies(md: MarketData):
+    calendar = md.get_calendar()
+    return [
+        EqualWeightStrategy(md=md, basket=basket, seed_date=seed_date, calendar=calendar, initial_index_level=100)
+        for basket, seed_date in [
+            (["SPX", "SX5E", "HSI"], date(2023, 1, 2)),
+            (["SPX", "HSI"], date(2023, 1, 3)),
+            (["SX5E"], date(2023, 2, 1)),
+        ]
+    ]
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_get_states_many_matches_serial(batch):
+    """Test that the process pool gives every strategy the states of a serial get_states."""
+    md = MarketData('sample_prices.csv', cache=False)
+    to_date = date(2023, 6, 29)
+    results = get_states_many(strategies(md), None, to_date, processes=2, batch=batch)
+    expected = [get_states(strategy, None, to_date, batch)
+                for strategy in strategies(MarketData('sample_prices.csv', cache=False))]
+    assert results == expected
+
+
+def test_get_states_many_uses_current_prices():
+    """Test that corrections made before the run are seen by the workers."""
+    md = MarketData('sample_prices.csv', cache=False)
+    md.update_price(date(2023, 3, 1), "SPX", 4500.0)
+    to_date = date(2023, 3, 31)
+    results = get_states_many(strategies(md), None, to_date, processes=2)
+    assert results == [get_states(strategy, None, to_date) for strategy in strategies(md)]
+
+
+def test_get_states_many_requires_shared_market_data():
+    with pytest.raises(ValueError, match="same MarketData"):
+        get_states_many(strategies(MarketData('sample_prices.csv', cache=False))
+                        + strategies(MarketData('sample_prices.csv', cache=False)),
+                        None, date(2023, 3, 31), processes=2)
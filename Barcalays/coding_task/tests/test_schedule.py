@@ -1,3 +1,4 @@
+import pandas as pd
 import pytest
 from datetime import date, datetime
 from schedule import Schedule, ScheduleError
@@ -196,3 +197,40 @@ def test_month_boundary_scenarios():
     assert schedule_leap.is_last_day_of_month(date(2024, 2, 29)) == True
     assert schedule_leap.is_last_day_of_month(date(2024, 2, 28)) == False
 
+
+def test_navigation_from_dates_not_in_schedule():
+    """Test prev, next and is_last_day_of_month for dates between schedule dates."""
+    dates = ['2023-01-27', '2023-01-30', '2023-02-02']
+    schedule = Schedule(dates)
+
+    assert schedule.prev(date(2023, 1, 29)) == date(2023, 1, 27)
+    assert schedule.next(date(2023, 1, 29)) == date(2023, 1, 30)
+    assert schedule.prev(date(2023, 3, 1)) == date(2023, 2, 2)
+    assert schedule.is_last_day_of_month(date(2023, 1, 31)) == True
+    assert schedule.is_last_day_of_month(date(2023, 1, 28)) == False
+
+def test_navigation_with_intraday_datetimes():
+    """Test that a datetime after midnight sorts after the schedule date of the same day."""
+    dates = ['2023-01-03', '2023-01-05', '2023-01-10']
+    schedule = Schedule(dates)
+
+    assert schedule.prev(datetime(2023, 1, 5, 12)) == date(2023, 1, 5)
+    assert schedule.next(datetime(2023, 1, 5, 12)) == date(2023, 1, 10)
+    assert list(schedule.sub_schedule(datetime(2023, 1, 3, 12), datetime(2023, 1, 10, 12))) == [
+        date(2023, 1, 5), date(2023, 1, 10)]
+
+def test_month_end_flags_match_next():
+    """Test that the precomputed month-end flags agree with comparing against next on a long calendar."""
+    schedule = Schedule(pd.bdate_range('2020-01-01', '2023-12-31'))
+    dates = list(schedule)
+    for d in dates[:-1]:
+        assert schedule.is_last_day_of_month(d) == (d.month != schedule.next(d).month)
+
+def test_sub_schedule_navigation_is_local():
+    """Test that a sub-schedule navigates within its own dates only."""
+    dates = ['2023-01-30', '2023-01-31', '2023-02-01', '2023-02-02']
+    sub = Schedule(dates).sub_schedule('2023-01-30', '2023-01-31')
+
+    assert sub.prev(date(2023, 1, 31)) == date(2023, 1, 30)
+    with pytest.raises(ScheduleError):
+        sub.is_last_day_of_month(date(2023, 1, 31))
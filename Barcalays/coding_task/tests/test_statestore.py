@@ -60,3 +60,28 @@ class TestStateStore:
 
         assert store.get_state(test_date, version=1) is None
 
+
+    def test_invalidate_from_truncates(self):
+        """Test that invalidate_from drops the given date and all later dates only."""
+        store = StateStore[TestState]()
+        dates = [date(2023, 1, d) for d in range(2, 7)]
+        for d in dates:
+            store.set_state(d, TestState(value=float(d.day), data="test"), version=1)
+
+        # A date between cached dates invalidates from the next cached date
+        store.invalidate_from(date(2023, 1, 3))
+        assert len(store) == 1
+        assert store.has_state(dates[0], version=1)
+        assert not store.has_state(dates[1], version=1)
+
+    def test_set_state_out_of_order(self):
+        """Test that states stored out of date order are found and replaced."""
+        store = StateStore[TestState]()
+        for day in [5, 2, 4, 3]:
+            store.set_state(date(2023, 1, day), TestState(value=float(day), data="test"), version=1)
+        store.set_state(date(2023, 1, 4), TestState(value=40.0, data="test"), version=2)
+
+        assert len(store) == 4
+        assert store.get_state(date(2023, 1, 3), version=1).value == 3.0
+        assert store.get_state(date(2023, 1, 4), version=2).value == 40.0
+        assert store.get_state(date(2023, 1, 5), version=1).value == 5.0
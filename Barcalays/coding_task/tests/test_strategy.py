@@ -1,10 +1,16 @@
+import gc
+import sys
+import weakref
 from datetime import date
 from typing import List
+import numpy as np
 import pandas as pd
+import pytest
 
 from marketdata import MarketData
-from rule import EqualWeightStrategy
-from runner import get_states
+from rule import EqualWeightStrategy, EqualWeightStrategyStates
+from runner import get_state_columns, get_states
+from schedule import ScheduleError
 
 def compute_and_check(strategy: EqualWeightStrategy, final_date: str, expected: float):
     final_level = strategy.compute_state(date.fromisoformat(final_date)).index_level
@@ -16,7 +22,7 @@ def get_states_and_check(strategy: EqualWeightStrategy, from_date: str, to_date:
     assert levels == expected
 
 def initialise() -> EqualWeightStrategy:
-    md = MarketData('sample_prices.csv')
+    md = MarketData('sample_prices.csv', cache=False)
     strategy = EqualWeightStrategy(
         md=md,
         basket=["SPX", "SX5E", "HSI"],
@@ -113,3 +119,274 @@ def test_compute_state_cascade_invalidation():
 
 
 
+
+
+def test_batch_states_match_expected_output():
+    """Test that the vectorized batch path matches expected_output.csv."""
+    expected_df = pd.read_csv('expected_output.csv')
+    expected_df['date'] = pd.to_datetime(expected_df['date']).dt.date
+
+    states = get_states(initialise(), None, date.fromisoformat("2023-06-29"), batch=True)
+    computed_df = pd.DataFrame([{'date': d, 'index_level': state.index_level} for d, state in states.items()])
+
+    pd.testing.assert_frame_equal(expected_df, computed_df, check_exact=False, atol=1e-10, rtol=0)
+
+
+def test_batch_states_match_compute_state():
+    """Test that every field of the batch states matches the day-by-day computation."""
+    batch_states = get_states(initialise(), date.fromisoformat("2023-03-01"), date.fromisoformat("2023-06-29"), batch=True)
+    strategy = initialise()
+    assert list(batch_states) == list(strategy.resolve_dates(date.fromisoformat("2023-03-01"), date.fromisoformat("2023-06-29")))
+    for d, batch_state in batch_states.items():
+        state = strategy.compute_state(d)
+        assert batch_state.returns == pytest.approx(state.returns, abs=1e-12)
+        assert batch_state.weights == pytest.approx(state.weights, abs=1e-12)
+        assert batch_state.portfolio_return == pytest.approx(state.portfolio_return, abs=1e-12)
+        assert batch_state.index_level == pytest.approx(state.index_level, abs=1e-10)
+
+
+def test_batch_states_are_cached():
+    """Test that the batch path fills the state store for compute_state."""
+    strategy = initialise()
+    states = get_states(strategy, None, date.fromisoformat("2023-02-08"), batch=True)
+    for d, state in states.items():
+        assert strategy.compute_state(d) is state
+
+
+def test_batch_states_before_seed_date():
+    """Test that the batch path rejects dates before the seed date."""
+    md = MarketData('sample_prices.csv', cache=False)
+    strategy = EqualWeightStrategy(
+        md=md,
+        basket=["SPX", "SX5E", "HSI"],
+        seed_date=date.fromisoformat("2023-01-04"),
+        calendar=md.get_calendar(),
+        initial_index_level=100,
+    )
+    with pytest.raises(ScheduleError):
+        strategy.compute_states(strategy.calendar.sub_schedule(date(2023, 1, 2), date(2023, 1, 5)))
+
+
+def test_columns_match_batch_states():
+    """Test that the columnar states hold the batch states, and are found by date."""
+    from_date, to_date = date.fromisoformat("2023-03-01"), date.fromisoformat("2023-06-29")
+    columns = get_state_columns(initialise(), from_date, to_date)
+    states = get_states(initialise(), from_date, to_date, batch=True)
+
+    assert len(columns) == len(states)
+    assert columns.dates.tolist() == list(states)
+    assert columns.index_levels.tolist() == [state.index_level for state in states.values()]
+    for d, state in states.items():
+        assert columns[d] == state
+    with pytest.raises(KeyError):
+        columns[date.fromisoformat("2023-03-04")]
+
+
+def test_columns_from_states_round_trip():
+    """Test that per-date states converted to columns give back the same states."""
+    states = get_states(initialise(), None, date.fromisoformat("2023-02-08"))
+    columns = EqualWeightStrategyStates.from_states(["SPX", "SX5E", "HSI"], states)
+    assert {d: columns[d] for d in states} == states
+
+
+def test_columns_export_without_copy(tmp_path):
+    """Test that the DataFrame shares the columns' memory and the CSV matches expected_output.csv."""
+    columns = get_state_columns(initialise(), None, date.fromisoformat("2023-06-29"))
+    assert columns.returns.flags.f_contiguous and columns.weights.flags.f_contiguous
+
+    frame = columns.to_frame()
+    assert np.shares_memory(frame.to_numpy(), columns.values)
+    assert list(frame.columns[:4]) == ['index_level', 'portfolio_return', 'return_SPX', 'return_SX5E']
+
+    path = tmp_path / 'output.csv'
+    columns.to_csv(path, columns=['index_level'])
+    computed_df = pd.read_csv(path)
+    expected_df = pd.read_csv('expected_output.csv')
+    assert computed_df['date'].tolist() == expected_df['date'].tolist()
+    np.testing.assert_allclose(computed_df['index_level'], expected_df['index_level'], atol=1e-10, rtol=0)
+
+
+def long_history_strategy(tmp_path, n_dates: int, iterative: bool) -> EqualWeightStrategy:
+    dates = pd.bdate_range('2000-01-03', periods=n_dates)
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(n_dates, 3)), axis=0))
+    filename = tmp_path / 'long_prices.csv'
+    if not filename.exists():
+        pd.DataFrame({
+            'date': np.repeat(dates.strftime('%Y-%m-%d'), 3),
+            'ticker': np.tile(['A', 'B', 'C'], n_dates),
+            'close': prices.ravel(),
+        }).to_csv(filename, index=False)
+    md = MarketData(str(filename))
+    return EqualWeightStrategy(
+        md=md,
+        basket=['A', 'B', 'C'],
+        seed_date=dates[0].date(),
+        calendar=md.get_calendar(),
+        initial_index_level=100,
+        iterative=iterative,
+    )
+
+
+def test_iterative_compute_state_beyond_recursion_limit(tmp_path):
+    """Test that the iterative walk computes a cold history longer than the recursion limit, like the recursion."""
+    n_dates = 3 * sys.getrecursionlimit()
+    iterative = long_history_strategy(tmp_path, n_dates, iterative=True)
+    recursive = long_history_strategy(tmp_path, n_dates, iterative=False)
+    dates = list(iterative.calendar)
+    target = dates[-2]
+
+    with pytest.raises(RecursionError):
+        recursive.compute_state(target)
+
+    state = iterative.compute_state(target)
+    # Warm the recursive path date by date so it never recurses more than one level
+    expected = get_states(recursive, None, target)
+    assert state == expected[target]
+    assert get_states(iterative, None, target) == expected
+
+
+def test_iterative_compute_state_resumes_from_cache(tmp_path):
+    """Test that the iterative walk restarts from the latest valid cached state after a correction."""
+    strategy = long_history_strategy(tmp_path, 300, iterative=True)
+    dates = list(strategy.calendar)
+    strategy.compute_state(dates[-2])
+
+    strategy.md.update_price(dates[150], 'A', strategy.md.get(dates[150], 'A') * 1.05)
+    # Querying the corrected date invalidates it and every later date, the earlier ones stay cached
+    strategy.compute_state(dates[150])
+    assert strategy._state_store.has_state(dates[149], 1)
+    assert not strategy._state_store.has_state(dates[151], 1)
+    updated = strategy.compute_state(dates[-2])
+
+    reference = long_history_strategy(tmp_path, 300, iterative=False)
+    reference.md.update_price(dates[150], 'A', reference.md.get(dates[150], 'A') * 1.05)
+    assert updated == get_states(reference, None, dates[-2])[dates[-2]]
+
+
+def test_update_price_invalidates_later_states_eagerly():
+    """Test that a correction is seen by later dates without querying the corrected date first."""
+    strategy = initialise()
+    md = strategy.md
+    target = date.fromisoformat("2023-01-10")
+    original = strategy.compute_state(target)
+
+    md.update_price(date.fromisoformat("2023-01-04"), "SPX", md.get(date.fromisoformat("2023-01-04"), "SPX") * 1.1)
+    updated = strategy.compute_state(target)
+    assert updated.index_level != original.index_level
+
+    expected = initialise()
+    expected.md.update_price(date.fromisoformat("2023-01-04"), "SPX",
+                             expected.md.get(date.fromisoformat("2023-01-04"), "SPX") * 1.1)
+    assert updated == expected.compute_state(target)
+
+
+def corrected(strategy: EqualWeightStrategy, when: str, ticker: str = "SPX", factor: float = 1.1) -> None:
+    strategy.md.update_price(date.fromisoformat(when), ticker, strategy.md.get(date.fromisoformat(when), ticker) * factor)
+
+
+def strategy_with(**kwargs) -> EqualWeightStrategy:
+    md = MarketData('sample_prices.csv', cache=False)
+    options = dict(md=md, basket=["SPX", "SX5E", "HSI"], seed_date=date.fromisoformat("2023-01-02"),
+                   calendar=md.get_calendar(), initial_index_level=100)
+    options.update(kwargs)
+    return EqualWeightStrategy(**options)
+
+
+def test_eager_recompute_refreshes_cache():
+    """Test that an eager strategy recomputes the invalidated states before update_price returns."""
+    strategy = strategy_with(recompute='eager')
+    target = date.fromisoformat("2023-06-29")
+    get_states(strategy, None, target)
+
+    corrected(strategy, "2023-03-01")
+    assert strategy._state_store.latest_date == target
+
+    reference = initialise()
+    corrected(reference, "2023-03-01")
+    assert get_states(strategy, None, target) == get_states(reference, None, target)
+
+
+def test_background_recompute_refreshes_cache():
+    """Test that a background strategy recomputes the invalidated states on its worker thread."""
+    strategy = strategy_with(recompute='background')
+    target = date.fromisoformat("2023-06-29")
+    get_states(strategy, None, target)
+
+    with strategy.md.batch_updates():
+        corrected(strategy, "2023-05-02")
+        corrected(strategy, "2023-03-01", "HSI", 0.95)
+    assert strategy.wait_until_fresh(timeout=10)
+    assert strategy._state_store.latest_date == target
+    strategy.close()
+
+    reference = initialise()
+    corrected(reference, "2023-05-02")
+    corrected(reference, "2023-03-01", "HSI", 0.95)
+    assert get_states(strategy, None, target) == get_states(reference, None, target)
+
+
+def test_background_strategy_can_be_garbage_collected():
+    """Test that the worker thread does not keep a strategy alive, and stops once it is collected."""
+    strategy = strategy_with(recompute='background')
+    get_states(strategy, None, date.fromisoformat("2023-03-31"))
+    corrected(strategy, "2023-03-01")
+    assert strategy.wait_until_fresh(timeout=10)
+    recomputer, collected = strategy._recomputer, weakref.ref(strategy)
+
+    del strategy
+    gc.collect()
+    assert collected() is None
+    recomputer._thread.join(timeout=10)
+    assert not recomputer._thread.is_alive()
+
+
+def test_corrections_outside_basket_keep_cache():
+    """Test that a correction of an asset outside the basket leaves the cached states alone."""
+    strategy = strategy_with(basket=["SPX", "SX5E"])
+    get_states(strategy, None, date.fromisoformat("2023-06-29"))
+    cached = len(strategy._state_store)
+
+    corrected(strategy, "2023-03-01", "HSI")
+    assert len(strategy._state_store) == cached
+
+
+def test_invalid_recompute_mode():
+    with pytest.raises(ValueError, match="recompute must be one of"):
+        strategy_with(recompute='sometimes')
+
+
+@pytest.mark.parametrize("recompute", ['lazy', 'eager'])
+def test_graph_states_match_compute_state(recompute):
+    """Test that the node graph gives exactly the day-by-day states, before and after corrections."""
+    strategy = strategy_with(graph=True, recompute=recompute)
+    reference = initialise()
+    target = date.fromisoformat("2023-06-29")
+    assert get_states(strategy, None, target) == get_states(reference, None, target)
+
+    for s in (strategy, reference):
+        with s.md.batch_updates():
+            corrected(s, "2023-05-02")
+            corrected(s, "2023-03-01", "HSI", 0.95)
+        corrected(s, "2023-06-15", "SX5E")
+    assert get_states(strategy, None, target) == get_states(reference, None, target)
+
+
+def test_graph_recomputes_only_affected_nodes():
+    """Test that a correction recomputes the nodes after it, but weights only up to the next rebalance."""
+    strategy = strategy_with(graph=True)
+    strategy.compute_state(date.fromisoformat("2023-06-29"))
+    computed = strategy._graph.computations
+
+    corrected(strategy, "2023-06-15")
+    strategy.compute_state(date.fromisoformat("2023-06-29"))
+    recomputed = strategy._graph.computations - computed
+    assert 0 < recomputed <= 2 + 2 + 3 * len(strategy.resolve_dates(date.fromisoformat("2023-06-15"),
+                                                                     date.fromisoformat("2023-06-29")))
+    assert not strategy._graph.is_dirty(('weights', date.fromisoformat("2023-05-31")))
+
+
+def test_graph_state_before_seed_date():
+    strategy = strategy_with(graph=True, seed_date=date.fromisoformat("2023-01-04"))
+    with pytest.raises(ScheduleError):
+        strategy.compute_state(date.fromisoformat("2023-01-03"))